@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+'''ip access-list評価用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+
+from common.prefix_list import ipv4_to_int, int_to_ipv4, mask_of
+
+try:
+    import numpy as np  # 一括評価(ベクトル演算)に使用、未インストールの場合は逐次評価で代替
+except ImportError:
+    np = None
+
+
+# 'ip access-list'コマンド(ACL一行目)からのACL名称取得用正規表現
+pattern_access_list_name = re.compile(r'''
+    ^ip\s{1}access-list\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+# ACLエントリ(ACL二行目以降)の構成要素取得用正規表現
+# 例: '10 permit ip 100.100.8.0 0.0.0.3 any'
+#      seq: '10', action: 'permit', protocol: 'ip', rest: '100.100.8.0 0.0.0.3 any'
+pattern_access_list_entry = re.compile(r'''
+    ^(?P<seq>[0-9]{1,})
+    \s{1}(?P<action>permit|deny)
+    \s{1}(?P<protocol>\S+)
+    \s{1}(?P<rest>.+)$
+    ''', re.VERBOSE)
+
+ALL_ONES = (1 << 32) - 1
+
+# L4のポート条件の演算子と、演算子を含めたトークン数
+PORT_OPERATORS = {"eq": 2, "neq": 2, "gt": 2, "lt": 2, "range": 3}
+
+
+def skip_port_spec(tokens: list)-> int:
+    ''' アドレス指定に続くL4のポート条件(eq/neq/gt/lt N、range N M)のトークン数を返す(ポート条件が無い場合は0) '''
+    return PORT_OPERATORS.get(tokens[0], 0) if tokens != [] else 0
+
+
+def parse_address_spec(tokens: list)-> ((int, int), int) or None:
+    ''' アドレス指定部分を解析し、(アドレス, ワイルドカード)と消費したトークン数を返す
+    引数: tokens - 空白で分割したトークンのリスト(先頭がアドレス指定の開始位置)
+    戻り値: ((アドレス(int), ワイルドカード(int)), 消費トークン数)、解析できない場合はNone
+    対応形式:
+     any                   - (0, 255.255.255.255)
+     host A.B.C.D          - (A.B.C.D, 0)
+     A.B.C.D/nn            - (A.B.C.D, nnに対応するワイルドカード)
+     A.B.C.D W.W.W.W       - (A.B.C.D, W.W.W.W)
+    '''
+    try:
+        if tokens[0] == "any":
+            return (0, ALL_ONES), 1
+        if tokens[0] == "host":
+            return (ipv4_to_int(tokens[1]), 0), 2
+        if "/" in tokens[0]:
+            addr, length = tokens[0].split("/")
+            wildcard = ALL_ONES ^ mask_of(int(length))
+            return (ipv4_to_int(addr) & ~wildcard & ALL_ONES, wildcard), 1
+        wildcard = ipv4_to_int(tokens[1])
+        return (ipv4_to_int(tokens[0]) & ~wildcard & ALL_ONES, wildcard), 2
+    except (IndexError, ValueError):
+        return None
+
+
+
+class AccessListEntry:
+    '''
+    ip access-listの1エントリを表すクラス
+    インスタンス変数
+    seq          : seq番号(int)
+    action       : "permit"/"deny"(str)
+    protocol     : プロトコル(str、"ip"以外はL4条件を評価せずアドレスのみでマッチを判定する)
+    src, src_wc  : 送信元アドレス(int)とワイルドカード(int)
+    dst, dst_wc  : 宛先アドレス(int)とワイルドカード(int)
+    line_number  : 元コマンド行番号(int, 不明の場合はNone)
+    command      : 元コマンド文字列(str)
+    マッチ条件: (送信元 & ~src_wc) == src かつ (宛先 & ~dst_wc) == dst
+    '''
+    __slots__ = ("seq", "action", "protocol", "src", "src_wc", "dst", "dst_wc", "line_number", "command")
+
+    def __init__(self, seq: int, action: str, src: (int, int), dst: (int, int),
+                 line_number: int = None, command: str = "", protocol: str = "ip") -> None:
+        self.seq = seq; self.action = action; self.protocol = protocol
+        self.src, self.src_wc = src; self.dst, self.dst_wc = dst
+        self.line_number = line_number; self.command = command
+
+
+    def __repr__(self):
+        return 'seq {} {} {} {} {} {} {}'.format(self.seq, self.action, self.protocol,
+                                              int_to_ipv4(self.src), int_to_ipv4(self.src_wc),
+                                              int_to_ipv4(self.dst), int_to_ipv4(self.dst_wc))
+
+
+    @classmethod
+    def from_command(cls, command: str, line_number: int = None)-> 'AccessListEntry' or None:
+        ''' コマンド文字列よりエントリを生成する
+        プロトコルが"ip"以外のエントリ(tcp/udp等)は送信元/宛先アドレスのみを評価対象とする
+        (アドレスに続くポート条件等のL4条件は読み飛ばす、フローはプロトコル・ポートを持たないため)
+        remark等のエントリ以外のコマンド、アドレス指定を解析できないものはNoneを返す
+        '''
+        m = pattern_access_list_entry.search(command)
+        if m is None:
+            return None
+
+        tokens = m.group('rest').split()
+        r1 = parse_address_spec(tokens)
+        if r1 is None: return None
+        tokens = tokens[r1[1]:]; tokens = tokens[skip_port_spec(tokens):]
+        r2 = parse_address_spec(tokens)
+        if r2 is None: return None
+
+        return cls(int(m.group('seq')), m.group('action'), r1[0], r2[0], line_number, command, m.group('protocol'))
+
+
+
+class AccessList:
+    '''
+    ip access-list 1つ分のエントリをseq番号順に保持し、送信元/宛先アドレスの組に対する
+    first match評価(最初にマッチしたエントリのseq番号とaction)を一括で行うクラス
+
+    一括評価(evaluate)
+    numpyが利用可能な場合は、エントリ毎に全件分のワイルドカード比較をベクトル演算で行い、
+    未決定の要素のみに結果を設定する(全件決定した時点で打ち切り)
+    計算量はO(エントリ数 x 件数)だが、内側の件数分のループはnumpy内部で実行される
+    numpyが利用できない場合は同じ評価を逐次処理で行う
+    '''
+
+    def __init__(self, name: str, line_number: int = None) -> None:
+        self.name = name
+        self.line_number = line_number # ACL一行目(ip access-list)の行番号
+        self.entries = []
+        self.arrays = None
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def add(self, entry: 'AccessListEntry')-> None:
+        ''' エントリを追加する(コンパイル済みの場合はコンパイル結果を破棄) '''
+        self.entries.append(entry); self.arrays = None
+
+
+    def compile(self)-> 'AccessList':
+        ''' エントリをseq番号順に整列し、numpy利用可能時は比較用の配列を作成する '''
+        self.entries.sort(key=lambda e: e.seq)
+        if np is not None:
+            self.arrays = tuple(np.array([getattr(e, key) for e in self.entries], dtype=np.uint32)
+                                for key in ("src", "src_wc", "dst", "dst_wc"))
+        return self
+
+
+    def match(self, src, dst)-> 'AccessListEntry' or None:
+        ''' 送信元/宛先アドレス(A.B.C.D形式の文字列またはint)に最初にマッチするエントリを返す '''
+        i = self.match_index(src, dst)
+        return self.entries[i] if i >= 0 else None
+
+
+    def match_index(self, src, dst)-> int:
+        ''' 送信元/宛先アドレス(A.B.C.D形式の文字列またはint)に最初にマッチするエントリのentriesでの添字を返す(マッチ無しは-1) '''
+        src = ipv4_to_int(src) if isinstance(src, str) else src
+        dst = ipv4_to_int(dst) if isinstance(dst, str) else dst
+        for i, e in enumerate(self.entries):
+            if (src & ~e.src_wc) == e.src and (dst & ~e.dst_wc) == e.dst:
+                return i
+        return -1
+
+
+    def evaluate(self, src, dst)-> (list, list):
+        ''' 送信元/宛先アドレスの組を一括評価する
+        引数: src, dst - 同じ長さのアドレス列(numpy.uint32配列、またはintのリスト)
+        戻り値: (マッチしたエントリの添字の列, actionの列)
+                numpy利用時 - 添字はint64配列(マッチ無しは-1)、actionはbool配列(True:permit)
+                numpy未使用時 - 添字はintのリスト(マッチ無しは-1)、actionはboolのリスト
+                添字はentries(評価後の並び)に対するもの(同一seqのエントリが複数ある場合も一意に定まる)
+                マッチ無し(暗黙のdeny)のactionはFalse
+        '''
+        if self.arrays is None and np is not None: self.compile()
+
+        if np is None:
+            indexes = []; actions = []
+            for s, d in zip(src, dst):
+                i = self.match_index(int(s), int(d))
+                indexes.append(i)
+                actions.append(i >= 0 and self.entries[i].action == "permit")
+            return indexes, actions
+
+
+
+def compile_access_lists(commands: list, line_numbers: list = None)-> dict:
+    ''' ip access-list(一行目)とACLエントリ(二行目以降)から成るコマンド列からAccessListを作成し、
+    ACL名称をキーとする辞書で返す
+    引数: commands     - find_matching_line_for_each_config_level(pattern_ip_access_list, pattern_seqno, Lv=2)
+                         の抽出結果等のコマンド文字列のリスト
+          line_numbers - 各コマンドに対応する行番号のリスト(省略時はNone)
+    戻り値: {ACL名称: AccessList, ...}(出現順)
+    同一名称のACLが複数箇所に現れた場合は一つのACLとしてエントリを統合する
+    '''
+    if line_numbers is None:
+        line_numbers = [None] * len(commands)
+
+    access_lists = {}; current = None
+    for command, line_number in zip(commands, line_numbers):
+        m = pattern_access_list_name.search(command)
+        if m:
+            name = m.group('name')
+            if name not in access_lists:
+                access_lists[name] = AccessList(name, line_number)
+            current = access_lists[name]
+            continue
+        if current is None: continue
+        entry = AccessListEntry.from_command(command, line_number)
+        if entry is not None:
+            current.add(entry)
+
+    for acl in access_lists.values():
+        acl.compile()
+
+    return access_lists
+
+
+def addresses_to_array(addresses: list):
+    ''' A.B.C.D形式の文字列のリストをアドレス列(numpy利用時はuint32配列、未使用時はintのリスト)に変換する '''
+    values = [ipv4_to_int(addr) for addr in addresses]
+    return np.array(values, dtype=np.uint32) if np is not None else values
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+'''コマンド列の分割並列検索用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+
+# 一つのワーカプロセスあたりのチャンク数(チャンク毎の処理時間のばらつきを均すため、ワーカ数より多く分割する)
+CHUNKS_PER_WORKER = 4
+
+# 共有メモリ上の行位置表の要素の型(符号なし64bit整数)とバイト数
+OFFSET_TYPECODE = 'Q'
+OFFSET_SIZE = array(OFFSET_TYPECODE).itemsize
+
+
+
+class LineMatch:
+    '''
+    ワーカプロセスでの検索結果(re.Match)のうち、find_matching_line_for_each_config_levelで使用する
+    キャプチャ部分のみを保持するクラス(re.Matchはプロセス間で受け渡しできないため)
+    groups/span/groupはre.Matchの同名メソッドと同じ値を返す(span/groupはキャプチャの番号1以上のみ)
+
+    インスタンス変数
+    spans   : キャプチャ毎の(開始位置, 終了位置)のタプル
+    strings : キャプチャ毎の文字列のタプル(re.Match.groups()と同じ)
+    '''
+    __slots__ = ("spans", "strings")
+
+    def __init__(self, m: 're.Match') -> None:
+        self.spans = tuple(m.span(j+1) for j in range(len(m.groups()))); self.strings = m.groups()
+
+
+    def groups(self)-> tuple:
+        return self.strings
+
+
+    def span(self, n: int)-> tuple:
+        return self.spans[n-1]
+
+
+    def group(self, n: int)-> str:
+        return self.strings[n-1]
+
+
+
+def split_chunks(count: int, chunks: int)-> list:
+    ''' 行数countのコマンド列を、行数のほぼ等しいchunks個以下の連続した範囲に分割する
+    戻り値: [(開始index, 終了index(含まない)), ...](空の範囲は含めない)
+    '''
+    size = max(1, -(-count // max(1, chunks)))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def match_chunk(name: str, start: int, end: int, patterns: list)-> list:
+    ''' ワーカプロセスにて共有メモリ上のチャンク一つ分の各行を各検索パターンで検索する
+    引数: name     - 共有メモリの名称
+          start    - チャンクの先頭行のコマンド列全体でのindex
+          end      - チャンクの終了行のコマンド列全体でのindex(含まない)
+          patterns - 検索パターンのリスト
+    戻り値: 検索パターン毎の{コマンドのindex: LineMatch}(マッチした行のみ)のリスト
+    '''
+    shm = SharedMemory(name=name)
+    try:
+        count = array(OFFSET_TYPECODE, bytes(shm.buf[:OFFSET_SIZE]))[0]
+        offsets = array(OFFSET_TYPECODE, bytes(shm.buf[OFFSET_SIZE * (start + 1) : OFFSET_SIZE * (end + 2)]))
+        base = OFFSET_SIZE * (count + 2)
+        blob = bytes(shm.buf[base + offsets[0] : base + offsets[-1]])
+    finally:
+        shm.close()
+
+    out = [{} for _ in patterns]
+    for i in range(start, end):
+        line = blob[offsets[i - start] - offsets[0] : offsets[i - start + 1] - offsets[0]].decode('utf-8', 'surrogatepass')
+        for matches, pattern in zip(out, patterns):
+            m = re.search(pattern, line)
+            if m:
+                matches[i] = LineMatch(m)
+    return out
+
+
+def match_lines_in_chunks(commands: list, patterns: list, workers: int)-> list:
+    ''' コマンド列の全行を各検索パターンで検索する(コマンド列をチャンクに分割し、ワーカプロセスで並列に検索する)
+    引数: commands - コマンド文字列のリスト(行頭の空白・改行除去済み)
+          patterns - 検索パターンのリスト
+          workers  - ワーカプロセス数
+    戻り値: 検索パターン毎の{コマンドのindex: LineMatch}(マッチした行のみ)のリスト
+            (全行をre.searchで検索した結果と同一。patternsと同じ順)
+
+    共有メモリには先頭に行数と各行の開始バイト位置の表(行数+1個)を、続けて全行のutf-8のバイト列を区切りなしで一度だけ置き、
+    各ワーカにはチャンクの行範囲のみを渡す(行位置は表で明示するため、改行を含むコマンドがあってもindexはずれない)
+    検索は行毎に独立しているため、チャンクは任意の行の境界で分割してよい
+    Lv1/Lv2のブロックの判定(一行目の検索パターンでヒットした行から次のヒット行の直前まで)はチャンクを跨ぐため、
+    チャンク毎の検索結果を連結した後に呼び出し元(scan_config_level)で行う
+    '''
+    results = [{} for _ in patterns]
+    if commands == [] or patterns == []:
+        return results
+
+    blobs = [command.encode('utf-8', 'surrogatepass') for command in commands]
+    offsets = array(OFFSET_TYPECODE, [len(commands), 0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    head = offsets.tobytes(); size = len(head) + offsets[-1]
+
+    shm = SharedMemory(create=True, size=max(1, size))
+    try:
+        shm.buf[:len(head)] = head
+        shm.buf[len(head):size] = b''.join(blobs)
+        del blobs
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(match_chunk, shm.name, start, end, patterns)
+                       for start, end in split_chunks(len(commands), workers * CHUNKS_PER_WORKER)]
+            for future in futures: # チャンクの順に連結(各行のindexはコマンド列全体でのもの)
+                for matches, found in zip(results, future.result()):
+                    matches.update(found)
+    finally:
+        shm.close(); shm.unlink()
+
+    return results
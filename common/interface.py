@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+'''IF設定(interface/ip address)解析用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+from bisect import bisect_right
+
+from common.prefix_list import ipv4_to_int, int_to_ipv4, mask_of, MAX_LENGTH
+from common.vrf_index import pattern_vrf_name, DEFAULT_VRF
+
+
+# 'interface'コマンド(IF設定一行目)からのIF名称取得用正規表現
+pattern_interface_name = re.compile(r'''
+    ^interface\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+# 'encapsulation dot1q'コマンドのVLAN番号取得用正規表現
+pattern_dot1q_vlan = re.compile(r'''
+    ^encapsulation\s{1}dot1q\s{1}(?P<vlan>[0-9]{1,})
+    ''', re.VERBOSE)
+
+# 'ip access-group'コマンドの構成要素取得用正規表現
+# 例: 'ip access-group vSAMPLE-TEST-NER-IN-ACL in'
+pattern_access_group = re.compile(r'''
+    ^ip\s{1}access-group\s{1}(?P<name>\S+)(?:\s{1}(?P<direction>in|out))?
+    ''', re.VERBOSE)
+
+# 'description'コマンドの説明文取得用正規表現
+pattern_description = re.compile(r'''
+    ^description\s{1}(?P<text>.*)$
+    ''', re.VERBOSE)
+
+# IF設定の範囲の終端とするコマンド(字下げの情報が無い入力の場合のみ使用、IF設定の配下に現れない設定一行目)
+pattern_interface_end = re.compile(r'''
+    ^(?:router|vrf\s{1}context|route-map|ip\s{1}prefix-list|ip\s{1}access-list|ip\s{1}route|track|line|feature|hostname)\b
+    ''', re.VERBOSE)
+
+# 'ip address'コマンド(解析できないものを含む)判定用正規表現
+pattern_address_command = re.compile(r'''
+    ^ip\s{1}address\s{1}
+    ''', re.VERBOSE)
+
+# 'ip address'コマンドの構成要素取得用正規表現
+# 例: 'ip address 192.168.16.1/28', 'ip address 192.168.16.1 255.255.255.240'
+pattern_interface_address = re.compile(r'''
+    ^ip\s{1}address\s{1}
+    (?P<address>(?:[0-9]{1,3}\.){3}[0-9]{1,3})
+    (?:/(?P<length>[0-9]{1,2})|\s{1}(?P<netmask>(?:[0-9]{1,3}\.){3}[0-9]{1,3}))
+    ''', re.VERBOSE)
+
+
+def netmask_to_length(netmask: int)-> int:
+    ''' ネットマスク(32bit整数)をプレフィックス長に変換する(連続したビット列でない場合はValueErrorをスロー) '''
+    length = bin(netmask).count("1")
+    if mask_of(length) != netmask:
+        raise ValueError('{} is not supported'.format(int_to_ipv4(netmask)))
+    return length
+
+
+
+class InterfaceAddress:
+    '''
+    IFに設定されたipv4アドレス1つ分を表すクラス
+    インスタンス変数
+    vrf         : 所属VRF名称(str)
+    interface   : IF名称(str)
+    address     : アドレス(int)
+    length      : プレフィックス長(int)
+    line_number : 元コマンド(ip address)の行番号(int, 不明の場合はNone)
+    command     : 元コマンド文字列(str)
+    '''
+    __slots__ = ("vrf", "interface", "address", "length", "line_number", "command")
+
+    def __init__(self, vrf: str, interface: str, address: int, length: int,
+                 line_number: int = None, command: str = "") -> None:
+        self.vrf = vrf; self.interface = interface
+        self.address = address; self.length = length
+        self.line_number = line_number; self.command = command
+
+
+    def __repr__(self):
+        return '{} {} {}/{}'.format(self.vrf, self.interface, int_to_ipv4(self.address), self.length)
+
+
+    def network(self)-> int:
+        ''' ネットワークアドレス(int)を返す '''
+        return self.address & mask_of(self.length)
+
+
+    def interval(self)-> (int, int):
+        ''' サブネットが占めるアドレス範囲を整数区間(start, end)(両端を含む)で返す '''
+        start = self.network()
+        return start, start + (1 << (MAX_LENGTH - self.length)) - 1
+
+
+    def prefix(self)-> str:
+        ''' サブネットを'A.B.C.D/nn'形式の文字列で返す '''
+        return "{}/{}".format(int_to_ipv4(self.network()), self.length)
+
+
+
+def parse_address(command: str)-> (int, int) or None:
+    ''' 'ip address'コマンドから(アドレス(int), プレフィックス長(int))を取り出す(解析できない場合はNone) '''
+    m = pattern_interface_address.search(command)
+    if m is None:
+        return None
+    try:
+        address = ipv4_to_int(m.group('address'))
+        length = int(m.group('length')) if m.group('length') is not None \
+                 else netmask_to_length(ipv4_to_int(m.group('netmask')))
+    except ValueError:
+        return None
+    return (address, length) if length <= MAX_LENGTH else None
+
+
+
+class InterfaceRow:
+    '''
+    IF表(InterfaceTable)の1行(IF設定1つ分)を表すクラス
+    インスタンス変数
+    interface     : IF名称(str)
+    parent        : 親IF名称(str, サブIF(「親IF名称.Sub-IF番号」形式)でない場合はNone)
+    number        : Sub-IF番号(int, サブIFでない場合はNone)
+    description   : description(str, 設定無しの場合はNone)
+    vrf           : 所属VRF名称(str, vrf memberの無い場合はDEFAULT_VRF)
+    addresses     : ip addressのInterfaceAddressのリスト(出現順、解析できたもののみ)
+    address_lines : ip addressの元コマンドの行番号のリスト(出現順、解析できないものを含む)
+    vlan          : encapsulation dot1qのVLAN番号(int, 設定無しの場合はNone)
+    access_groups : ip access-groupの[(ACL名称, 方向("in"/"out"/None), 行番号), ...]
+    line_number   : 元コマンド(interface)の行番号(int)
+    command       : 元コマンド(interface)の文字列(str)
+    lines         : {"description"/"vrf"/"vlan": 元コマンドの行番号, ...}(設定の有るもののみ)
+    '''
+    __slots__ = ("interface", "parent", "number", "description", "vrf", "addresses", "address_lines", "vlan",
+                 "access_groups", "line_number", "command", "lines")
+
+    def __init__(self, interface: str, line_number: int = None, command: str = "") -> None:
+        self.interface = interface
+        parent, _, number = interface.rpartition(".")
+        self.parent = parent if parent != "" and number.isdigit() else None
+        self.number = int(number) if self.parent is not None else None
+        self.description = None; self.vrf = DEFAULT_VRF; self.addresses = []; self.address_lines = []; self.vlan = None
+        self.access_groups = []
+        self.line_number = line_number; self.command = command; self.lines = {}
+
+
+    def __repr__(self):
+        return '{} {} dot1q {}'.format(self.vrf, self.interface, self.vlan)
+
+
+
+class InterfaceTable:
+    '''
+    設定ファイル中の全IF設定をIF毎の行(InterfaceRow)として保持するクラス
+    コマンド列を一度だけ走査して作成し、IF設定を参照する各要望番号の処理で共有する
+
+    インスタンス変数
+    rows    : InterfaceRowのリスト(出現順)
+    by_name : {IF名称: InterfaceRow, ...}(同一名称のIF設定が複数ある場合は最初のもの)
+    by_line : {interfaceコマンドの行番号: InterfaceRow, ...}
+    '''
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.by_name = {}; self.by_line = {}
+        for row in rows:
+            self.by_name.setdefault(row.interface, row)
+            self.by_line[row.line_number] = row
+
+
+    def __len__(self):
+        return len(self.rows)
+
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+    def select(self, *patterns: 're.Pattern')-> list:
+        ''' interfaceコマンドがいずれかのパターンにマッチする行を出現順で返す(例: pattern_interface_EthernetXXXX) '''
+        return [row for row in self.rows if any(p.search(row.command) for p in patterns)]
+
+
+    @staticmethod
+    def addresses(rows: list)-> list:
+        ''' 行のリストに含まれるInterfaceAddressを出現順で返す '''
+        return [a for row in rows for a in row.addresses]
+
+
+
+def build_interface_table(commands: list, line_numbers: list = None, top_levels: list = None)-> 'InterfaceTable':
+    ''' 設定ファイル全体のコマンド列を一度走査してIF表を作成する
+    引数: commands     - 設定ファイル全体のコマンド文字列のリスト(行頭の空白除去済み)
+          line_numbers - 各コマンドに対応する行番号のリスト(省略時は1始まりの連番)
+          top_levels   - 各コマンドが字下げの無い行(設定一行目)かどうかのリスト(字下げの情報が無い場合はNone)
+    戻り値: InterfaceTable
+    IF設定の範囲はinterfaceコマンドから、次の字下げの無い行の直前までとする
+    (top_levelsがNoneの場合は、次のinterfaceコマンドまたはIF設定の配下に現れないコマンド(pattern_interface_end)の直前まで)
+    解析できないip addressは無視する
+    '''
+    if line_numbers is None:
+        line_numbers = range(1, len(commands) + 1)
+    if top_levels is None:
+        top_levels = [pattern_interface_end.search(command) is not None for command in commands]
+
+    rows = []; row = None
+    for command, line_number, top_level in zip(commands, line_numbers, top_levels):
+        m = pattern_interface_name.search(command)
+        if m:
+            row = InterfaceRow(m.group('name'), line_number, command); rows.append(row); continue
+        if row is None: continue
+        if top_level:
+            row = None; continue
+
+        m = pattern_vrf_name.search(command)
+        if m:
+            row.vrf = m.group('name'); row.lines["vrf"] = line_number; continue
+        if pattern_address_command.search(command):
+            row.address_lines.append(line_number)
+            address = parse_address(command)
+            if address is not None:
+                row.addresses.append(InterfaceAddress(row.vrf, row.interface, address[0], address[1], line_number, command))
+            continue
+        m = pattern_dot1q_vlan.search(command)
+        if m:
+            if row.vlan is None:
+                row.vlan = int(m.group('vlan')); row.lines["vlan"] = line_number
+            continue
+        m = pattern_access_group.search(command)
+        if m:
+            row.access_groups.append((m.group('name'), m.group('direction'), line_number)); continue
+        m = pattern_description.search(command)
+        if m and row.description is None:
+            row.description = m.group('text'); row.lines["description"] = line_number
+
+    return InterfaceTable(rows)
+
+
+def check_subinterface_vlans(subinterfaces: list)-> (list, list, list):
+    ''' サブIFのSub-IF番号とVLAN番号を突合する
+    引数: subinterfaces - サブIFのInterfaceRowのリスト(parentがNoneのものは呼び出し側で除く)
+    戻り値(タプル):
+    1. Sub-IF番号とVLAN番号が異なるサブIFのリスト
+    2. 同一親IFで先行サブIFとVLAN番号が重複するサブIF : [(InterfaceRow, 先行InterfaceRow), ...]
+    3. encapsulation dot1qの無いサブIFのリスト
+    いずれも入力順。VLAN重複は{(親IF名称, VLAN番号): 最初のサブIF}の辞書で判定する(O(n))
+    '''
+    mismatches = []; duplicates = []; missing = []
+    first = {}
+    for sub in subinterfaces:
+        if sub.vlan is None:
+            missing.append(sub); continue
+        if sub.vlan != sub.number:
+            mismatches.append(sub)
+        key = (sub.parent, sub.vlan)
+        if key in first:
+            duplicates.append((sub, first[key]))
+        else:
+            first[key] = sub
+    return mismatches, duplicates, missing
+
+
+def find_address_conflicts(addresses: list)-> (list, list):
+    ''' IFアドレスの重複とサブネットの重なりをVRF毎に検出する
+    引数: addresses - InterfaceAddressのリスト
+    戻り値(タプル):
+    1. アドレス重複 : [(InterfaceAddress, 同一アドレスの先行IFアドレス), ...]
+    2. サブネット重なり : [(InterfaceAddress, 重なりを持つ先行IFアドレス), ...](アドレス重複として検出したものは除く)
+    先行とは(VRF名称, サブネット開始アドレス, サブネット終端アドレスの降順, 行番号)の整列順で前にあることを指す
+
+    (VRF名称, 開始, -終端)で整列した区間列を一度走査し、VRF毎にそれまでの区間で終端が最大のものを保持する
+    処理中区間の開始が保持区間の終端以下であれば重なりとする。アドレス重複は(VRF名称, アドレス)の辞書で判定する
+    計算量は整列のO(n log n)と走査のO(n)
+    '''
+    ordered = sorted(addresses, key=lambda a: (a.vrf, a.interval()[0], -a.interval()[1], a.line_number or 0))
+
+    duplicates = []; overlaps = []
+    seen = {}; widest = None
+    for a in ordered:
+        start, end = a.interval()
+        if widest is not None and widest.vrf != a.vrf:
+            widest = None
+
+        key = (a.vrf, a.address)
+        if key in seen:
+            duplicates.append((a, seen[key]))
+        else:
+            seen[key] = a
+            if widest is not None and start <= widest.interval()[1]:
+                overlaps.append((a, widest))
+
+        if widest is None or end > widest.interval()[1]:
+            widest = a
+
+    return duplicates, overlaps
+
+
+
+class ConnectedIndex:
+    '''
+    IFのサブネットをVRF毎に開始アドレスの昇順の配列として保持し、アドレスを含む(直接接続の)IFを二分探索で求めるクラス
+
+    インスタンス変数
+    partitions : {VRF名称: (starts, ends, owners, parents), ...}
+                 starts/ends - サブネットの開始・終端アドレス(int)の配列((開始, -終端)の昇順)
+                 owners      - 各サブネットのInterfaceAddress
+                 parents     - 各サブネットを包含する直近のサブネットの添字(無い場合は-1)
+    検索内容
+    開始アドレスがアドレス以下である最後のサブネットをbisectで求め、アドレスを含まない場合は包含するサブネット(parents)を
+    辿る。サブネットどうしは包含か互いに素のいずれかであるため、最初に含むものがプレフィックス長の最も長いものとなる
+    計算量は構築がO(n log n)、検索がO(log n)(包含を辿る回数はプレフィックス長以下)
+    同一サブネットが複数ある場合は整列順で先のもの(行番号の小さいもの)を返す
+    '''
+
+    def __init__(self, addresses: list) -> None:
+        self.partitions = {}
+        groups = {}
+        for a in addresses:
+            groups.setdefault(a.vrf, []).append(a)
+
+        for vrf, group in groups.items():
+            group.sort(key=lambda a: (a.interval()[0], -a.interval()[1], a.line_number or 0))
+            starts = []; ends = []; parents = []; stack = []
+            for i, a in enumerate(group):
+                start, end = a.interval()
+                while stack != [] and ends[stack[-1]] < start:
+                    stack.pop()
+                parents.append(stack[-1] if stack != [] else -1)
+                starts.append(start); ends.append(end)
+                stack.append(i)
+            self.partitions[vrf] = (starts, ends, group, parents)
+
+
+    def lookup(self, vrf: str, address: int)-> 'InterfaceAddress' or None:
+        ''' 指定VRFでアドレスを含むサブネットのうちプレフィックス長の最も長いもののIFアドレスを返す(無い場合はNone) '''
+        if vrf not in self.partitions:
+            return None
+        starts, ends, owners, parents = self.partitions[vrf]
+        i = bisect_right(starts, address) - 1
+        while i >= 0 and ends[i] < address:
+            i = parents[i]
+        if i < 0:
+            return None
+        while parents[i] >= 0 and starts[parents[i]] == starts[i] and ends[parents[i]] == ends[i]:
+            i = parents[i] # 同一サブネットは整列順で先のもの
+        return owners[i]
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+
+'''ip prefix-list評価用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+from bisect import bisect_right
+
+
+# 'ip prefix-list'コマンドの構成要素取得用正規表現
+# 例: 'ip prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 10 permit 10.1.0.0/16 le 32'
+#      name  : 'vSAMPLE-001-TEST-STATIC-TO-BGP-PL'
+#      seq   : '10'
+#      action: 'permit'
+#      prefix: '10.1.0.0', length: '16'
+#      ge    : None, le: '32'
+pattern_prefix_list_entry = re.compile(r'''
+    ^ip\s{1}prefix-list\s{1}
+    (?P<name>\S+)                       # リスト名称
+    (?:\s{1}seq\s{1}(?P<seq>[0-9]{1,}))? # seq番号(省略可)
+    \s{1}(?P<action>permit|deny)
+    \s{1}(?P<prefix>(?:[0-9]{1,3}\.){3}[0-9]{1,3})
+    /(?P<length>[0-9]{1,2})
+    (?:\s{1}ge\s{1}(?P<ge>[0-9]{1,2}))?  # ge(省略可)
+    (?:\s{1}le\s{1}(?P<le>[0-9]{1,2}))?  # le(省略可)
+    (?:\s{1}|$)
+    ''', re.VERBOSE)
+
+# 経路(A.B.C.D/nn形式)取得用正規表現
+pattern_route = re.compile(r'''
+    ^(?P<prefix>(?:[0-9]{1,3}\.){3}[0-9]{1,3})(?:/(?P<length>[0-9]{1,2}))?$
+    ''', re.VERBOSE)
+
+MAX_LENGTH = 32 # ipv4プレフィックス長の最大値
+
+
+def ipv4_to_int(addr: str)-> int:
+    ''' A.B.C.D形式のipv4アドレス文字列を32bit整数に変換する
+    引数: addr(str)
+    戻り値: 整数値(int)、各オクテットが0～255の範囲外の場合はValueErrorをスロー
+    '''
+    octets = addr.split(".")
+    if len(octets) != 4:
+        raise ValueError('{} is not supported'.format(addr))
+    n = 0
+    for octet in octets:
+        v = int(octet)
+        if v < 0 or v > 255:
+            raise ValueError('{} is not supported'.format(addr))
+        n = (n << 8) | v
+    return n
+
+
+def int_to_ipv4(n: int)-> str:
+    ''' 32bit整数をA.B.C.D形式のipv4アドレス文字列に変換する '''
+    return "{}.{}.{}.{}".format((n >> 24) & 0xff, (n >> 16) & 0xff, (n >> 8) & 0xff, n & 0xff)
+
+
+def mask_of(length: int)-> int:
+    ''' プレフィックス長に対応するネットマスク(32bit整数)を返す '''
+    return ((1 << MAX_LENGTH) - 1) ^ ((1 << (MAX_LENGTH - length)) - 1)
+
+
+def route_to_int(route)-> (int, int):
+    ''' 経路をネットワークアドレス(int)とプレフィックス長(int)のタプルに変換する
+    引数: route - 'A.B.C.D/nn'形式の文字列、'A.B.C.D'形式の文字列(/32と見なす)、
+                  または(ネットワークアドレス(int), プレフィックス長(int))のタプル
+    戻り値: (ネットワークアドレス, プレフィックス長) - host bit部分には0マスクを施す
+    '''
+    if isinstance(route, tuple):
+        network, length = route
+    else:
+        m = pattern_route.match(str(route).strip())
+        if m is None:
+            raise ValueError('{} is not supported'.format(route))
+        network = ipv4_to_int(m.group('prefix'))
+        length = int(m.group('length')) if m.group('length') is not None else MAX_LENGTH
+
+    if length < 0 or length > MAX_LENGTH:
+        raise ValueError('{} is not supported'.format(route))
+
+    return network & mask_of(length), length
+
+
+
+class PrefixListEntry:
+    '''
+    ip prefix-listの1エントリ(1コマンド行)を表すクラス
+    インスタンス変数
+    name        : リスト名称(str)
+    seq         : seq番号(int)
+    action      : "permit"/"deny"(str)
+    network     : ネットワークアドレス(int, host bit部分は0マスク済み)
+    length      : プレフィックス長(int)
+    ge, le      : マッチ対象とするプレフィックス長の下限・上限(int)
+                  ge/le指定無し - length ～ length(完全一致)
+                  leのみ指定    - length ～ le
+                  geのみ指定    - ge ～ 32
+                  ge/le指定     - ge ～ le
+    line_number : 元コマンド行番号(int, 不明の場合はNone)
+    command     : 元コマンド文字列(str)
+    '''
+    __slots__ = ("name", "seq", "action", "network", "length", "ge", "le", "line_number", "command")
+
+    def __init__(self, name: str, seq: int, action: str, network: int, length: int,
+                 ge: int = None, le: int = None, line_number: int = None, command: str = "") -> None:
+
+        self.name = name; self.seq = seq; self.action = action
+        self.network = network & mask_of(length); self.length = length
+        self.ge = ge if ge is not None else length
+        self.le = le if le is not None else (MAX_LENGTH if ge is not None else length)
+        self.line_number = line_number; self.command = command
+
+
+    def __repr__(self):
+        return '{} seq {} {} {}/{} ge {} le {}'.format(self.name, self.seq, self.action,
+                                                         int_to_ipv4(self.network), self.length, self.ge, self.le)
+
+
+    def interval(self)-> (int, int):
+        ''' 本エントリのプレフィックスが占めるアドレス範囲を整数区間(start, end)(両端を含む)で返す '''
+        return self.network, self.network + (1 << (MAX_LENGTH - self.length)) - 1
+
+
+    def covers(self, network: int, length: int)-> bool:
+        ''' 経路(network/length)が本エントリにマッチするかどうかを返す '''
+        return self.ge <= length <= self.le and length >= self.length and \
+               (network & mask_of(self.length)) == self.network
+
+
+    @classmethod
+    def from_command(cls, command: str, line_number: int = None, seq: int = None)-> 'PrefixListEntry' or None:
+        ''' コマンド文字列よりエントリを生成する
+        引数: command     - 'ip prefix-list ...'のコマンド文字列
+              line_number - 元コマンド行番号
+              seq         - seq番号省略時に使用する値
+        戻り値: PrefixListEntryインスタンス、解析できない場合はNone
+        '''
+        m = pattern_prefix_list_entry.search(command)
+        if m is None:
+            return None
+        try:
+            network = ipv4_to_int(m.group('prefix'))
+        except ValueError:
+            return None
+
+        length = int(m.group('length'))
+        ge = int(m.group('ge')) if m.group('ge') is not None else None
+        le = int(m.group('le')) if m.group('le') is not None else None
+        if length > MAX_LENGTH or (ge is not None and ge > MAX_LENGTH) or (le is not None and le > MAX_LENGTH):
+            return None
+
+        return cls(m.group('name'),
+                   int(m.group('seq')) if m.group('seq') is not None else seq,
+                   m.group('action'), network, length, ge, le, line_number, command)
+
+
+
+class IntervalSet:
+    '''
+    整数区間(start, end)(両端を含む)の集合を、整列と一度の線形走査で重なり・隣接を結合した
+    互いに素な区間列として保持し、区間の被覆・交差の判定を二分探索で行うクラス
+    構築はO(n log n)、判定は1区間あたりO(log n)
+
+    例: [(10, 19), (0, 4), (5, 7), (15, 30)] => [(0, 7), (10, 30)]
+    '''
+
+    def __init__(self, intervals) -> None:
+        merged = []
+        for start, end in sorted(intervals):
+            if merged != [] and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self.intervals = [tuple(x) for x in merged]
+        self.starts = [x[0] for x in self.intervals]
+
+
+    def __len__(self):
+        return len(self.intervals)
+
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+
+    def covers(self, interval: (int, int))-> bool:
+        ''' 区間全体がいずれかの結合済み区間に含まれるかどうかを返す '''
+        i = bisect_right(self.starts, interval[0]) - 1
+        return i >= 0 and self.intervals[i][1] >= interval[1]
+
+
+    def intersects(self, interval: (int, int))-> bool:
+        ''' 区間がいずれかの結合済み区間と重なりを持つかどうかを返す '''
+        i = bisect_right(self.starts, interval[1]) - 1
+        return i >= 0 and self.intervals[i][1] >= interval[0]
+
+
+
+class PrefixList:
+    '''
+    同一名称のip prefix-listエントリ群をseq番号順に保持し、二分木(trie)にコンパイルして評価するクラス
+
+    評価内容
+    経路R(network/length)に対し、seq番号の小さい順に最初にマッチしたエントリを返す(first match)
+    いずれのエントリにもマッチしない場合はNone(暗黙のdeny)
+
+    trieの構造
+    ノード(list) : [子ノード(bit=0), 子ノード(bit=1), エントリのリスト(seq番号順)]
+    エントリは、そのネットワークアドレスの上位length bitで辿った深さlengthのノードに格納する
+    経路Rの評価ではRのネットワークアドレスの上位bitから深さRのlengthまで辿り、
+    経路上の各ノードに格納されたエントリのみをge/le条件で確認するため、計算量はO(プレフィックス長)となる
+    '''
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.entries = []
+        self.root = None
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+    def add(self, entry: 'PrefixListEntry')-> None:
+        ''' エントリを追加する(コンパイル済みの場合はコンパイル結果を破棄) '''
+        self.entries.append(entry); self.root = None
+
+
+    def compile(self)-> 'PrefixList':
+        ''' エントリをseq番号順(同一seqは追加順)に整列し、trieを構築する '''
+        self.entries.sort(key=lambda e: e.seq)  # 安定ソート
+
+        root = [None, None, []]
+        for entry in self.entries:
+            node = root
+            for depth in range(entry.length):
+                bit = (entry.network >> (MAX_LENGTH - 1 - depth)) & 1
+                if node[bit] is None:
+                    node[bit] = [None, None, []]
+                node = node[bit]
+            node[2].append(entry)
+
+        self.root = root
+        return self
+
+
+    def match(self, route)-> 'PrefixListEntry' or None:
+        ''' 経路に最初にマッチするエントリを返す
+        引数: route - route_to_intが受け付ける形式の経路
+        戻り値: マッチしたエントリ(PrefixListEntry)、マッチ無しの場合はNone
+        '''
+        if self.root is None: self.compile()
+        network, length = route_to_int(route)
+
+        best = None
+        node = self.root; depth = 0
+        while node is not None:
+            for entry in node[2]:
+                if entry.ge <= length <= entry.le:
+                    if best is None or entry.seq < best.seq:
+                        best = entry
+                    break # ノード内はseq番号順のため、最初にマッチしたもののみ確認すれば十分
+            if depth == length:
+                break
+            node = node[(network >> (MAX_LENGTH - 1 - depth)) & 1]; depth += 1
+
+        return best
+
+
+    def permits(self, route)-> bool:
+        ''' 経路が許可(permit)されるかどうかを返す '''
+        entry = self.match(route)
+        return entry is not None and entry.action == "permit"
+
+
+    def match_batch(self, routes: list)-> list:
+        ''' 複数経路を一括評価し、各経路に対応するエントリ(またはNone)のリストを返す
+        同一経路の重複評価は一度のみとする
+        '''
+        if self.root is None: self.compile()
+        done = {}; out = []
+        for route in routes:
+            key = route_to_int(route)
+            if key not in done:
+                done[key] = self.match(key)
+            out.append(done[key])
+        return out
+
+
+    def redundant_entries(self)-> list:
+        ''' 重複・冗長なエントリを検出する
+        戻り値: [(種別, エントリ, 原因エントリ), ...](種別毎にエントリの評価順)
+        種別
+         "seq"       - seq番号が先行エントリと同一
+         "duplicate" - 先行エントリとaction/プレフィックス/ge/leが同一
+         "covered"   - マッチ対象の経路を全て先行エントリが含む(評価されることの無いエントリ)
+        先行とは評価順(seq番号順、同一seqは追加順)で前にあることを指し、原因エントリには最初の先行エントリを返す
+
+        エントリをネットワークアドレス(int)・プレフィックス長の昇順に整列し、処理中エントリを包含するプレフィックスを
+        スタックに積みながら一度走査する。プレフィックスどうしは包含か互いに素のいずれかであるため、
+        スタック上のプレフィックスが処理中エントリを包含するもの全てとなる(深さは最大33)
+        計算量は整列のO(n log n)と走査のO(n x 同一プレフィックスのエントリ数)
+        '''
+        ordered = sorted(self.entries, key=lambda e: e.seq) # 評価順(安定ソート)
+        rank = {id(e): i for i, e in enumerate(ordered)}
+
+        collisions = []; first = {}
+        for e in ordered:
+            if e.seq in first:
+                collisions.append(("seq", e, first[e.seq]))
+            else:
+                first[e.seq] = e
+
+        redundant = []
+        stack = [] # [[区間終端, ネットワークアドレス, プレフィックス長, [エントリ, ...]], ...]
+        for e in sorted(self.entries, key=lambda e: (e.network, e.length, rank[id(e)])):
+            start, end = e.interval()
+            while stack != [] and stack[-1][0] < start:
+                stack.pop()
+            if stack != [] and stack[-1][1] == e.network and stack[-1][2] == e.length:
+                stack[-1][3].append(e)
+            else:
+                stack.append([end, e.network, e.length, [e]])
+
+            cause = None
+            for _, _, _, group in stack:
+                for f in group:
+                    if rank[id(f)] < rank[id(e)] and f.ge <= e.ge and e.le <= f.le and \
+                       (cause is None or rank[id(f)] < rank[id(cause)]):
+                        cause = f
+            if cause is not None:
+                same = (cause.action, cause.network, cause.length, cause.ge, cause.le) == \
+                       (e.action, e.network, e.length, e.ge, e.le)
+                redundant.append(("duplicate" if same else "covered", e, cause))
+
+        redundant.sort(key=lambda x: rank[id(x[1])])
+        return collisions + redundant
+
+
+
+def compile_prefix_lists(commands: list, line_numbers: list = None)-> dict:
+    ''' ip prefix-listコマンド列からPrefixListを作成(コンパイル)し、リスト名称をキーとする辞書で返す
+    引数: commands     - コマンド文字列のリスト
+          line_numbers - 各コマンドに対応する行番号のリスト(省略時はNone)
+    戻り値: {リスト名称: PrefixList, ...}(出現順)
+    解析できないコマンドは無視する
+    seq番号が省略されたエントリは直前のseq番号+5とする
+    '''
+    if line_numbers is None:
+        line_numbers = [None] * len(commands)
+
+    prefix_lists = {}; last_seq = {}
+    for command, line_number in zip(commands, line_numbers):
+        m = pattern_prefix_list_entry.search(command)
+        if m is None: continue
+        seq = last_seq.get(m.group('name'), 0) + 5
+        entry = PrefixListEntry.from_command(command, line_number, seq)
+        if entry is None: continue
+
+        last_seq[entry.name] = entry.seq
+        if entry.name not in prefix_lists:
+            prefix_lists[entry.name] = PrefixList(entry.name)
+        prefix_lists[entry.name].add(entry)
+
+    for pl in prefix_lists.values():
+        pl.compile()
+
+    return prefix_lists
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+'''route-map評価およびBGP再配送シミュレーション用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+
+from common.prefix_list import route_to_int, int_to_ipv4
+
+
+# 'route-map'コマンドの構成要素取得用正規表現
+# 例: 'route-map vSAMPLE-001-TEST-STATIC-TO-BGP-MAP permit 10'
+pattern_route_map_entry = re.compile(r'''
+    ^route-map\s{1}(?P<name>\S+)
+    (?:\s{1}(?P<action>permit|deny))?
+    (?:\s{1}(?P<seq>[0-9]{1,}))?
+    \s*$
+    ''', re.VERBOSE)
+
+# 'match ip address prefix-list'コマンドの経路フィルタ名称取得用正規表現(名称は空白区切りで複数指定可)
+# 例: 'match ip address prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL'
+pattern_match_prefix_list = re.compile(r'''
+    ^match\s{1}ip\s{1}address\s{1}prefix-list\s{1}(?P<names>.+)$
+    ''', re.VERBOSE)
+
+# 'redistribute static/direct route-map'コマンドの構成要素取得用正規表現
+pattern_redistribute = re.compile(r'''
+    ^redistribute\s{1}(?P<protocol>\S+)\s{1}route-map\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+# bgp定義中の'vrf'コマンドのVRF名称取得用正規表現
+pattern_vrf_name = re.compile(r'''
+    ^vrf(?:\s{1}context)?\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+
+
+class RouteMapEntry:
+    '''
+    route-mapの1エントリ(route-map ... permit/deny seq と配下のmatch条件)を表すクラス
+    インスタンス変数
+    seq          : seq番号(int)
+    action       : "permit"/"deny"(str)
+    prefix_lists : match ip address prefix-listで指定された経路フィルタ名称のリスト
+                   (空の場合は全経路にマッチ、複数指定時はいずれかにマッチすればマッチ)
+    line_number  : 元コマンド行番号(int, 不明の場合はNone)
+    '''
+    __slots__ = ("seq", "action", "prefix_lists", "line_number")
+
+    def __init__(self, seq: int, action: str, line_number: int = None) -> None:
+        self.seq = seq; self.action = action
+        self.prefix_lists = []; self.line_number = line_number
+
+
+
+class RouteMap:
+    '''
+    同一名称のroute-mapエントリ群をseq番号順に保持し、経路の一括評価を行うクラス
+
+    評価内容
+    経路に対しseq番号の小さい順にエントリのmatch条件を確認し、最初にマッチしたエントリを返す
+    いずれにもマッチしない場合はNone(暗黙のdeny)
+    match条件に指定された経路フィルタが存在しない場合、その経路フィルタにはマッチしないものとして扱う
+    '''
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.entries = []
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def referenced_prefix_lists(self)-> list:
+        ''' match条件で参照する経路フィルタ名称を出現順(重複無し)で返す '''
+        names = []
+        for entry in self.entries:
+            for name in entry.prefix_lists:
+                if name not in names: names.append(name)
+        return names
+
+
+    def evaluate_batch(self, routes: list, prefix_lists: dict)-> list:
+        ''' 複数経路を一括評価する
+        引数: routes       - route_to_intが受け付ける形式の経路のリスト
+              prefix_lists - {経路フィルタ名称: PrefixList, ...}(コンパイル済み)
+        戻り値: 各経路に対応するRouteMapEntry(マッチ無しの場合はNone)のリスト
+        参照する経路フィルタ毎にmatch_batchを一度だけ実行し、その結果をエントリ順に参照する
+        '''
+        keys = [route_to_int(route) for route in routes]
+        permitted = {}
+        for name in self.referenced_prefix_lists():
+            if name in prefix_lists:
+                permitted[name] = [e is not None and e.action == "permit"
+                                   for e in prefix_lists[name].match_batch(keys)]
+            else:
+                permitted[name] = [False] * len(keys)
+
+        entries = sorted(self.entries, key=lambda e: e.seq)
+        out = []
+        for i in range(len(keys)):
+            hit = None
+            for entry in entries:
+                if entry.prefix_lists == [] or any(permitted[name][i] for name in entry.prefix_lists):
+                    hit = entry; break
+            out.append(hit)
+        return out
+
+
+
+def compile_route_maps(commands: list, line_numbers: list = None)-> dict:
+    ''' route-map(一行目)とmatch ip address prefix-list(二行目以降)から成るコマンド列から
+    RouteMapを作成し、route-map名称をキーとする辞書で返す
+    引数: commands     - find_matching_line_for_each_config_level(pattern_route_map_..., pattern_match_ip_address, Lv=2)
+                         の抽出結果等のコマンド文字列のリスト
+          line_numbers - 各コマンドに対応する行番号のリスト(省略時はNone)
+    戻り値: {route-map名称: RouteMap, ...}(出現順)
+    action省略時は"permit"、seq番号省略時は10とする
+    '''
+    if line_numbers is None:
+        line_numbers = [None] * len(commands)
+
+    route_maps = {}; current = None
+    for command, line_number in zip(commands, line_numbers):
+        m = pattern_route_map_entry.search(command)
+        if m:
+            name = m.group('name')
+            if name not in route_maps:
+                route_maps[name] = RouteMap(name)
+            current = RouteMapEntry(int(m.group('seq')) if m.group('seq') is not None else 10,
+                                    m.group('action') if m.group('action') is not None else "permit",
+                                    line_number)
+            route_maps[name].entries.append(current)
+            continue
+        m = pattern_match_prefix_list.search(command)
+        if m and current is not None:
+            current.prefix_lists.extend(m.group('names').split())
+
+    return route_maps
+
+
+def parse_redistributions(commands: list, line_numbers: list = None)-> list:
+    ''' router bgp(一行目)とvrf・redistribute(二行目以降)から成るコマンド列から再配送定義を取り出す
+    引数: commands - find_matching_line_for_each_config_level(pattern_router_bgp_asno, pattern_vrf_LB_VRF,
+                     pattern_redistribute_..., Lv=2, ptn=2)の抽出結果等のコマンド文字列のリスト
+    戻り値: [(VRF名称, プロトコル("static"/"direct"), route-map名称, 行番号), ...]
+            vrf定義の外側に現れたredistributeのVRF名称は"default"とする
+    '''
+    if line_numbers is None:
+        line_numbers = [None] * len(commands)
+
+    out = []; vrf = "default"
+    for command, line_number in zip(commands, line_numbers):
+        if command.startswith("router bgp"):
+            vrf = "default"; continue
+        m = pattern_redistribute.search(command)
+        if m:
+            out.append((vrf, m.group('protocol'), m.group('name'), line_number)); continue
+        m = pattern_vrf_name.search(command)
+        if m:
+            vrf = m.group('name')
+    return out
+
+
+def simulate_redistribution(redistributions: list, routes: dict, route_maps: dict, prefix_lists: dict)-> dict:
+    ''' BGPへ再配送される経路をVRF毎に求める
+    引数:
+    redistributions : [(VRF名称, プロトコル, route-map名称, 行番号), ...](parse_redistributionsの戻り値)
+    routes          : {(VRF名称, プロトコル): [(経路, 行番号), ...], ...}
+                      経路はroute_to_intが受け付ける形式(例:"10.1.1.0/24")
+    route_maps      : {route-map名称: RouteMap, ...}(compile_route_mapsの戻り値)
+    prefix_lists    : {経路フィルタ名称: PrefixList, ...}(compile_prefix_listsの戻り値)
+    戻り値:
+    {VRF名称: [再配送経路(dict), ...], ...}
+    再配送経路(dict)の内容
+     "network"/"length" : ネットワークアドレス(int)/プレフィックス長(int)
+     "route"            : "A.B.C.D/nn"形式の文字列
+     "protocol"         : "static"/"direct"
+     "line_number"      : 経路の元コマンド行番号
+     "route_map"/"seq"  : 許可したroute-map名称とエントリのseq番号
+    各VRFのリストは(ネットワークアドレス, プレフィックス長, 行番号)の昇順、同一経路は最初の1件のみ
+
+    各route-map・経路フィルタはコンパイル済みのものを共有し、(VRF, プロトコル)毎の経路を一括評価する
+    route-mapが存在しない再配送定義では経路は再配送されない
+    '''
+    out = {}
+    for vrf, protocol, name, _ in redistributions:
+        candidates = routes.get((vrf, protocol), [])
+        out.setdefault(vrf, {})
+        if name not in route_maps or candidates == []: continue
+
+        results = route_maps[name].evaluate_batch([route for route, _ in candidates], prefix_lists)
+        for (route, line_number), entry in zip(candidates, results):
+            if entry is None or entry.action != "permit": continue
+            network, length = route_to_int(route)
+            if (network, length) in out[vrf]: continue
+            out[vrf][(network, length)] = {"network":network, "length":length,
+                                           "route":"{}/{}".format(int_to_ipv4(network), length),
+                                           "protocol":protocol, "line_number":line_number,
+                                           "route_map":name, "seq":entry.seq}
+
+    return {vrf: sorted(d.values(), key=lambda r: (r["network"], r["length"], r["line_number"] or 0))
+            for vrf, d in out.items()}
+
+
+def redistributed_prefixes(result: dict)-> dict:
+    ''' simulate_redistributionの戻り値から、VRF毎の(ネットワークアドレス, プレフィックス長)の集合を返す '''
+    return {vrf: {(r["network"], r["length"]) for r in routes} for vrf, routes in result.items()}
+
+
+def diff_advertisement(prefixes: dict, advertisement: dict)-> (dict, list):
+    ''' VRF毎の再配送経路の集合と経路広告用フィルタ(-OUT-PL)を突き合わせる
+    引数:
+    prefixes      : {VRF名称: {(ネットワークアドレス, プレフィックス長), ...}, ...}(redistributed_prefixesの戻り値)
+    advertisement : {経路フィルタ名称: PrefixList, ...}(経路広告用フィルタのcompile_prefix_listsの戻り値)
+    戻り値(タプル):
+    1. {VRF名称: {いずれの経路広告用フィルタでも許可(permit)されない再配送経路, ...}, ...}
+    2. 再配送経路のいずれにも最初にマッチしない経路広告用フィルタのpermitエントリのリスト(リスト名称・seq番号順)
+
+    経路広告用フィルタ毎に、全VRFの再配送経路(重複除去済み)をmatch_batchで一度だけ一括評価する
+    経路広告用フィルタの適用先(neighbor)はVRFを問わず、いずれかのフィルタで許可される経路を広告されるものとする
+    '''
+    keys = sorted(set().union(*prefixes.values()))
+    permitted = set(); used = set()
+    for pl in advertisement.values():
+        for key, entry in zip(keys, pl.match_batch(keys)):
+            if entry is not None and entry.action == "permit":
+                permitted.add(key); used.add(id(entry))
+
+    unadvertised = {vrf: {key for key in keys_in_vrf if key not in permitted} for vrf, keys_in_vrf in prefixes.items()}
+    unused = [entry for pl in advertisement.values() for entry in pl if entry.action == "permit" and id(entry) not in used]
+    return unadvertised, unused
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+'''設定オブジェクト間の参照関係(グラフ)作成用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+
+class ReferenceGraph:
+    '''
+    設定オブジェクト(ACL・経路フィルタ・ルートマップ・neighbor等)を節点、コマンド中の名称の参照を有向辺とするグラフ
+    節点のキーは(種別, 名称)とし、種別は呼び出し側で任意に定める(例: ("route-map", "vSAMPLE-001-TEST-STATIC-TO-BGP-MAP"))
+
+    インスタンス変数
+    nodes : {節点キー: [ブロック, ...]}
+            ブロックは定義一行目(level "1")とその配下の行から成る[(コマンド, levels要素), ...]のリスト
+            同一名称の定義が複数ある場合(route-mapのseq違い、prefix-listの各行等)は出現順に連結する
+    links : {(節点キー, ブロックの添字, 行の添字): (参照先節点キー, Match), ...}
+            定義行中の参照。Matchのgroup(1)が参照先の名称
+    refs  : {節点キー: [(参照元節点キー(ルートの場合はNone), コマンド, levels要素), ...]}(被参照の逆引き索引)
+    roots : [(コマンド, levels要素, 参照先節点キー, Match), ...](どの節点にも属さない参照元の行)
+
+    いずれも辞書(ハッシュ)で保持し、設定ファイル毎に一度だけ作成する
+    参照の解決は辞書引きのみで行うため、参照を辿る処理の計算量は辿った辺の数に比例する(階層毎に全行を再走査しない)
+    '''
+
+    def __init__(self) -> None:
+        self.nodes = {}; self.links = {}; self.refs = {}; self.roots = []
+
+
+    def __contains__(self, key: tuple)-> bool:
+        return key in self.nodes
+
+
+    def add_definitions(self, kind: str, commands: list, levels: list, pattern: 're.Pattern', scopes: list = None)-> None:
+        ''' 定義(ブロック)を節点として登録する
+        引数: kind     - 節点の種別
+              commands - find_matching_line_for_each_config_level等の抽出結果のコマンド文字列のリスト
+              levels   - 各コマンドに対応するlevels要素のリスト
+              pattern  - 定義一行目から名称をgroup(1)でキャプチャする正規表現
+              scopes   - 各コマンドの所属スコープ(VRF名称等)のリスト
+                         指定した場合は節点の名称を(スコープ, 名称)とする(異なるスコープの同一名称は別の節点とする)
+        一行目がpatternにマッチしないブロックは登録しない
+        '''
+        block = None
+        for i, (command, level) in enumerate(zip(commands, levels)):
+            if level.get("level") == "1":
+                block = None
+                m = pattern.search(command)
+                if m:
+                    block = []
+                    name = m.group(1) if scopes is None else (scopes[i], m.group(1))
+                    self.nodes.setdefault((kind, name), []).append(block)
+            if block is not None:
+                block.append((command, level))
+
+
+    def add_references(self, kind: str, pattern: 're.Pattern', sources: tuple)-> None:
+        ''' 登録済み節点の定義行から種別kindの節点への参照を登録する
+        引数: kind    - 参照先の節点の種別
+              pattern - 参照先の名称をgroup(1)でキャプチャする正規表現
+              sources - 参照元とする節点の種別のタプル
+        参照元の節点自身への参照(定義一行目が自身の名称にマッチする場合)は登録しない
+        '''
+        for key, blocks in self.nodes.items():
+            if key[0] not in sources: continue
+            for b, block in enumerate(blocks):
+                for r, (command, level) in enumerate(block):
+                    if (key, b, r) in self.links: continue  # 先に登録した参照を優先
+                    m = pattern.search(command)
+                    if m is None or (kind, m.group(1)) == key: continue
+                    self.links[(key, b, r)] = ((kind, m.group(1)), m)
+                    self.refs.setdefault((kind, m.group(1)), []).append((key, command, level))
+
+
+    def add_roots(self, kind: str, commands: list, levels: list, pattern: 're.Pattern')-> None:
+        ''' 節点に属さない参照元の行(redistribute、ip access-group等)を登録する
+        引数: kind     - 参照先の節点の種別
+              commands - コマンド文字列のリスト
+              levels   - 各コマンドに対応するlevels要素のリスト
+              pattern  - 参照先の名称をgroup(1)でキャプチャする正規表現(マッチしない行は登録しない)
+        一行にpatternが複数回マッチする場合は、マッチ毎に参照元として登録する
+        '''
+        for command, level in zip(commands, levels):
+            for m in pattern.finditer(command):
+                self.roots.append((command, level, (kind, m.group(1)), m))
+                self.refs.setdefault((kind, m.group(1)), []).append((None, command, level))
+
+
+    def walk(self, key: tuple, branches: tuple = (), path: tuple = (), depth: int = None):
+        ''' 節点keyの定義行と、そこから参照される節点の定義行を深さ優先で返すジェネレータ
+        引数: key      - 節点キー
+              branches - 出力行の各祖先階層が末尾の要素かどうか(bool)のタプル(呼び出し元の階層)
+              path     - 呼び出し元までに辿った節点キーのタプル(循環参照の検出用)
+              depth    - 辿る参照の段数の上限(Noneの場合は無制限)
+        戻り値: (branches, コマンド, levels要素, Match(参照の無い行はNone))
+                branchesは出力行自身を含む各階層が末尾の要素かどうかのタプルで、その長さが階層の深さとなる
+        定義一行目の配下の行は一行目の一段下の階層とする。循環する参照先および未定義の参照先は辿らない
+        '''
+        blocks = self.nodes.get(key, [])
+        for b, block in enumerate(blocks):
+            last = (b == len(blocks) - 1)
+            for r, (command, level) in enumerate(block):
+                here = branches + (last,) if r == 0 else branches + (last, r == len(block) - 1)
+                target, m = self.links.get((key, b, r), (None, None))
+                yield here, command, level, m
+                if target in self.nodes and target not in path + (key,) and depth != 0:
+                    yield from self.walk(target, here, path + (key,), None if depth is None else depth - 1)
+
+
+    def walk_roots(self, depth: int = None):
+        ''' 登録済みのルート行とその参照先をwalkと同じ形式で出現順に返すジェネレータ(ルート行のbranchesは空のタプル) '''
+        for command, level, target, m in self.roots:
+            yield (), command, level, m
+            if target in self.nodes and depth != 0:
+                yield from self.walk(target, (), (), None if depth is None else depth - 1)
+
+
+    def walk_nodes(self, kind: str, depth: int = None):
+        ''' 種別kindの各節点(登録順)とその参照先をwalkと同じ形式で返すジェネレータ
+        節点の定義一行目を最上位(branchesが空のタプル)とする
+        '''
+        for key in self.nodes:
+            if key[0] != kind: continue
+            for branches, command, level, m in self.walk(key, depth=depth):
+                yield branches[1:], command, level, m
+
+
+    def unreferenced(self, kinds: tuple = None)-> list:
+        ''' 参照されていない節点のキーを登録順で返す(kinds指定時はその種別のみ)
+        節点キーの集合と被参照の逆引き索引のキーの集合の差により求める
+        '''
+        keys = set(self.nodes) - set(self.refs)
+        return [key for key in self.nodes if key in keys and (kinds is None or key[0] in kinds)]
+
+
+    def undefined(self)-> list:
+        ''' 定義されていない節点への参照を[(参照先節点キー, 参照元節点キー(ルートの場合はNone), コマンド, levels要素), ...]で返す
+        被参照の逆引き索引のキーの集合と節点キーの集合の差により求める
+        '''
+        keys = set(self.refs) - set(self.nodes)
+        return [(key,) + ref for key, refs in self.refs.items() if key in keys for ref in refs]
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+'''Staticルート表(ip route)解析用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+
+from common.prefix_list import ipv4_to_int, int_to_ipv4, route_to_int
+from common.vrf_index import DEFAULT_VRF
+
+
+# 'ip route'コマンドの構成要素取得用正規表現
+# 例: 'ip route 100.105.225.193/32 Ethernet1/1.100 100.100.8.2'
+#      prefix: '100.105.225.193/32', rest: 'Ethernet1/1.100 100.100.8.2'
+pattern_static_route = re.compile(r'''
+    ^ip\s{1}route\s{1}
+    (?P<prefix>(?:[0-9]{1,3}\.){3}[0-9]{1,3}/[0-9]{1,2})
+    (?:\s{1}(?P<rest>.+))?$
+    ''', re.VERBOSE)
+
+# 'ip route static bfd'コマンドの構成要素取得用正規表現
+# 例: 'ip route static bfd Ethernet1/1.100 100.100.8.2'
+pattern_static_bfd = re.compile(r'''
+    ^ip\s{1}route\s{1}static\s{1}bfd\s{1}
+    (?P<interface>\S+)\s{1}
+    (?P<next_hop>(?:[0-9]{1,3}\.){3}[0-9]{1,3})
+    ''', re.VERBOSE)
+
+# 'track ... ip route ... reachability'コマンドの構成要素取得用正規表現
+# 例: 'track 99 ip route 100.105.225.193/32 reachability'
+pattern_track_route = re.compile(r'''
+    ^track\s{1}(?P<id>[0-9]{1,})\s{1}ip\s{1}route\s{1}
+    (?P<prefix>(?:[0-9]{1,3}\.){3}[0-9]{1,3}/[0-9]{1,2})
+    \s{1}reachability
+    ''', re.VERBOSE)
+
+# 'vrf context'コマンドのVRF名称取得用正規表現
+# 例: 'vrf context vSAMPLE-001-LB-VRF'
+pattern_vrf_context_name = re.compile(r'''
+    ^vrf\s{1}context\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+# vrf contextの範囲の終端とするコマンド(字下げの情報が無い入力の場合のみ使用、vrf contextの配下に現れない設定一行目)
+pattern_vrf_context_end = re.compile(r'''
+    ^(?:interface|router|route-map|ip\s{1}prefix-list|ip\s{1}access-list|track|line|feature|hostname)\b
+    ''', re.VERBOSE)
+
+# ipv4アドレス(A.B.C.D)判定用正規表現
+pattern_ipv4_address = re.compile(r'^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$')
+
+
+
+class StaticRoute:
+    '''
+    Staticルート(ip route)1行分を表すクラス
+    インスタンス変数
+    vrf         : VRF名称(str)
+    network     : 宛先ネットワークアドレス(int, host bit部分は0マスク済み)
+    length      : 宛先プレフィックス長(int)
+    next_hop    : ネクストホップアドレス(int, 指定無しの場合はNone)
+    interface   : 出力IF名称(str, 指定無しの場合はNone)
+    line_number : 元コマンド行番号(int, 不明の場合はNone)
+    command     : 元コマンド文字列(str)
+    bfd         : 同一VRF・出力IF・ネクストホップのBFD設定(ip route static bfd)の有無(bool)
+    track       : 宛先を条件とするTrack設定(track ... ip route ... reachability)の有無(bool)
+    '''
+    __slots__ = ("vrf", "network", "length", "next_hop", "interface", "line_number", "command", "bfd", "track")
+
+    def __init__(self, vrf: str, network: int, length: int, next_hop: int = None, interface: str = None,
+                 line_number: int = None, command: str = "") -> None:
+        self.vrf = vrf; self.network = network; self.length = length
+        self.next_hop = next_hop; self.interface = interface
+        self.line_number = line_number; self.command = command
+        self.bfd = False; self.track = False
+
+
+    def __repr__(self):
+        return '{} {}/{} {} {}'.format(self.vrf, int_to_ipv4(self.network), self.length, self.interface,
+                                       int_to_ipv4(self.next_hop) if self.next_hop is not None else None)
+
+
+    def prefix(self)-> tuple:
+        ''' 宛先の索引キー(VRF名称, ネットワークアドレス, プレフィックス長)を返す '''
+        return (self.vrf, self.network, self.length)
+
+
+    def gateway(self)-> tuple:
+        ''' 転送先(出力IF名称, ネクストホップアドレス)を返す '''
+        return (self.interface, self.next_hop)
+
+
+    def is_dummy(self, pattern: 're.Pattern')-> bool:
+        ''' ダミーStaticルート(宛先が/32でかつ出力IFが「EthernetX/X.XXX」のもの)かどうかを返す
+        引数: pattern - ダミーStaticルートの元コマンドにマッチする正規表現(#6-1の抽出と同じもの)
+        '''
+        return self.length == 32 and pattern.search(self.command) is not None
+
+
+    @classmethod
+    def from_command(cls, command: str, vrf: str = DEFAULT_VRF, line_number: int = None)-> 'StaticRoute' or None:
+        ''' コマンド文字列よりStaticルートを生成する(解析できない場合はNone)
+        宛先の後ろの最初のトークンがipv4アドレスであればネクストホップ、それ以外は出力IFとし、
+        出力IFの次のトークンがipv4アドレスであればネクストホップとする(name/tag等の後続指定は無視する)
+        '''
+        m = pattern_static_route.search(command)
+        if m is None:
+            return None
+        try:
+            network, length = route_to_int(m.group('prefix'))
+            tokens = m.group('rest').split() if m.group('rest') is not None else []
+            interface = None; next_hop = None
+            if tokens != [] and not pattern_ipv4_address.match(tokens[0]):
+                interface = tokens.pop(0)
+            if tokens != [] and pattern_ipv4_address.match(tokens[0]):
+                next_hop = ipv4_to_int(tokens[0])
+        except ValueError:
+            return None
+
+        return cls(vrf, network, length, next_hop, interface, line_number, command)
+
+
+
+class StaticRouteTable:
+    '''
+    Staticルートを宛先(VRF名称, ネットワークアドレス, プレフィックス長)の昇順に整列した配列として保持するクラス
+    同一宛先のルートは配列上で連続するため、宛先毎のグループは一度の線形走査で得られる
+    宛先およびネクストホップによる検索は辞書(ハッシュ)で行う
+
+    インスタンス変数
+    routes      : 宛先の昇順(同一宛先は行番号順)に整列したStaticRouteのリスト
+    by_prefix   : {(VRF名称, ネットワークアドレス, プレフィックス長): [StaticRoute, ...], ...}
+    by_next_hop : {(VRF名称, ネクストホップアドレス): [StaticRoute, ...], ...}(ネクストホップ指定の無いルートは含めない)
+    '''
+
+    def __init__(self, routes: list) -> None:
+        self.routes = sorted(routes, key=lambda r: r.prefix() + (r.line_number or 0,))
+        self.by_prefix = {}; self.by_next_hop = {}
+        for route in self.routes:
+            self.by_prefix.setdefault(route.prefix(), []).append(route)
+            if route.next_hop is not None:
+                self.by_next_hop.setdefault((route.vrf, route.next_hop), []).append(route)
+
+
+    def __len__(self):
+        return len(self.routes)
+
+
+    def __iter__(self):
+        return iter(self.routes)
+
+
+    def groups(self):
+        ''' 同一宛先のルートのリストを宛先の昇順に返すジェネレータ(整列済み配列の線形走査) '''
+        group = []
+        for route in self.routes:
+            if group != [] and group[0].prefix() != route.prefix():
+                yield group; group = []
+            group.append(route)
+        if group != []:
+            yield group
+
+
+    def lookup(self, vrf: str, network: int, length: int)-> list:
+        ''' 宛先に一致するルートのリストを返す(存在しない場合は空のリスト) '''
+        return self.by_prefix.get((vrf, network, length), [])
+
+
+    def via(self, vrf: str, next_hop: int)-> list:
+        ''' ネクストホップに一致するルートのリストを宛先の昇順で返す(存在しない場合は空のリスト) '''
+        return self.by_next_hop.get((vrf, next_hop), [])
+
+
+    def subset(self, line_numbers: set)-> 'StaticRouteTable':
+        ''' 元コマンドの行番号が指定の集合に含まれるルートのみから成る新規インスタンスを返す '''
+        return StaticRouteTable([route for route in self.routes if route.line_number in line_numbers])
+
+
+    def duplicates(self)-> list:
+        ''' 宛先・転送先とも先行ルートと同一のルートを、(ルート, 先行ルート)のリストで返す '''
+        out = []
+        for group in self.groups():
+            first = {}
+            for route in group:
+                if route.gateway() in first:
+                    out.append((route, first[route.gateway()]))
+                else:
+                    first[route.gateway()] = route
+        return out
+
+
+    def shadowed(self)-> list:
+        ''' 宛先が先行ルートと同一で転送先が異なるルートを、(ルート, 宛先毎の最初のルート)のリストで返す '''
+        out = []
+        for group in self.groups():
+            seen = {group[0].gateway()}
+            for route in group[1:]:
+                if route.gateway() not in seen:
+                    out.append((route, group[0])); seen.add(route.gateway())
+        return out
+
+
+    def dummy_routes_without(self, pattern: 're.Pattern')-> list:
+        ''' BFD設定またはTrack設定の無いダミーStaticルートを返す
+        引数: pattern - ダミーStaticルートの元コマンドにマッチする正規表現(StaticRoute.is_dummy参照)
+        戻り値: [(ルート, BFD設定有無(bool), Track設定有無(bool)), ...](いずれかが無いもののみ、宛先の昇順)
+        '''
+        return [(route, route.bfd, route.track) for route in self.routes
+                if route.is_dummy(pattern) and not (route.bfd and route.track)]
+
+
+
+def build_static_route_table(commands: list, line_numbers: list = None, top_levels: list = None)-> 'StaticRouteTable':
+    ''' 設定ファイル全体のコマンド列を一度走査してStaticRouteTableを作成する
+    引数: commands     - 設定ファイル全体のコマンド文字列のリスト(行頭の空白除去済み)
+          line_numbers - 各コマンドに対応する行番号のリスト(省略時は1始まりの連番)
+          top_levels   - 各コマンドが字下げの無い行(設定一行目)かどうかのリスト(字下げの情報が無い場合はNone)
+    戻り値: StaticRouteTable(各ルートのbfd/trackを設定済み)
+    ip routeとip route static bfdのVRF名称は直前のvrf contextのものとし、vrf contextの範囲の外側ではDEFAULT_VRFとする
+    vrf contextの範囲は、vrf contextの次の字下げの無い行の直前までとする
+    (top_levelsがNoneの場合は、vrf contextの配下に現れないコマンド(pattern_vrf_context_end)の直前まで)
+    vrf member(IF設定の配下)、bgp定義中のvrfはvrf contextの範囲を開始しない
+    '''
+    if line_numbers is None:
+        line_numbers = range(1, len(commands) + 1)
+    if top_levels is None:
+        top_levels = [pattern_vrf_context_end.search(command) is not None for command in commands]
+
+    routes = []; bfds = set(); tracks = set(); vrf = DEFAULT_VRF
+    for command, line_number, top_level in zip(commands, line_numbers, top_levels):
+        m = pattern_vrf_context_name.search(command)
+        if m:
+            vrf = m.group('name'); continue
+        if top_level:
+            vrf = DEFAULT_VRF
+        route = StaticRoute.from_command(command, vrf, line_number)
+        if route is not None:
+            routes.append(route); continue
+        m = pattern_static_bfd.search(command)
+        if m:
+            try:
+                bfds.add((vrf, m.group('interface'), ipv4_to_int(m.group('next_hop'))))
+            except ValueError:
+                pass
+            continue
+        m = pattern_track_route.search(command)
+        if m:
+            try:
+                tracks.add(route_to_int(m.group('prefix')))
+            except ValueError:
+                pass
+
+    for route in routes:
+        route.bfd = (route.vrf, route.interface, route.next_hop) in bfds
+        route.track = (route.network, route.length) in tracks
+    return StaticRouteTable(routes)
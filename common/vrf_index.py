@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+'''VRF毎の索引(ハッシュパーティション)用スクリプトファイル
+
+Copyright (c) 2023-2024 Fujitsu Limited.  All rights reserved.
+
+'''
+
+__version__ = '1.01'
+
+import re
+
+
+# VRF名称取得用正規表現('vrf context'/'vrf member'/bgp定義中の'vrf'のいずれにもマッチ)
+# 例: 'vrf context vSAMPLE-001-LB-VRF', 'vrf member vSAMPLE-001-LB-VRF', 'vrf vSAMPLE-001-LB-VRF'
+pattern_vrf_name = re.compile(r'''
+    ^vrf(?:\s{1}(?:context|member))?\s{1}(?P<name>\S+)
+    ''', re.VERBOSE)
+
+DEFAULT_VRF = "default"  # VRF定義の外側に現れた要素のVRF名称
+
+
+class VrfIndex:
+    '''
+    (VRF名称, キー)で要素を索引するクラス
+    VRF毎に独立した辞書(パーティション)を持ち、キーにはネットワーク(ネットワークアドレス(int), プレフィックス長(int))
+    等のハッシュ可能な値を用いる。異なるVRFの同一キーは互いに影響しない
+    各キーには、そのキーを持つ要素(行)を出現順にリストで保持する
+
+    partitionsの例
+    {
+     "vSAMPLE-001-LB-VRF": {(167837952, 24): [row1, row2], (167838976, 24): [row3]},
+     "vSAMPLE-002-LB-VRF": {(167837952, 24): [row4]},
+    }
+    '''
+
+    def __init__(self, items = ()) -> None:
+        ''' 引数: items - (VRF名称, キー, 要素)のタプルの反復可能オブジェクト '''
+        self.partitions = {}
+        for vrf, key, row in items:
+            self.add(vrf, key, row)
+
+
+    def __len__(self):
+        ''' 全パーティションのキー数の合計を返す '''
+        return sum(len(p) for p in self.partitions.values())
+
+
+    def __contains__(self, vrf_key: tuple)-> bool:
+        ''' (VRF名称, キー)が存在するかどうかを返す(該当VRFのパーティションのみ参照) '''
+        vrf, key = vrf_key
+        return key in self.partitions.get(vrf, {})
+
+
+    def add(self, vrf: str, key, row)-> None:
+        ''' 要素を(VRF名称, キー)で登録する '''
+        self.partitions.setdefault(vrf, {}).setdefault(key, []).append(row)
+
+
+    def vrfs(self)-> list:
+        ''' VRF名称を出現順で返す '''
+        return list(self.partitions)
+
+
+    def partition(self, vrf: str)-> dict:
+        ''' 指定VRFのパーティション({キー: [要素, ...]})を返す(存在しない場合は空の辞書) '''
+        return self.partitions.get(vrf, {})
+
+
+    def rows(self, vrf: str, key)-> list:
+        ''' 指定(VRF名称, キー)の要素のリストを返す(存在しない場合は空のリスト) '''
+        return self.partitions.get(vrf, {}).get(key, [])
+
+
+    def difference(self, other: 'VrfIndex')-> list:
+        ''' VRF毎に、自インスタンスに存在し他方の同一VRFに存在しないキーを求め、(VRF名称, 要素)のリストで返す
+        VRF毎のパーティションどうしのみを比較する(他VRFのパーティションには触れない)
+        '''
+        out = []
+        for vrf, part in self.partitions.items():
+            other_part = other.partition(vrf)
+            for key, rows in part.items():
+                if key not in other_part:
+                    out.extend((vrf, row) for row in rows)
+        return out
+
+
+    def subtract(self, other: 'VrfIndex')-> 'VrfIndex':
+        ''' VRF毎に他方の同一VRFに存在するキーを除いた新規インスタンスを返す '''
+        out = VrfIndex()
+        for vrf, part in self.partitions.items():
+            other_part = other.partition(vrf)
+            for key, rows in part.items():
+                if key not in other_part:
+                    for row in rows:
+                        out.add(vrf, key, row)
+        return out
+
+
+
+def index_by_vrf(commands: list, levels: list, key_of)-> 'VrfIndex':
+    ''' 一行目(level "1")と二行目以降から成るコマンド列の各行を(VRF名称, キー)で索引する
+    引数: commands - コマンド文字列のリスト
+          levels   - 各コマンドに対応するlevels情報のリスト
+          key_of   - コマンド文字列からキーを求める関数(索引対象外の行にはNoneを返す)
+    戻り値: 要素を(コマンド, levels情報)のタプルとするVrfIndex
+    各行の所属VRFは、ブロック内でVRF定義の行('vrf ...')が現れた以降はそのVRF名称とし、それ以外はDEFAULT_VRFとする
+    VRF定義の行自体は索引しない
+    '''
+    index = VrfIndex(); vrf = DEFAULT_VRF
+    for command, level in zip(commands, levels):
+        if level.get("level") == "1":
+            vrf = DEFAULT_VRF
+        m = pattern_vrf_name.search(command)
+        if m:
+            vrf = m.group('name'); continue
+        key = key_of(command)
+        if key is not None:
+            index.add(vrf, key, (command, level))
+    return index
@@ -21,10 +21,23 @@ import csv
 import platform
 import time
 import argparse
+import io
 
 from copy import deepcopy
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 from common.extract_ipaddress import extract_ipv4address, extract_ipv4network
 from common.util import Tuple_Iterator, standard_out, CustomHelpFormatter, exclude_element, get_encode
+from common.prefix_list import compile_prefix_lists, PrefixListEntry, IntervalSet, route_to_int, mask_of, ipv4_to_int
+from common.access_list import compile_access_lists, addresses_to_array
+from common.redistribution import compile_route_maps, parse_redistributions, simulate_redistribution, \
+                                  redistributed_prefixes, diff_advertisement
+from common.vrf_index import VrfIndex, index_by_vrf, DEFAULT_VRF
+from common.static_route import build_static_route_table
+from common.reference_graph import ReferenceGraph
+from common.chunked_scan import match_lines_in_chunks
+from common.interface import find_address_conflicts, ConnectedIndex, check_subinterface_vlans, \
+                             InterfaceTable, build_interface_table
 
 drive = 'C:\\'; user = 'Users'; dir_dl = 'Downloads'; mfname = 'config.txt'; outname = 'out.txt'
 mfsysname = 'config_sys.csv'; outsysname = 'config_out#'
@@ -122,6 +135,9 @@ def getconfigsummary(args: argparse.Namespace,
 
     try:
 
+        if getattr(args, "jobs", 1) > 1 and getattr(args, "scan_jobs", 1) > 1: # ワーカプロセスからはさらに分割並列検索を行わない
+            print('--jobs と --scan_jobs は同時に指定できません。'); return
+
         if args.f != None: # コマンドラインからのファイル名指定、又は標準入力指定
             if args.f != "stdin":
                 in_path = os.path.join(os.getcwd(), args.f)
@@ -178,46 +194,84 @@ def getconfigsummary(args: argparse.Namespace,
             inlines = list(line for line in input_csv_T[4])
             sys_flags = [list(map(lambda s:s.strip(), slist)) for slist in sys_flags] # csv各要素の前後空白除去
 
+        top_levels = top_level_flags(inlines)  # 行頭の空白除去前に、各行が設定一行目(字下げ無し)かどうかを取得
         inlines = list(map(lambda s:s.lstrip().rstrip("\n"), inlines))  # 行頭の空白と改行除去
+        bind_top_levels(inlines, top_levels)
 
         # コマンド検索・出力処理
-        result = CommandLevelList([],[])
+        if getattr(args, "rules", None) != None: # ルールファイル指定有(ユーザ定義の検査を追加)
+            if not os.path.exists(args.rules):
+                print('ファイル ' + args.rules + ' が見つかりません。'); return
+            try:
+                check_specs.update(load_rules(args.rules))
+            except ValueError as e: # json形式・ルールの指定の誤り
+                print('ルールファイル ' + args.rules + ' を読み込めません。({})'.format(e)); return
 
         if args.reqno != None: # コマンドラインからのreqno指定有
-            reqno_range = [elem for elem in args.reqno if elem < 16] # elemがint型であることはargparseにて保証済
+            reqno_range = [elem for elem in args.reqno if elem in check_specs] # elemがint型であることはargparseにて保証済
         else:
-            reqno_range = list(range(1,16))
-
-        for i in reqno_range:
-            result.extend(find_matching_line_in_commands(args, inlines, i))
+            reqno_range = sorted(check_specs)
+
+        worker_counts = {}  # --jobs指定時の各ワーカのscan_cacheの統計情報{プロセスID: (hits, misses, entries)}
+
+        def cache_info():  # ベンチマーク出力用のscan_cacheの統計情報(--jobs指定時は全ワーカの合計)
+            if worker_counts == {}:
+                return scan_cache.info()
+            return scan_cache.info(tuple(sum(c) for c in zip(*worker_counts.values())))
+
+        def summary_sections():  # 要望番号毎の抽出結果(タイトル付与済み)を要望番号の順に作成しながら返すジェネレータ
+            if getattr(args, "jobs", 1) > 1: # 要望番号毎にプロセスプールで並列実行し、要望番号の順に受け取る
+                with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_reqno_worker,
+                                         initargs=(args, inlines, check_specs, top_levels)) as executor:
+                    for section, out, pid, counts in executor.map(run_reqno_in_worker, reqno_range):
+                        print(out, end='')
+                        worker_counts[pid] = counts
+                        yield section
+                return
 
+            # 全要望番号の検査仕様の抽出を集め、共通の抽出を出力前に一度ずつ実行(以降は要望番号毎の検査・出力のみを逐次行う)
+            run_scans(inlines, plan_scans(args, reqno_range), workers=getattr(args, "scan_jobs", 1))
+            for i in reqno_range:
+                yield find_matching_line_in_commands(args, inlines, i)
 
-        def data_out(path, data):  # ファイル出力用関数('Windows'または'Linux'のみを前提) 
+        def data_out(path, data):  # ファイル出力用関数('Windows'または'Linux'のみを前提) dataは文字列のイテラブル(逐次書き込み)
+            # 同一フォルダの一時ファイルに書き込み、完了後に置き換える(途中で失敗した場合は既存のファイルをそのまま残す)
             encoding='cp932' if platform.system() == 'Windows' else 'utf-8' 
-            with open(path, 'w', encoding=encoding) as f:
-                f.write("\n".join(data))        
+            tmp_path = path + '.{}.tmp'.format(os.getpid())
+            try:
+                with open(tmp_path, 'x', encoding=encoding) as f:
+                    for n, line in enumerate(data):
+                        f.write(line if n == 0 else "\n" + line)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
 
         if args.f != None:
-            for cmd_level in result.iter():
-                # 行番号またはspan-listがない場合はデータのみ標準出力
-                if "line_number" not in cmd_level[1] or "span-list" not in cmd_level[1]:
-                    print(cmd_level[0]); continue
-                
-                standard_out(cmd_level[0], cmd_level[1]["line_number"], cmd_level[1]["span-list"], len(inlines), n=args.line_number , z=args.colorless)
+            dumps = []  # -j指定時のみ各行のlevels要素を保持
+            for section in summary_sections():
+                for cmd_level in section.iter():
+                    if args.json == True:
+                        dumps.append(cmd_level[1])
+                    # 行番号またはspan-listがない場合はデータのみ標準出力
+                    if "line_number" not in cmd_level[1] or "span-list" not in cmd_level[1]:
+                        print(cmd_level[0]); continue
+                    
+                    standard_out(cmd_level[0], cmd_level[1]["line_number"], cmd_level[1]["span-list"], len(inlines), n=args.line_number , z=args.colorless)
 
             if args.benchmarktest == True:
                 seconds = time.time() - starttime
                 print ("processing takes " + '{:.3f}'.format(seconds) + " seconds")
+                print(cache_info())
 
             if args.json == True:
                 import json
-                for cmd_level in result.iter():
-                    print(json.dumps(cmd_level[1], indent=4))
+                for level in dumps:
+                    print(json.dumps(level, indent=4))
         else:
-            if args.benchmarktest == True:
-                seconds = time.time() - starttime
-                print ("processing takes " + '{:.3f}'.format(seconds) + " seconds")            
-            
+            # 抽出結果を逐次書き込むため、出力先は検索処理の前に確定する(入力待ちの時間は処理時間に含めない)
+            waiting = time.time()
             if not os.path.exists(out_folder):
                 raise FileNotFoundError
             else:
@@ -229,8 +283,15 @@ def getconfigsummary(args: argparse.Namespace,
             if os.path.exists(out_path):
                 if not get_yes_or_no('ファイルが存在します。上書きしますか?(Y/N)', retries=2):
                     return
-                
-            data_out(out_path, result.data)
+            if args.benchmarktest == True:
+                starttime += time.time() - waiting
+
+            data_out(out_path, (line for section in summary_sections() for line in section.data))
+
+            if args.benchmarktest == True:
+                seconds = time.time() - starttime
+                print ("processing takes " + '{:.3f}'.format(seconds) + " seconds")
+                print(cache_info())
             
         if args.system_mode:
             if args.f != None:
@@ -340,66 +401,246 @@ def find_matching_line_in_commands(args, commands: list, reqno: int) -> 'Command
                                                   {'atype': 'INFO', 'error': None, 'span': (35, 41)},...}]}
      ...]
 
+    要望番号毎の処理内容(抽出・突合・出力タイトル)はcheck_specsの検査仕様(CheckSpec)として定義する
+
     内部変数
     List : 抽出したコマンド列をCommandLevelListのインスタンスとして保持する内部格納域(list)
+
+    出力対象外の区分(プレビュー指定無しの場合の'kind'が'n'の区分等)は、突合・階層構造作成等の処理を行わず
+    空のCommandLevelListを積む(Listの添字と区分(タイトル)の対応は保つ)
     '''
-    List = []; cl = CommandList(commands)
+    spec = check_specs.get(reqno)
+    if spec is None: # 検査仕様の無い要望番号
+        return CommandLevelList([], [])
 
-    if reqno == 1:
-        # ACLと受信用経路フィルタ突合
-        
-        p1 = pattern_ip_access_list
-        p2 = pattern_seqno
-        p3 = pattern_ip_prefix_list_IN_PL
+    ctx = CheckContext(args, commands, reqno)
+    spec.check(ctx) # 区分毎の出力結果を作成
+    List = ctx.sections
 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2)
-        cmds2 = cl.find_matching_line_for_each_config_level(p3, Lv=1)
+    # cll(CommandLevelList)インスタンスからコマンド列で構成されるリストを取り出し、
+    # サブリストとしてwkに積み、CommandLevelListのリストを作成
+    wk = [cll.insert_empty_string() for cll in List]
 
+    # 検索結果が[](空リスト)の場合の措置
+    commandlevellists = [L if L.data != [] else CommandLevelList(["無し", ""], [{"level":"0"}, {"level":"0"}]) for L in wk]    
 
-        List.append(cmds1.search_command_info(ptn = 2))       
-        List.append(cmds2.search_command_info(ptn = 2))
-        
+    if args.f == None: # 標準出力(コマンドラインからの入力ファイル名指定無し)の場合
+        messages = ['見つかりました。' if L != [] else '検索対象が見つかりません。' for L in wk]
+        frame = '#{}-{}: {}'
+        for i, r in enumerate(messages, 1):       # 1から開始
+            if spec.titles[i-1]['kind'] == 's':  # 1始まりのため-1
+                print(frame.format(reqno, i, r))
+
+    # 各要望番号に対応する出力結果へのタイトル付与  
+    outline = CommandLevelList([],[])
+    for i in range(len(commandlevellists)):
+        if section_is_output(args, reqno, i + 1):
+            for title in spec.titles[i]['title']:
+                outline.extend(CommandLevelList([title],[{"level":"0"}])) # 伸長
+            outline.extend(commandlevellists[i])
+
+    return outline
+
+
+def section_is_output(args, reqno: int, number: int)-> bool:
+    '''要望番号reqnoの区分(#reqno-number、1始まり)が出力対象かどうかを返す
+    引数
+    args   - コマンドラインからの入力引数(argparse.Namespaceのインスタンス)
+    reqno  - 要望番号(1, 2, 3,... )
+    number - 区分の番号(check_specs[reqno].titlesの添字+1)
+    戻り値
+    ファイル出力(args.fの指定無し)の場合 : プレビュー指定有、または'kind'が's'であればTrue(プレビュー版判定)
+    標準出力(args.fの指定有)の場合     : 'print'が'p'であればTrue(標準出力対象か否かの判定)
+    '''
+    title = check_specs[reqno].titles[number - 1]
+    if args.f == None:
+        return args.preview_mode or title['kind'] == 's'
+    return title['print'] == 'p'
+
+
+class Scan:
+    '''
+    検査仕様(CheckSpec)で宣言する抽出(find_matching_line_for_each_config_levelの呼び出し)一件分を表すクラス
+    インスタンス変数
+    patterns : 検索パターンのタプル(find_matching_line_for_each_config_levelのargs)
+    Lv, ptn  : find_matching_line_for_each_config_levelのLv, ptn
+    sections : 抽出結果を使用する区分の番号のタプル(空のタプルの場合は全区分)
+               使用する区分がいずれも出力対象外の場合、plan_scansによる事前の抽出を行わない
+    '''
+    __slots__ = ("patterns", "Lv", "ptn", "sections")
+
+    def __init__(self, *patterns: 're.Pattern', Lv: int = 1, ptn: int = 1, sections: tuple = ()) -> None:
+        self.patterns = patterns; self.Lv = Lv; self.ptn = ptn; self.sections = sections
+
+
+    def used_by(self, *sections: int)-> 'Scan':
+        ''' 抽出結果を使用する区分の番号を指定した複製を返す '''
+        return Scan(*self.patterns, Lv=self.Lv, ptn=self.ptn, sections=sections)
+
+
+    def key(self)-> tuple:
+        ''' 抽出の同一性を判定するキー(scan_cacheのキーと同じ)を返す '''
+        return (self.patterns, self.Lv, self.ptn, 30)
+
+
+    def run(self, cl: 'CommandList')-> 'CommandLevelList':
+        ''' 抽出結果を返す(scan_cacheを介するため、同一のコマンド列に対する同一の抽出は一度だけ行う) '''
+        return cl.find_matching_line_for_each_config_level(*self.patterns, Lv=self.Lv, ptn=self.ptn)
+
+
+
+class CheckSpec:
+    '''
+    要望番号一件分の検査仕様
+    インスタンス変数
+    check  : 検査関数(CheckContextを引数とし、区分毎の出力結果をCheckContext.appendで積む)
+    titles : 区分毎の出力タイトル定義のリスト({"kind":s/n, "print":p/n, "title":[出力タイトル文字列, ...]}、区分の番号順)
+    scans  : {抽出名称: Scan}(検査関数からCheckContext.scanで参照する抽出)
+    '''
+    __slots__ = ("check", "titles", "scans")
+
+    def __init__(self, check: 'function', titles: list, scans: dict = None) -> None:
+        self.check = check; self.titles = titles; self.scans = scans if scans is not None else {}
+
+
+
+class CheckContext:
+    '''
+    検査関数に渡す、要望番号一件分の実行時情報
+    インスタンス変数
+    args     : コマンドラインからの入力引数(argparse.Namespaceのインスタンス)
+    commands : コマンド列から成るリスト
+    reqno    : 要望番号
+    spec     : 検査仕様(CheckSpec)
+    cl       : commandsのCommandList
+    sections : 区分毎の出力結果(CommandLevelList)のリスト(区分の番号順)
+    '''
+
+    def __init__(self, args, commands: list, reqno: int) -> None:
+        self.args = args; self.commands = commands; self.reqno = reqno
+        self.spec = check_specs[reqno]; self.cl = CommandList(commands); self.sections = []
+
+
+    def scan(self, name: str)-> 'CommandLevelList':
+        ''' 検査仕様で宣言した抽出の結果を返す(他の要望番号と共通の抽出は一度だけ行う) '''
+        return self.spec.scans[name].run(self.cl)
+
+
+    def wanted(self, *numbers: int)-> bool:
+        ''' 区分(#要望番号-番号、1始まり)のいずれかが出力対象かどうかを返す '''
+        return any(section_is_output(self.args, self.reqno, n) for n in numbers)
+
+
+    def append(self, cll: 'CommandLevelList')-> None:
+        ''' 次の区分の出力結果を積む '''
+        self.sections.append(cll)
+
+
+    def skip(self, *numbers: int)-> None:
+        ''' 出力対象外の区分を空のCommandLevelListとして積む(区分と出力結果の対応を保つ) '''
+        self.sections.extend(CommandLevelList([], []) for _ in numbers)
+
+
+
+def plan_scans(args, reqnos: list)-> list:
+    '''要望番号reqnosの検査仕様で宣言された抽出のうち、出力対象の区分で使用するものを重複を除いて返す
+    引数
+    args   - コマンドラインからの入力引数(argparse.Namespaceのインスタンス)
+    reqnos - 要望番号のリスト
+    戻り値
+    Scanのリスト(キーの同一な抽出は最初に宣言されたもののみ、要望番号の順)
+    '''
+    plan = {}
+    for reqno in reqnos:
+        for scan in check_specs[reqno].scans.values():
+            if scan.sections == () or any(section_is_output(args, reqno, n) for n in scan.sections):
+                plan.setdefault(scan.key(), scan)
+    return list(plan.values())
+
+
+def run_scans(commands: list, scans: list, workers: int = 1)-> None:
+    '''plan_scansで求めた抽出を一度ずつ実行しscan_cacheに保持する(以降の検査関数からの参照は全行を再走査しない)
+    各抽出の一行目の検索パターン(args[0])は、未抽出の全抽出(組み込みの要望番号・ルールファイルの検査の別によらない)の分を
+    全行の一度の走査でまとめて検索し、各抽出ではその結果を用いる(抽出の数によらず全行の走査は一度となる)
+    scan_cacheに保持済みの抽出(先行の呼び出しで実行したもの)は対象外とする
+    workersが2以上の場合は、各抽出の全ての検索パターンをコマンド列のチャンク毎にワーカプロセスで並列に検索する
+    (match_lines_in_chunks)。Lv1/Lv2の判定はその結果を用いて本プロセスで行うため、抽出結果は逐次実行と同一となる
+    '''
+    scan_cache.bind(commands)
+    scans = [scan for scan in scans if scan.key() not in scan_cache.results] # 抽出済みのものは除く
+    if scans == []:
+        return
+
+    cl = CommandList(commands)
+    if workers > 1:
+        patterns = list(dict.fromkeys(pattern for scan in scans for pattern in scan.patterns[:3]))
+        matches = dict(zip(patterns, match_lines_in_chunks(commands, patterns, workers)))
+    else:
+        matches = {} # {一行目の検索パターン: {コマンドのindex: re.Match}}
+        for scan in scans:
+            matches.setdefault(scan.patterns[0], {})
+
+        for i, command in enumerate(commands):
+            for pattern, found in matches.items():
+                m = re.search(pattern, command)
+                if m:
+                    found[i] = m
+
+    for scan in scans:
+        scan_cache.prefill(commands, scan.key(),
+                           lambda: cl.scan_config_level(*scan.patterns, Lv=scan.Lv, ptn=scan.ptn, matches=matches))
+
+
+def check_acl_and_in_prefix_list(ctx: 'CheckContext')-> None:
+    ''' (1)ACLと受信用経路フィルタ突合 '''
+
+    cmds1 = ctx.scan("acl")
+    cmds2 = ctx.scan("in_pl")
+
+    ctx.append(cmds1.search_command_info(ptn = 2))
+    ctx.append(cmds2.search_command_info(ptn = 2))
+
+    if ctx.wanted(3, 4):
         _, e1 = cmds1.compare_commandlines(cmds2, ptn = 2)
         _, e2 = cmds2.compare_commandlines(cmds1, ptn = 2)
 
         data_ex = e1; data_ex.extend(e2) # エラーコマンド
         cmds3 = data_ex.renew_level(lv = "1") # levelsのすべての"level"要素について"1"に設定
 
-        List.append(cmds3)
-        
+        ctx.append(cmds3)
+
         if cmds2.to_cln() <= cmds1.to_cln():
             cmds4 = CommandLevelList([], [])
         else:
             cmds4 = (cmds2.to_cln() - cmds1.to_cln()).to_cll()
-        
-        List.append(cmds4)
-        
-    if reqno == 2:
-        # Staticルートと「StaticルートをBGPに再配送するための経路フィルタ」突合  
-        
-        p1 = pattern_vrf_context
-        p2 = pattern_ip_route_ipv4addr
-        p3 = pattern_ip_prefix_list_STATIC_TO_BGP_PL
-        
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2, ptn=2)
-        cmds2 = cl.find_matching_line_for_each_config_level(p3)   # Lv=1は省略可能
-        List.append(cmds1.search_command_info(ptn=2))
-        List.append(cmds2)
-        
-#       a)Staticルート:#2-1で取得
-#       b)WAN向けStaticルート：#7-1で取得したWAN-IFアドレス
-#       c)デフォルトルート：0.0.0.0/0
-#       d)ダミースタティックルート：#6-1で取得(ダミーStaticルート(宛先が/32でかつ出力IFが「Ethernet X/X.XXX」のもの))
-#       →a) - b) -c) -d)を表示
 
+        ctx.append(cmds4)
+    else:
+        ctx.skip(3, 4)
+
+
+def check_static_routes_and_prefix_list(ctx: 'CheckContext')-> None:
+    ''' (2)Staticルートと「StaticルートをBGPに再配送するための経路フィルタ」突合 '''
+
+    cmds1 = ctx.scan("static")
+    cmds2 = ctx.scan("static_pl")
+    ctx.append(cmds1.search_command_info(ptn=2))
+    ctx.append(cmds2)
+
+#   a)Staticルート:#2-1で取得
+#   b)WAN向けStaticルート：#7-1で取得したWAN-IFアドレス
+#   c)デフォルトルート：0.0.0.0/0
+#   d)ダミースタティックルート：#6-1で取得(ダミーStaticルート(宛先が/32でかつ出力IFが「Ethernet X/X.XXX」のもの))
+#   →a) - b) -c) -d)を表示
+
+    if ctx.wanted(3, 4, 5, 6, 7):
         p4 = pattern_interface_EthernetXXXX
-        p5 = pattern_ip_address
-        p6 = pattern_ip_route_ipv4addr_slash32_EthernetXXXX        
+        p6 = pattern_ip_route_ipv4addr_slash32_EthernetXXXX
 
-        cmds3 = cl.find_matching_line_for_each_config_level(p4, p5, Lv=2) # b)を取得
+        cmds3 = ctx.scan("7-1") # b)を取得
         defaultcll = CommandLevelList(default_route, [{"level":"1"}] * len(default_route), lv = "1") # c)を取得
-        cmds4 = cl.find_matching_line_for_each_config_level(p6) # d)を取得
-        
+        cmds4 = ctx.scan("6-1") # d)を取得
+
         cmds5 = (
                  cmds1.to_cln() -
                  cmds3.to_cln() -
@@ -407,243 +648,350 @@ def find_matching_line_in_commands(args, commands: list, reqno: int) -> 'Command
                  cmds4.to_cln()
                 ).to_cll()     # a) - b) -c) -d)
 
-        List.append(cmds5.search_command_info(ptn=2))
-       
+        ctx.append(cmds5.search_command_info(ptn=2))
+
         if cmds2.to_cln() == cmds5.to_cln():
             cmds6 = CommandLevelList([], [])
         else:
             cmds6 = (cmds2.to_cln() - cmds5.to_cln()).to_cll()
             cmds6.extend((cmds5.to_cln() - cmds2.to_cln()).to_cll())  # 伸長
 
-        List.append(cmds6.search_command_info(ptn=2))
+        ctx.append(cmds6.search_command_info(ptn=2))
 
-    if reqno == 3:
-        # 「StaticルートをBGPに再配送するための経路フィルタ」と「StaticルートをBGPに再配送するためのルートマップ」突合
-        
-        p1 = pattern_ip_prefix_list_STATIC_TO_BGP_PL
-        p2 = pattern_route_map_STATIC_TO_BGP_MAP
-        p3 = pattern_match_ip_address
-       
-        cmds1 = cl.find_matching_line_for_each_config_level(p1)
-        cmds2 = cl.find_matching_line_for_each_config_level(p2, p3, Lv=2)
-        List.append(cmds1)
-        List.append(cmds2)
-
-    if reqno == 4:
-        # Directルート(LAN-IF設定)と「DirectルートをBGPに再配送するための経路フィルタ」突合
-
-        p1 = pattern_interface_port_channel
-        p2 = pattern_description_Bleaf_LAN
-        p3 = pattern_ip_address
-        p4 = pattern_ip_prefix_list_DIRECT_TO_BGP_PL
-
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, p3, Lv=2)
-        cmds2 = cl.find_matching_line_for_each_config_level(p4)
-        List.append(cmds1)
-        List.append(cmds2.search_command_info(ptn=2))
-
-        cmds3 = cmds1.add_networkinfo() # ネットワーク情報を行頭に付加
-        List.append(cmds3.search_command_info(ptn=2))
+        # 経路フィルタ(seq/ge/le/deny)による評価結果
+        pls = compile_prefix_lists(cmds2.data, [lv["line_number"] for lv in cmds2.levels])
+        ctx.append(cmds5.add_prefix_list_info(pls))
 
-        if cmds2.to_cln() == cmds3.to_cln():
-            cmds4 = CommandLevelList([], [])
-        else:
-            cmds4 = (cmds2.to_cln() - cmds3.to_cln()).to_cll()
-            cmds4.extend((cmds3.to_cln() - cmds2.to_cln()).to_cll())
-            
-        List.append(cmds4)
+        # VRF毎の突合差分((VRF, ネットワーク)で索引し、同一VRFのパーティションどうしで比較する)
+        # 経路フィルタの所属VRFは再配送定義(redistribute static)とルートマップを辿って求める
+        cmds7 = ctx.scan("redistribute")
+        cmds8 = ctx.scan("route_map")
+        wan = VrfIndex((a.vrf, (a.network(), a.length), a)
+                       for a in InterfaceTable.addresses(interface_table(ctx.commands).select(p4))) # b)をVRF毎に取得
 
-    if reqno == 5:
-        #「StaticルートをBGPに再配送するための経路フィルタ」「DirectルートをBGPに再配送するための経路フィルタ」と経路広告用フィルタ突合
-        
-        p1 = pattern_ip_prefix_list_STATIC_TO_BGP_PL
-        p2 = pattern_ip_prefix_list_DIRECT_TO_BGP_PL
-        p3 = pattern_ip_prefix_list_OUT_PL
-
-        cmds1 = cl.find_matching_line_for_each_config_level(p1)
-        cmds2 = cl.find_matching_line_for_each_config_level(p2)
-        cmds3 = cl.find_matching_line_for_each_config_level(p3)
-        List.append(cmds1)
-        List.append(cmds2)
-        List.append(cmds3)
-        
-    if reqno == 6:
-        # ダミーSaticルートと、ダミーStaticルートに適用するBFD設定と、ダミーStaticルートを条件とするTrack設定突合
-        
-        p1 = pattern_ip_route_ipv4addr_slash32_EthernetXXXX
-        p2 = pattern_ip_route_static_bfd_EthernetXXXX
-        p3 = pattern_track_reachability
- 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1)
-        cmds2 = cl.find_matching_line_for_each_config_level(p2)
-        cmds3 = cl.find_matching_line_for_each_config_level(p3)
-        List.append(cmds1.search_command_info(ptn=2))
-        List.append(cmds2)
-        List.append(cmds3)
-        
-        # ダミーStaticルートのGWアドレスで、BFD設定を絞り込み
-        cmds4 = cmds2.extract_ip_matched_line(cmds1, ptn = 1)
-        List.append(cmds4)
+        def route_key(cmd: str)-> (int, int) or None:
+            ''' a)の索引キー(c)デフォルトルートとd)ダミースタティックルートは除く) '''
+            key = network_key(cmd)
+            return None if key == None or key[1] == 0 or re.search(p6, cmd) else key
 
-        # ダミーStaticルートを条件とし、Track設定を絞り込み
-        cmds5 = cmds3.extract_ip_matched_line(cmds1, ptn = 2)
-        List.append(cmds5)
+        cmds10 = cmds1.search_command_info(ptn=2)
+        routes = index_by_vrf(cmds10.data, cmds10.levels, route_key).subtract(wan) # a) - b)
+        filters = prefix_list_vrf_index(cmds7, cmds8, cmds2.search_command_info(ptn=2))
+        ctx.append(vrf_rows_to_cll(routes.difference(filters) + filters.difference(routes)))
 
-    if reqno == 7:
-        # WAN-IFアドレスと、BGPネイバー設定の突合
+        # Staticルート表(宛先の昇順に整列)による重複・同一宛先で転送先の異なるルートの検出
+        ctx.append(static_route_table_info(static_route_table(ctx.commands), cmds10))
+    else:
+        ctx.skip(3, 4, 5, 6, 7)
 
-        p1 = pattern_interface_EthernetXXXX
-        p2 = pattern_ip_address
-        p3 = pattern_router_bgp_asno
-        p4 = pattern_neighbor
 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2)
-        cmds2 = cl.find_matching_line_for_each_config_level(p3, p4, Lv=2, ptn=2)
+def check_static_prefix_list_and_route_map(ctx: 'CheckContext')-> None:
+    ''' (3)「StaticルートをBGPに再配送するための経路フィルタ」と「StaticルートをBGPに再配送するためのルートマップ」突合 '''
 
-        List.append(cmds1.search_command_info(ptn=2, strict=False))
-        List.append(cmds2)
+    ctx.append(ctx.scan("static_pl"))
+    ctx.append(ctx.scan("route_map"))
 
-    if reqno == 8:
-        # LoopbackIFと、BGPルータIDの突合
 
-        p1 = pattern_interface_loopbackseqno
-        p2 = pattern_ip_address
-        p3 = pattern_router_bgp_asno
-        p4 = pattern_router_id_ipv4addr
- 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2)       
-        cmds2 = cl.find_matching_line_for_each_config_level(p3, p4, Lv=2, ptn=2)
-        List.append(cmds1)       
-        List.append(cmds2)
+def check_direct_routes_and_prefix_list(ctx: 'CheckContext')-> None:
+    ''' (4)Directルート(LAN-IF設定)と「DirectルートをBGPに再配送するための経路フィルタ」突合 '''
 
-    if reqno == 9:
-        #WAN-IF設定「interface Ethernet XX.<Sub-IF番号>」と、WAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合
-        
-        p1 = pattern_interface_EthernetXXXX
-        p2 = pattern_encapsulation_dot1q
+    # LAN-IF(Bleaf LAN向けのdescriptionとip address)はIF表から取得
+    lan = interface_table(ctx.commands).select(pattern_interface_port_channel)
+    addresses = InterfaceTable.addresses(lan)
 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2)
-        List.append(cmds1)
+    def children(row: 'InterfaceRow')-> list:
+        out = [(n, pattern_ip_address, "2.2") for n in row.address_lines]
+        n = row.lines.get("description")
+        if n is not None and re.search(pattern_description_Bleaf_LAN, ctx.commands[n - 1]):
+            out.append((n, pattern_description_Bleaf_LAN, "2.1"))
+        return out
 
-    if reqno == 10:
-        #LAN-IF(Port-Channel IF)の「interface port-channelXX.<Sub-IF番号>」と、LAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合
-        
-        p1 = pattern_interface_port_channel
-        p2 = pattern_encapsulation_dot1q
+    cmds1 = interface_rows_cll(ctx.commands, lan, pattern_interface_port_channel, children)
+    cmds2 = ctx.scan("direct_pl")
+    ctx.append(cmds1)
+    ctx.append(cmds2.search_command_info(ptn=2))
+
+    if ctx.wanted(3, 4, 5, 6):
+        cmds3 = cmds1.add_networkinfo({a.line_number: a.prefix() for a in addresses}) # ネットワーク情報を行頭に付加
+        ctx.append(cmds3.search_command_info(ptn=2))
 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, Lv=2)
-        List.append(cmds1)
+        if cmds2.to_cln() == cmds3.to_cln():
+            cmds4 = CommandLevelList([], [])
+        else:
+            cmds4 = (cmds2.to_cln() - cmds3.to_cln()).to_cll()
+            cmds4.extend((cmds3.to_cln() - cmds2.to_cln()).to_cll())
+
+        ctx.append(cmds4)
+
+        # 経路フィルタ(seq/ge/le/deny)による評価結果
+        pls = compile_prefix_lists(cmds2.data, [lv["line_number"] for lv in cmds2.levels])
+        ctx.append(cmds1.add_prefix_list_info(pls))
+
+        # VRF毎の突合差分((VRF, ネットワーク)で索引し、同一VRFのパーティションどうしで比較する)
+        cmds5 = ctx.scan("redistribute")
+        cmds6 = ctx.scan("route_map")
+        rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cmds1.iter()}
+
+        interfaces = VrfIndex((a.vrf, (a.network(), a.length), rows[a.line_number]) for a in addresses) # LAN-IFの所属VRF・ネットワーク
+        filters = prefix_list_vrf_index(cmds5, cmds6, cmds2.search_command_info(ptn=2))
+        ctx.append(vrf_rows_to_cll(interfaces.difference(filters) + filters.difference(interfaces)))
+    else:
+        ctx.skip(3, 4, 5, 6)
+
+
+def check_redistribution_and_out_prefix_list(ctx: 'CheckContext')-> None:
+    ''' (5)「StaticルートをBGPに再配送するための経路フィルタ」「DirectルートをBGPに再配送するための経路フィルタ」と経路広告用フィルタ突合 '''
+
+    cmds1 = ctx.scan("static_pl")
+    cmds2 = ctx.scan("direct_pl")
+    cmds3 = ctx.scan("out_pl")
+    ctx.append(cmds1)
+    ctx.append(cmds2)
+    ctx.append(cmds3)
+
+    if ctx.wanted(4, 5):
+        # 再配送用経路フィルタと経路広告用フィルタの被覆確認(結合済み整数区間の比較)
+        cmds4, cmds5 = compare_prefix_list_coverage((cmds1, cmds2), cmds3)
+        ctx.append(cmds4.search_command_info(ptn=2))
+        ctx.append(cmds5.search_command_info(ptn=2))
+    else:
+        ctx.skip(4, 5)
+
+
+def check_dummy_static_routes(ctx: 'CheckContext')-> None:
+    ''' (6)ダミーSaticルートと、ダミーStaticルートに適用するBFD設定と、ダミーStaticルートを条件とするTrack設定突合 '''
+
+    cmds1 = ctx.scan("6-1")
+    cmds2 = ctx.scan("bfd")
+    cmds3 = ctx.scan("track")
+    ctx.append(cmds1.search_command_info(ptn=2))
+    ctx.append(cmds2)
+    ctx.append(cmds3)
+
+    # ダミーStaticルートのGWアドレスで、BFD設定を絞り込み
+    cmds4 = cmds2.extract_ip_matched_line(cmds1, ptn = 1)
+    ctx.append(cmds4)
+
+    # ダミーStaticルートを条件とし、Track設定を絞り込み
+    cmds5 = cmds3.extract_ip_matched_line(cmds1, ptn = 2)
+    ctx.append(cmds5)
+
+    if ctx.wanted(6):
+        # BFD設定・Track設定の無いダミーStaticルート(Staticルート表の各ルートのBFD・Track設定有無で判定)
+        cmds6 = ctx.scan("static").search_command_info(ptn=2)
+        ctx.append(dummy_route_info(static_route_table(ctx.commands), cmds6))
+    else:
+        ctx.skip(6)
+
+
+def check_wan_interfaces_and_neighbors(ctx: 'CheckContext')-> None:
+    ''' (7)WAN-IFアドレスと、BGPネイバー設定の突合 '''
+
+    cmds1 = ctx.scan("7-1").search_command_info(ptn=2, strict=False)
+    cmds2 = ctx.scan("neighbors")
+
+    ctx.append(cmds1)
+    ctx.append(cmds2)
+
+    if ctx.wanted(3, 4, 5):
+        # VRF毎の突合差分(WAN-IFのネットワークとBGPネイバーアドレスを(VRF, ネットワーク)で索引し、同一VRF内で突合する)
+        # WAN-IFの所属VRF・ネットワークはIF表から求め、出力行には#7-1の抽出結果の同一行を用いる
+        table = interface_table(ctx.commands)
+        rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cmds1.iter() if "line_number" in lv}
+        cmds4 = ctx.scan("vrf_neighbors").search_command_info(ptn=1)
+
+        interfaces = VrfIndex((a.vrf, (a.network(), a.length), rows[a.line_number])
+                              for a in InterfaceTable.addresses(table.select(pattern_interface_EthernetXXXX))
+                              if a.line_number in rows)
+        neighbors = index_by_vrf(cmds4.data, cmds4.levels, neighbor_key)
+        ctx.append(compare_neighbors_by_vrf(interfaces, neighbors))
+
+        # BGPネイバー・Staticルートのネクストホップの接続IF(全IFのサブネットの整列済み配列を二分探索)
+        # Staticルートの所属VRF・ネクストホップはStaticルート表のネクストホップの索引から求める
+        connected = ConnectedIndex(InterfaceTable.addresses(table.select(*interface_patterns)))
+        ctx.append(connected_interface_info(connected, neighbors))
+        routes = static_route_table(ctx.commands).by_next_hop
+        next_hops = VrfIndex((vrf, (next_hop, 32), route_row(ctx.commands, route))
+                             for (vrf, next_hop), via in routes.items() for route in via)
+        ctx.append(connected_interface_info(connected, next_hops))
+    else:
+        ctx.skip(3, 4, 5)
+
+
+def check_loopback_and_router_id(ctx: 'CheckContext')-> None:
+    ''' (8)LoopbackIFと、BGPルータIDの突合 '''
+
+    # LoopbackIF(ip address)はIF表から取得
+    loopbacks = interface_table(ctx.commands).select(pattern_interface_loopbackseqno)
+    ctx.append(interface_rows_cll(ctx.commands, loopbacks, pattern_interface_loopbackseqno,
+                                  lambda row: [(n, pattern_ip_address, "2") for n in row.address_lines]))
+    ctx.append(ctx.scan("router_id"))
+
+
+def check_subinterface_vlan_numbers(ctx: 'CheckContext')-> None:
+    ''' (9)WAN-IF・(10)LAN-IF(Port-Channel IF)のSub-IF番号と、「encapsulation dot1q <VLAN番号>」の突合
+    対象のIFは検査仕様の抽出"subinterfaces"の一行目の検索パターンとする
+    '''
 
-    if reqno == 11:
-        #「DirectルートをBGPに再配送するための経路フィルタ」と、「DirectルートをBGPに再配送するためのルートマップ」の突合
+    scan = ctx.spec.scans["subinterfaces"]
+    ctx.append(ctx.scan("subinterfaces"))
 
-        p1 = pattern_ip_prefix_list_DIRECT_TO_BGP_PL
-        p2 = pattern_route_map_DIRECT_TO_BGP_MAP
-        p3 = pattern_match_ip_address
+    if ctx.wanted(2):
+        # Sub-IF番号とVLAN番号の突合(VLAN相違/同一親IFでのVLAN重複/encapsulation無し)
+        ctx.append(subinterface_vlan_info(interface_table(ctx.commands), scan.patterns[0]))
+    else:
+        ctx.skip(2)
 
-        p4 = pattern_DIRECT_TO_BGP_PL
 
-        cmds1 = cl.find_matching_line_for_each_config_level(p1)
-        cmds2 = cl.find_matching_line_for_each_config_level(p2, p3, Lv=2)
+def check_direct_prefix_list_and_route_map(ctx: 'CheckContext')-> None:
+    ''' (11)「DirectルートをBGPに再配送するための経路フィルタ」と、「DirectルートをBGPに再配送するためのルートマップ」の突合 '''
 
-        List.append(cmds1.search_command_info(ptn = 3, pattern = p4))
-        List.append(cmds2.search_command_info(ptn = 3, pattern = p4))
-        
+    p4 = pattern_DIRECT_TO_BGP_PL
+
+    cmds1 = ctx.scan("direct_pl")
+    cmds2 = ctx.scan("route_map")
+
+    ctx.append(cmds1.search_command_info(ptn = 3, pattern = p4))
+    ctx.append(cmds2.search_command_info(ptn = 3, pattern = p4))
+
+    if ctx.wanted(3):
         if cmds1.to_cls(p4) == cmds2.to_cls(p4):
             cmds3 = CommandLevelList([], [])
         else:
             cmds3 = (cmds1.to_cls(p4) - cmds2.to_cls(p4)).to_cll()
             cmds3.extend((cmds2.to_cls(p4) - cmds1.to_cls(p4)).to_cll())
 
-        List.append(cmds3)
+        ctx.append(cmds3)
+    else:
+        ctx.skip(3)
 
-    if reqno == 14:
-        # BGP設定、staticルートをBGPに再配送するためのルートマップ、経路フィルタの突合
-        
-        p1 = pattern_router_bgp_asno
-        p2 = pattern_vrf_LB_VRF
-        p5 = pattern_match_ip_address
-    
-        def redistribute_info(p3,p4,p6)-> None:
-            ''' Static/Directルート共通処理関数 '''
-            
-            cmds1 = cl.find_matching_line_for_each_config_level(p1, p2, p3, Lv=2, ptn=2)
-            cmds2 = cl.find_matching_line_for_each_config_level(p4, p5, Lv=2)
-            cmds3 = cl.find_matching_line_for_each_config_level(p6)
-            return cmds1, cmds2, cmds3
-
-        # Staticルート
-        cll1s, cll2s, cll3s = redistribute_info(pattern_redistribute_static,
-                                                pattern_route_map_STATIC_TO_BGP_MAP,
-                                                pattern_ip_prefix_list_STATIC_TO_BGP_PL)
-        
-        # CommandLevelListオブジェクトの複製を渡す
-        # コマンド検索条件の固定値(-STATIC-TO-BGP-PL等)のハイライト表現を残す(階層構造作成時の上書きを回避)
-        List.append(deepcopy(cll1s)); List.append(deepcopy(cll2s)); List.append(deepcopy(cll3s))
 
-        # Directルート          
-        cll1d, cll2d, cll3d = redistribute_info(pattern_redistribute_direct,
-                                                pattern_route_map_DIRECT_TO_BGP_MAP,
-                                                pattern_ip_prefix_list_DIRECT_TO_BGP_PL)
-        List.append(deepcopy(cll1d)); List.append(deepcopy(cll2d)); List.append(deepcopy(cll3d))
+def check_redistribution_hierarchy(ctx: 'CheckContext')-> None:
+    ''' (14)BGP設定、Static/DirectルートをBGPに再配送するためのルートマップ、経路フィルタの突合 '''
+
+    # Staticルート
+    cll1s, cll2s, cll3s = ctx.scan("static_bgp"), ctx.scan("static_map"), ctx.scan("static_pl")
+
+    # CommandLevelListオブジェクトの複製を渡す
+    # コマンド検索条件の固定値(-STATIC-TO-BGP-PL等)のハイライト表現を残す(階層構造作成時の上書きを回避)
+    ctx.append(deepcopy(cll1s)); ctx.append(deepcopy(cll2s)); ctx.append(deepcopy(cll3s))
+
+    # Directルート
+    cll1d, cll2d, cll3d = ctx.scan("direct_bgp"), ctx.scan("direct_map"), ctx.scan("direct_pl")
+    ctx.append(deepcopy(cll1d)); ctx.append(deepcopy(cll2d)); ctx.append(deepcopy(cll3d))
+
+    if ctx.wanted(7, 8, 9, 10, 11):
+        # 階層構造作成前(make_hierachyによる元要素のspan情報更新前)の情報から参照グラフを作成
+        tree = reference_tree_cll(redistribution_graph((cll1s, cll1d), (cll2s, cll2d), (cll3s, cll3d)).walk_roots())
 
         p7 = pattern_STATIC_TO_BGP_MAP
         p8 = pattern_STATIC_TO_BGP_PL
-        List.append(cll1s.make_hierachy(cll2s, p7, cll3s, p8, ptn=2)) # 階層構造作成
+        ctx.append(cll1s.make_hierachy(cll2s, p7, cll3s, p8, ptn=2)) # 階層構造作成
 
         p7 = pattern_DIRECT_TO_BGP_MAP
         p8 = pattern_DIRECT_TO_BGP_PL
 
-        List.append(cll1d.make_hierachy(cll2d, p7, cll3d, p8, ptn=2))
+        ctx.append(cll1d.make_hierachy(cll2d, p7, cll3d, p8, ptn=2))
 
-    if reqno == 15:
-        # ACL設定と、それに紐付くリストとの突合
-        
-        p1 = pattern_ip_access_group
-        p2 = pattern_ip_access_list
-        p3 = pattern_seqno
-        
-        cmds1 = cl.find_matching_line_for_each_config_level(p1)
-        cmds2 = cl.find_matching_line_for_each_config_level(p2, p3, Lv=2)
+        # 再配送シミュレーション(Staticルート・Directルート(LAN-IF)のうちBGPに再配送される経路をVRF毎に算出)
+        # 再配送定義の所属VRFは、VRF名称を問わないbgp定義中のvrf定義により求める
+        bgps = (ctx.scan("static_vrf_bgp"), ctx.scan("direct_vrf_bgp"))
+        cll4s = ctx.scan("static")
+        cll4d = ctx.scan("lan")
+        result = redistribution_result(bgps, (cll2s, cll2d), (cll3s, cll3d), cll4s, cll4d)
+        ctx.append(simulate_redistribution_info(result))
 
-        List.append(deepcopy(cmds1))
-        List.append(deepcopy(cmds2))
-        
-        p4 = pattern_IN_ACL
-        List.append(cmds1.make_hierachy(cmds2, p4, ptn=1)) # 階層構造作成
+        # 参照グラフを辿った階層構造(Static/Direct共通、参照の段数の制限無し)
+        ctx.append(tree)
 
+        # VRF毎の再配送経路の集合と経路広告用フィルタの差分
+        ctx.append(redistribution_advertisement_info(result, ctx.scan("out_pl"), (cll4s, cll4d)))
+    else:
+        ctx.skip(7, 8, 9, 10, 11)
 
-    # cll(CommandLevelList)インスタンスからコマンド列で構成されるリストを取り出し、
-    # サブリストとしてwkに積み、CommandLevelListのリストを作成
-    wk = [cll.insert_empty_string() for cll in List]
 
-    # 検索結果が[](空リスト)の場合の措置
-    commandlevellists = [L if L.data != [] else CommandLevelList(["無し", ""], [{"level":"0"}, {"level":"0"}]) for L in wk]    
+def check_access_groups(ctx: 'CheckContext')-> None:
+    ''' (15)ACL設定と、それに紐付くリストとの突合 '''
 
-    if args.f == None: # 標準出力(コマンドラインからの入力ファイル名指定無し)の場合
-        messages = ['見つかりました。' if L != [] else '検索対象が見つかりません。' for L in wk]
-        frame = '#{}-{}: {}'
-        for i, r in enumerate(messages, 1):       # 1から開始
-            if title_dict_for_each_reqno[str(reqno)][i-1]['kind'] == 's':  # 1始まりのため-1
-                print(frame.format(reqno, i, r))
+    # ip access-group設定はIF表から取得(行番号の昇順)
+    groups = sorted(n for row in interface_table(ctx.commands) for _, _, n in row.access_groups)
+    cmds1 = CommandLevelList([ctx.commands[n - 1] for n in groups],
+                             [matched_level(ctx.commands[n - 1], n, pattern_ip_access_group) for n in groups],
+                             lv = "1" if groups != [] else "0")
+    cmds2 = ctx.scan("acl")
 
-    # 各要望番号に対応する出力結果へのタイトル付与  
-    outline = CommandLevelList([],[])
-    for i in range(len(commandlevellists)):
-        if args.f == None: # ファイル出力
-            # プレビュー版判定
-            if args.preview_mode or (title_dict_for_each_reqno[str(reqno)][i]['kind'] == 's'):
-                for title in title_dict_for_each_reqno[str(reqno)][i]['title']:
-                    outline.extend(CommandLevelList([title],[{"level":"0"}])) # 伸長
-                outline.extend(commandlevellists[i])
-        else:
-            # 標準出力対象か否かの判定
-            if (title_dict_for_each_reqno[str(reqno)][i]['print'] == 'p'):
-                for title in title_dict_for_each_reqno[str(reqno)][i]['title']:
-                    outline.extend(CommandLevelList([title],[{"level":"0"}])) 
-                outline.extend(commandlevellists[i])
+    ctx.append(deepcopy(cmds1))
+    ctx.append(deepcopy(cmds2))
 
-    return outline
+    p4 = pattern_IN_ACL
+    if ctx.wanted(3):
+        ctx.append(cmds1.make_hierachy(cmds2, p4, ptn=1)) # 階層構造作成
+    else:
+        ctx.skip(3)
+
+    # 試験フロー(送信元/宛先アドレス)のACL評価(--acl_flows指定時のみ)
+    if getattr(ctx.args, "acl_flows", None) != None and ctx.wanted(4):
+        acls = compile_access_lists(cmds2.data, [lv["line_number"] for lv in cmds2.levels])
+        ctx.append(evaluate_acl_flows(acls, read_acl_flows(ctx.args.acl_flows)))
+
+
+def check_prefix_list_redundancy(ctx: 'CheckContext')-> None:
+    ''' (16)経路フィルタの重複・冗長エントリ確認 '''
+
+    cmds1 = CommandLevelList([], [], lv = "1")
+    for name in ("in_pl", "static_pl", "direct_pl", "out_pl"):
+        cmds1.extend(ctx.scan(name))
+    cmds1 = cmds1.sort_by_line_number().search_command_info(ptn=2)
+    ctx.append(cmds1)
+
+    # リスト名称毎にネットワークアドレスの昇順で一度走査し、重複・包含・seq重複を検出
+    ctx.append(prefix_list_redundancy_info(cmds1))
+
+
+def check_interface_address_conflicts(ctx: 'CheckContext')-> None:
+    ''' (17)IFアドレスの重複・サブネット重なり確認 '''
+
+    cmds1 = find_interface_addresses([ctx.scan(name) for name in ("wan", "lan", "loopback")])
+    cmds1 = cmds1.search_command_info(ptn=2, strict=False)
+    ctx.append(cmds1)
+
+    # (VRF, サブネット開始アドレス)で整列した区間列を一度走査し、アドレス重複・サブネット重なりを検出
+    ctx.append(interface_conflict_info(cmds1, interface_table(ctx.commands)))
+
+
+def check_object_references(ctx: 'CheckContext')-> None:
+    ''' (18)ACL・経路フィルタ・ルートマップの未参照定義・未定義参照の確認 '''
+
+    # 定義と参照元を一度ずつ抽出して参照グラフを作成し、節点と被参照の集合の差で検出
+    graph = config_object_graph(ctx.scan("acl"), ctx.scan("access_group"),
+                                [[ctx.scan(kind + name) for name in ("_redistribute", "_map", "_pl")]
+                                 for kind in ("static", "direct")])
+    cmds1, cmds2 = reference_check_info(graph)
+    ctx.append(cmds1)
+    ctx.append(cmds2)
+
+
+def check_neighbor_policies(ctx: 'CheckContext')-> None:
+    ''' (19)BGPネイバーのポリシー(ルートマップ・経路フィルタ)の確認 '''
+
+    # ネイバー・ルートマップ・経路フィルタを名称で索引した参照グラフを一度作成し、ネイバー毎に参照を辿る
+    graph = neighbor_policy_graph(ctx.scan("neighbors"), ctx.scan("vrf_neighbors"), ctx.scan("route_map"),
+                                  ctx.scan("prefix_list"), ctx.scan("route_map_references"))
+    ctx.append(reference_tree_cll(graph.walk_nodes("neighbor")))
+
+    cmds1, cmds2 = reference_check_info(graph, ("route-map", "prefix-list"))
+    ctx.append(cmds2)
+    ctx.append(cmds1)
+
+
+def check_rules(ctx: 'CheckContext')-> None:
+    ''' ルールファイルで定義した検査(区分毎に検査仕様の抽出の結果をそのまま出力する、load_rules参照) '''
+
+    for number, name in enumerate(ctx.spec.scans, 1):
+        if ctx.wanted(number):
+            ctx.append(ctx.scan(name))
+        else:
+            ctx.skip(number)
 
 
 # 正規表現用パーツ群
@@ -822,6 +1170,16 @@ pattern_match_ip_address = re.compile(r'''
                 ^(match\s{1}ip\s{1}address)\s{1} 
                 ''', re.VERBOSE)
 
+# 'route-map'で始まるコマンド(名称を問わないルートマップ定義一行目、BGPネイバーへの適用'route-map ... in/out'は除く)
+pattern_route_map = re.compile(r'''
+                ^(route-map)\s{1}(?!\S+\s{1}(?:in|out)\s*$)
+                ''', re.VERBOSE)
+
+# 'ip prefix-list'で始まるコマンド(名称を問わない経路フィルタ)
+pattern_ip_prefix_list = re.compile(r'''
+                ^(ip\s{1}prefix-list)\s{1}
+                ''', re.VERBOSE)
+
 # 'ip access-group'で始まるコマンド
 pattern_ip_access_group = re.compile(r'''       
                 ^(ip\s{1}access-group)\s{1}
@@ -854,6 +1212,11 @@ pattern_interface_EthernetXXXX = re.compile(r'''
                 ^(interface)''' + EthernetXXXX_simple
                 , re.VERBOSE)
 
+# 'interface'で始まるコマンド(種別を問わないIF設定一行目、IF設定の範囲の特定に使用)
+pattern_interface = re.compile(r'''
+                ^(interface)\s{1}
+                ''', re.VERBOSE)
+
 # 'interface loopbackxx'(LoopbackID)で始まるコマンド
 pattern_interface_loopbackseqno = re.compile(r'''
                 ^(interface\s{1}loopback)(?:[0-9]{1,}|(?:x|X){1,})
@@ -876,16 +1239,41 @@ pattern_neighbor = re.compile(r'''
                 ^(neighbor)\s{1} 
                 ''', re.VERBOSE)
 
+# BGPネイバーへのポリシー適用:'route-map'/'prefix-list'で始まり'in'/'out'で終わるコマンド
+# 例: 'route-map vSAMPLE-NER-IN-MAP in', 'prefix-list vSAMPLE-001-TEST-NER-IN-PL in'
+pattern_neighbor_policy = re.compile(r'''
+                ^(route-map|prefix-list)\s{1}\S+\s{1}(in|out)\b
+                ''', re.VERBOSE)
+
+# ルートマップの参照元(ルートマップ定義一行目・BGPネイバーへのポリシー適用を除く):'route-map'/'table-map'/'xxx-map'に名称が続くコマンド
+# 例: 'redistribute static route-map vSAMPLE-001-TEST-STATIC-TO-BGP-MAP', 'table-map vSAMPLE-TABLE-MAP',
+#     'default-information originate always route-map vSAMPLE-DEFAULT-MAP', 'network 10.1.0.0/16 route-map vSAMPLE-NW-MAP',
+#     'aggregate-address 10.1.0.0/16 advertise-map vSAMPLE-ADV-MAP attribute-map vSAMPLE-ATTR-MAP'
+pattern_route_map_reference = re.compile(r'''
+                ^(?!route-map\s)(?:.*\s)?((?:route|table|inject|exist|non-exist|advertise|suppress|unsuppress|attribute)-map)\s{1}\S+
+                ''', re.VERBOSE)
+
 # BGPルータID: router-id (ipv4addr)で始まるコマンド
 pattern_router_id_ipv4addr = re.compile(r'''
                 ^(router-id)\s{1}
                 ''', re.VERBOSE)
 
+# IF定義中のvrf定義:'vrf member'で始まるコマンド
+pattern_vrf_member = re.compile(r'''
+                ^(vrf\s{1}member)\s{1}
+                ''', re.VERBOSE)
+
 # bgp定義中のvrf定義
 pattern_vrf_LB_VRF = re.compile(r'''       
                 ^(vrf)\s{1}.*-LB-VRF 
                 ''', re.VERBOSE)
 
+# bgp定義中のvrf定義(VRF名称を問わないもの、VRF毎の突合・再配送シミュレーション用)
+# Lv=2, ptn=2の抽出では最後のrouter bgp以降の全行が対象となるため、'vrf context'/'vrf member'は除く
+pattern_vrf_bgp = re.compile(r'''
+                ^(vrf)\s{1}(?!context\s|member\s)\S+
+                ''', re.VERBOSE)
+
 
 # 文字列キャプチャ用正規表現
 # 空白と単語の末尾で囲まれ、かつ「DIRECT-TO-BGP-PL」で終わる文字列で、空白が最も右に位置する(すなわち長さが最短の)もの 
@@ -926,6 +1314,41 @@ pattern_STATIC_TO_BGP_MAP = ptn("STATIC", "MAP")
 pattern_IN_ACL = re.compile(r'''
     ^.+\s{1}(.*-IN-ACL)\b
     ''', re.VERBOSE)
+
+
+# 参照グラフ(ReferenceGraph)作成用の名称キャプチャ(名称を問わないもの)
+# 例 : コマンド行:'route-map vSAMPLE-NER-IN-MAP in'(BGPネイバーへの適用)
+#      抽出文字列:'vSAMPLE-NER-IN-MAP'
+
+pattern_NEIGHBOR_NAME = re.compile(r'''
+    ^neighbor\s{1}(\S+)
+    ''', re.VERBOSE)
+
+pattern_ROUTE_MAP_NAME = re.compile(r'''
+    ^route-map\s{1}(\S+)
+    ''', re.VERBOSE)
+
+pattern_PREFIX_LIST_NAME = re.compile(r'''
+    ^ip\s{1}prefix-list\s{1}(\S+)
+    ''', re.VERBOSE)
+
+pattern_NEIGHBOR_ROUTE_MAP = re.compile(r'''
+    ^route-map\s{1}(\S+)\s{1}(?:in|out)\b
+    ''', re.VERBOSE)
+
+pattern_NEIGHBOR_PREFIX_LIST = re.compile(r'''
+    ^prefix-list\s{1}(\S+)\s{1}(?:in|out)\b
+    ''', re.VERBOSE)
+
+# 'match ip address prefix-list'に複数の名称が指定された場合は最初の名称のみ
+pattern_MATCH_PREFIX_LIST = re.compile(r'''
+    ^match\s{1}ip\s{1}address\s{1}prefix-list\s{1}(\S+)
+    ''', re.VERBOSE)
+
+# 一行に複数の参照を含む場合('inject-map ... exist-map ...'等)は各参照にマッチ(ReferenceGraph.add_rootsで全て登録)
+pattern_REFERENCE_ROUTE_MAP = re.compile(r'''
+    (?:^|\s)(?:route|table|inject|exist|non-exist|advertise|suppress|unsuppress|attribute)-map\s{1}(\S+)
+    ''', re.VERBOSE)
                 
                 
 class CommandList:
@@ -1044,31 +1467,46 @@ class CommandList:
           [None,.., re.match,... ,  re.match,...    None,...]
 
         - line_numbers : コマンド行番号を格納したリスト(開始番号=1)
+
+        抽出結果はscan_cacheに保持し、同一のコマンド列(リストオブジェクト)に対する同一の引数(args, Lv, ptn, size)での
+        二回目以降の呼び出し(他の要望番号の処理等)では全行の走査を行わず、保持した抽出結果の複製を返す
+        '''
+        return scan_cache.lookup(self.data, (args, Lv, ptn, size),
+                                 lambda: self.scan_config_level(*args, Lv=Lv, ptn=ptn, size=size))
+
+
+    def scan_config_level(self, *args: 're.Pattern', Lv: int = 1, ptn: int = 1, size: int = 30,
+                          matches: dict = None) -> 'CommandLevelList':
+        '''find_matching_line_for_each_config_levelの抽出処理本体(scan_cacheを介さずに全行を走査する)
+        引数・戻り値はfind_matching_line_for_each_config_levelと同じ
+        matches : 検索パターン毎の全行の検索結果{検索パターン: {コマンドのindex: re.MatchまたはLineMatch}}(マッチした行のみ)
+                  含まれる検索パターンはre.searchによる検索を行わずこれを用いる(run_scansによる一括検索の結果)
         '''
-        
         commands = self.data
         command_levels, spans = [None] * len(commands), [None] * len(commands)
         line_numbers = list(i+1 for i in range(len(self)))
 
+        def searcher(pattern):  # コマンドのindexを引数とする検索関数を返す
+            if matches is not None and pattern in matches:
+                return matches[pattern].get
+            return lambda i: re.search(pattern, commands[i])
+
+        match1 = searcher(args[0])
+        match2 = searcher(args[1]) if len(args) >= 2 else None
+        match3 = searcher(args[2]) if len(args) >= 3 else None
+
         if Lv == 1:
-            p1 = args[0]
-            
             for i in range(len(commands)):
-                m = re.search(p1, commands[i])
+                m = match1(i)
                 if m:
                     command_levels[i] = "1"; spans[i] = m
         
         elif Lv == 2:
-            if len(args) == 2:
-                p1 = args[0]; p2 = args[1]
-            elif len(args) >= 3:
-                p1 = args[0]; p2 = args[1]; p3 = args[2]
-
             # Step1 - Lv1コマンドリスト内行番号取得
             command_lineno = []
 
             for i in range(len(commands)):
-                m = re.search(p1, commands[i])
+                m = match1(i)
                 if m:
                     command_lineno.append(i); spans[i] = m
             
@@ -1090,14 +1528,14 @@ class CommandList:
                 sl = commands[command_lineno[i] : last]   # スライス
                 for j in range(len(sl)):
                     
-                    m = re.search(p1, sl[j])
+                    m = match1(command_lineno[i]+j)
                     if m:
                         command_levels[command_lineno[i]+j] = "1"; spans[command_lineno[i]+j] = m
                         continue    # Lv1コマンド、次のfor反復へ
                         
                     if len(args) == 2:
                         if ptn == 1:
-                            m =re.search(p2, sl[j])
+                            m = match2(command_lineno[i]+j)
                             if m:
                                 found = True
                                 command_levels[command_lineno[i]+j] = "2"; spans[command_lineno[i]+j] = m
@@ -1108,18 +1546,18 @@ class CommandList:
                                     break   # 直近のfor文を抜ける(次のLv1コマンドの要素の処理へ)
 
                         if ptn == 2 or ptn == 3:                        
-                            m = re.search(p2, sl[j])
+                            m = match2(command_lineno[i]+j)
                             if m:
-                                # p2 = args[1]は別のコマンドが現れても処理を継続
+                                # args[1]は別のコマンドが現れても処理を継続
                                 command_levels[command_lineno[i]+j] = "2"; spans[command_lineno[i]+j] = m
 
                     elif len(args) >= 3:
                         if ptn == 1:
-                            m = re.search(p2, sl[j])
+                            m = match2(command_lineno[i]+j)
                             if m:
                                 command_levels[command_lineno[i]+j] = "2.1"; spans[command_lineno[i]+j] = m
                             else:
-                                m = re.search(p3, sl[j])
+                                m = match3(command_lineno[i]+j)
                                 if m:
                                     found = True
                                     command_levels[command_lineno[i]+j] = "2.2"; spans[command_lineno[i]+j] = m                                    
@@ -1130,11 +1568,11 @@ class CommandList:
                                         break
                                         
                         if ptn == 2 or ptn == 3:                        
-                            m = re.search(p2, sl[j])
+                            m = match2(command_lineno[i]+j)
                             if m:
                                 command_levels[command_lineno[i]+j] = "2.1"; spans[command_lineno[i]+j] = m
                             else:
-                                m = re.search(p3, sl[j])
+                                m = match3(command_lineno[i]+j)
                                 if m:
                                     command_levels[command_lineno[i]+j] = "2.2"; spans[command_lineno[i]+j] = m
         
@@ -1328,18 +1766,13 @@ class CommandList:
         
         intersection_keys = {x for x in exclude_element(set(matches_target) & set(matches_filter), None)}
 
+        # キー項目の存在確認は集合のハッシュ検索(O(1))で行い、出力順は元コマンド列の順序に従う
         out = []
         for x, y in zip(matches_target, self):
-            if x == None:        # 
-                out.append(None) # マッチしなかった要素に対してはNoneを設定
+            if x != None and x in intersection_keys:
+                out.append(y)
             else:
-                for s in intersection_keys:
-                    found = False
-                    if s == x:
-                        out.append(y); found = True
-                        break;
-                if not found:
-                    out.append(None)
+                out.append(None) # マッチしなかった要素に対してはNoneを設定
         
         return CommandList(out)
 
@@ -1381,18 +1814,13 @@ class CommandList:
 
         diff_keys = {x for x in exclude_element(set(matches_target) - set(matches_filter), None)}
 
+        # キー項目の存在確認は集合のハッシュ検索(O(1))で行い、出力順は元コマンド列の順序に従う
         out = []
         for x, y in zip(matches_target, self):
-            if x == None:        # 
-                out.append(None) # マッチしなかった要素に対してはNoneを設定
+            if x != None and x in diff_keys:
+                out.append(y)
             else:
-                found = False
-                for s in diff_keys:
-                    if s == x:
-                        out.append(y); found = True
-                        break;
-                if not found:
-                    out.append(None) # マッチしなかった要素に対してはNoneを設定
+                out.append(None) # マッチしなかった要素に対してはNoneを設定
                 
         return CommandList(out), CommandList(target_err)
 
@@ -1553,6 +1981,25 @@ class CommandLevelList(CommandList):
                                 [level for cmd, level in self.iter() if level["level"] == self.lv])
     
 
+    def sort_by_line_number(self)-> 'CommandLevelList':
+        '''コマンド行番号(整数)をキーとして要素を昇順に整列し、CommandLevelListとして返す
+        引数:なし
+        戻り値: dataおよびlevelsを同一の順序で並べ替えた新規インスタンス(lvは引き継ぐ)
+
+        差分処理(集合演算)の結果の出力順を実行毎に同一とする(出力のバイト一致を保証する)ために使用する
+        行番号を持たない要素(タイトル行等)はキー0として扱い、安定ソートにより相対順序を維持する
+        例:
+        levels : [{"level":"1","line_number":12,..}, {"level":"1","line_number":3,..},]
+        data   : ["cmd12",                           "cmd3",                         ]
+           ↓
+        levels : [{"level":"1","line_number":3,..},  {"level":"1","line_number":12,..},]
+        data   : ["cmd3",                            "cmd12",                         ]
+        '''
+        pairs = sorted(zip(self.data, self.levels), key=lambda x: x[1].get("line_number", 0))
+
+        return CommandLevelList([cmd for cmd, _ in pairs], [lv for _, lv in pairs], lv = self.lv)
+
+
     def extract_ip_matched_line(self, filter: 'CommandLevelList', \
                                 ptn: int = 1)-> 'CommandLevelList':
         '''target側/filter側コマンドそれぞれ指定されたレベルと合致するコマンド要素をipaddress形式で取り出し、
@@ -1563,8 +2010,9 @@ class CommandLevelList(CommandList):
         cll = self.specify_commandlevellist()
         rtn = super(CommandLevelList, cll).extract_ip_matched_line(filter.specify_commandlevellist(), \
                                                                  ptn = ptn)
+        # rtn.dataはレベル指定要素(cll)と同一indexで対応するため、levelsもcll側を参照する
         return CommandLevelList([cmd for cmd in rtn.data if cmd != None], \
-                                [lv for cmd, lv in zip(rtn.data, self.levels) if cmd != None])
+                                [lv for cmd, lv in zip(rtn.data, cll.levels) if cmd != None]).sort_by_line_number()
 
 
     def compare_commandlines(self, filter: 'CommandLevelList', ptn: int = 1) \
@@ -1617,18 +2065,25 @@ class CommandLevelList(CommandList):
                 lv_new["span-list"] = self.renew_span_range(lv_new["span-list"], len(e[0])) 
                 levels_out.append(lv_new) 
 
+        # rtn.dataはレベル指定要素(cll)と同一indexで対応するため、levelsもcll側を参照する
         return CommandLevelList([cmd for cmd in rtn.data if cmd != None], \
-                                [lv for cmd, lv in zip(rtn.data, self.levels) if cmd != None]), \
-               CommandLevelList(err_out, levels_out)
+                                [lv for cmd, lv in zip(rtn.data, cll.levels) if cmd != None]).sort_by_line_number(), \
+               CommandLevelList(err_out, levels_out).sort_by_line_number()
 
 
-    def add_networkinfo(self)-> 'CommandLevelList':
+    def add_networkinfo(self, networks: dict = None)-> 'CommandLevelList':
         '''レベル指定要素を取り出し、patternで特定されたネットワーク情報をコマンド行頭に付加した情報と、
         自インスタンスのlevels情報内のspan情報を更新した情報を返す
+        引数:
+        networks : {行番号: "A.B.C.D/nn"形式のネットワーク, ...}(IF表等で求めたもの、含まれない行はエラーとする)
+                   省略時は各コマンドからcalculate_networksで求める
         '''
         
         cll = self.specify_commandlevellist() # レベル指定要素の取り出し(CommandLevelList型)
-        networks, err_out = cll.calculate_networks()  # ipaddressのリストとstrのリスト
+        if networks is None:
+            networks, err_out = cll.calculate_networks()  # ipaddressのリストとstrのリスト
+        else:
+            networks = [networks.get(level.get("line_number")) for level in cll.levels]
 
         L = []
         levels_new = []
@@ -1649,6 +2104,57 @@ class CommandLevelList(CommandList):
         return CommandLevelList(L, levels_new, lv = self.lv)
 
 
+    def add_prefix_list_info(self, prefix_lists: dict)-> 'CommandLevelList':
+        '''レベル指定要素を取り出し、コマンドから求めたネットワークをコンパイル済みの経路フィルタで評価した結果を
+        コマンド行頭に付加した情報と、span情報を更新した情報を返す
+        引数:
+        prefix_lists : {リスト名称: PrefixList, ...}(compile_prefix_listsの戻り値)
+        戻り値:
+        評価結果を付加したCommandLevelList
+        いずれかの経路フィルタで許可(permit)された場合は最初に許可したリスト名称とエントリを、
+        許可されなかった場合は拒否したエントリ(暗黙のdenyの場合はその旨)を付加する
+        付加部分には"atype":"PL"のspanを挿入し、拒否の場合は"error"に拒否理由を設定する(エラー表示用ハイライト)
+
+        例:
+        入力 : ["ip route 10.1.1.0/24 100.100.8.2", "ip route 10.3.0.0/24 100.100.50.1",]
+        戻り値 :
+        ["vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 10 permit : ip route 10.1.1.0/24 100.100.8.2",
+         "暗黙のdeny : ip route 10.3.0.0/24 100.100.50.1",]
+        '''
+        cll = self.specify_commandlevellist() # レベル指定要素の取り出し(CommandLevelList型)
+        networks, _ = cll.calculate_networks()  # ネットワークのリスト(取得できない要素はNone)
+
+        # 経路フィルタ毎に一括評価(同一経路の重複評価なし)
+        routes = [network for network in networks if network != None]
+        results = {name: pl.match_batch(routes) for name, pl in prefix_lists.items()}
+
+        L = []; levels_new = []; k = 0
+        for network, line, level in zip(networks, cll.data, cll.levels):
+            if network == None:
+                label = "エラー : "; error = "ValueError"
+            else:
+                entries = [results[name][k] for name in prefix_lists]; k += 1
+                permitted = [e for e in entries if e is not None and e.action == "permit"]
+                denied = [e for e in entries if e is not None and e.action == "deny"]
+                if permitted != []:
+                    e = permitted[0]; label = "{} seq {} {} : ".format(e.name, e.seq, e.action); error = None
+                elif denied != []:
+                    e = denied[0]; label = "{} seq {} {} : ".format(e.name, e.seq, e.action); error = "deny"
+                else:
+                    label = "暗黙のdeny : "; error = "deny"
+
+            L.append(label + line)
+            level_new = level.copy()
+            if "span-list" in level:
+                span_list = self.renew_span_range(level["span-list"], len(label))
+                level_new["span-list"] = self.insert_span({"atype":"PL", "error":error, "span":(0, len(label) - 3)},
+                                                          span_list) if span_list != [] else \
+                                         [{"atype":"PL", "error":error, "span":(0, len(label) - 3)}]
+            levels_new.append(level_new)
+
+        return CommandLevelList(L, levels_new, lv = self.lv)
+
+
     def search_command_info(self, ptn: int, pattern: str or 're.Pattern' = "", strict:bool = True)-> 'CommandLevelList':
         '''self.data(コマンド列)に含まれる文字列を入力された比較対象またはパターンを用いget_span_infoメソッドで検索し、
         求めたspan情報をself.levels情報に挿入し新規インスタンスとして返す。
@@ -1866,6 +2372,11 @@ class CommandLevelList(CommandList):
         args[1]のインスタンス確認で比較対象に使用するre.PatternクラスはPython3.7以降で有効
         
         罫線素片の挿入時、span情報のstart/stopインデックスが変わるため、挿入のたびにspanlistの更新を行う
+
+        リンク先の検索:
+        第1階層(args[0])・第3階層(args[2])の元情報はキー→ブロック(要素列)の辞書を処理の最初に一度だけ作成し、
+        ルート情報・第2階層の各要素からは辞書引きでリンク先を求める(元情報の全件走査を繰り返さない)
+        出力済みの行・キーの判定には集合を用いる。計算量は各入力の行数の和に比例する
         '''
 
         char_mid  = BOX_DRAWINGS_LIGHT_VERTICAL_AND_RIGHT # "├"(細線素片左)
@@ -1905,14 +2416,31 @@ class CommandLevelList(CommandList):
             cll_pl   = args[2]
             pattern2 = args[3]
                 
-        out, levels_out, done = [], [], []
-        done1 = [] # 2段目要素の重複チェック用
+        out, levels_out, done = [], [], set()
+        done1 = set() # 2段目要素の重複チェック用
+
+        # 第1階層の元情報(二次元リスト)の各ブロック先頭行をpattern1で一度だけ検索し、
+        # キー→(ブロック番号, Match)の対応を作成する(同じキーのブロックが複数ある場合は最初のもの)
+        blocks1 = {}
+        for i in range(len(two_dim_data1)):
+            m1 = re.search(pattern1, two_dim_data1[i][0])
+            if m1 is not None and m1.group(1) not in blocks1:
+                blocks1[m1.group(1)] = (i, m1)
+
+        if ptn == 2:
+            # 第3階層の元情報をpattern2で一度だけ検索し、キー→[(コマンド, span情報, levels要素), ...]の対応を作成する
+            blocks3 = {}
+            span3_list = CommandList(cll_pl.data).get_span_info(ptn = 3, pattern = pattern2)
+            for (cmd, lv), sp3 in zip(cll_pl.iter(), span3_list):
+                if sp3 != ():
+                    blocks3.setdefault(sp3[0]["key"], []).append((cmd, sp3[0], lv))
+            span3_last = span3_list[-1] if span3_list != [] else ()
 
         span_list = self.get_span_info(ptn = 3, pattern = pattern1)
 
         for (line, level), sp in zip(self.iter(), span_list):
             if line in done: continue  # 一度出力したデータは出力しない
-            else: done.append(line)
+            else: done.add(line)
             
             if sp != (): 
                 # (例:ptn=1) ip access-group vSAMPLE-TEST-...
@@ -1922,180 +2450,174 @@ class CommandLevelList(CommandList):
                 level["span-list"] = self.insert_span(sp[0], level["span-list"]) # 最初のspan要素のみを挿入
                 levels_out.append(level) # 追加
 
-                for i in range(len(two_dim_data1)):
-                        
-                    m1 = re.search(pattern1, two_dim_data1[i][0])
-                    if m1 is None: continue  # 次のfor処理へ
-                    if sp[0]["key"] != m1.group(1): continue
-                    if m1.group(1) in done1: continue # ptn=1,2いずれも同じキー項目が再度出現した場合は2つ目以降処理しない
-                    else: done1.append(m1.group(1))
+                # ptn=1,2いずれも同じキー項目が再度出現した場合は2つ目以降処理しない
+                if sp[0]["key"] not in blocks1 or sp[0]["key"] in done1: continue
+                done1.add(sp[0]["key"])
+                i, m1 = blocks1[sp[0]["key"]]
 
-                    # span情報の作成・挿入(二次元リスト側-本メソッドが作る階層構造データではないほう-を更新)
-                    span1 = {"atype":"KEY", "error":None, "span":m1.span(1), "key":m1.group(1),} 
-                    two_dim_levels[i][0]["span-list"] = self.insert_span(span1, two_dim_levels[i][0]["span-list"])
+                # span情報の作成・挿入(二次元リスト側-本メソッドが作る階層構造データではないほう-を更新)
+                span1 = {"atype":"KEY", "error":None, "span":m1.span(1), "key":m1.group(1),} 
+                two_dim_levels[i][0]["span-list"] = self.insert_span(span1, two_dim_levels[i][0]["span-list"])
 
-                    if ptn == 1:
+                if ptn == 1:
 
-                        if len(two_dim_data1[i]) > 2:
-                            for j in range(1, len(two_dim_data1[i])): # 2層目の1番目から最後までの要素で反復
+                    if len(two_dim_data1[i]) > 2:
+                        for j in range(1, len(two_dim_data1[i])): # 2層目の1番目から最後までの要素で反復
 
-                                d = two_dim_levels[i][j].copy() # 辞書の複写    
+                            d = two_dim_levels[i][j].copy() # 辞書の複写    
 
-                                if j != len(two_dim_data1[i])-1:
-                                    # (例) ├ 10 permit ip ...
-                                    out.append(char_mid + b + two_dim_data1[i][j])
-                                    d["span-list"] = self.renew_span_range(d["span-list"], len(char_mid + b))
-                                else:
-                                    # (例) └ 20 permit ip ...
-                                    out.append(char_last + b + two_dim_data1[i][-1])
-                                    d["span-list"] = self.renew_span_range(d["span-list"], len(char_last + b))
-                               
-                                levels_out.append(d)
+                            if j != len(two_dim_data1[i])-1:
+                                # (例) ├ 10 permit ip ...
+                                out.append(char_mid + b + two_dim_data1[i][j])
+                                d["span-list"] = self.renew_span_range(d["span-list"], len(char_mid + b))
+                            else:
+                                # (例) └ 20 permit ip ...
+                                out.append(char_last + b + two_dim_data1[i][-1])
+                                d["span-list"] = self.renew_span_range(d["span-list"], len(char_last + b))
+                           
+                            levels_out.append(d)
 
-                        break # 一つ内側のfor反復を抜け最も外側のfor反復に戻る(次のルート情報「ip access group...」の処理を実行) 
 
-                    if ptn == 2:
-                
-                        # (例) └ route-map vSAMPLE-001-TEST-LB-STATIC-TO-BGP-MAP...
-                        out.append(char_last + b + two_dim_data1[i][0])
+                if ptn == 2:
+            
+                    # (例) └ route-map vSAMPLE-001-TEST-LB-STATIC-TO-BGP-MAP...
+                    out.append(char_last + b + two_dim_data1[i][0])
+
+                    d = two_dim_levels[i][0].copy() 
+                    d["span-list"] = self.renew_span_range(d["span-list"], len(char_last + b))
+                    levels_out.append(d)
+                 
+                    if len(two_dim_data1[i]) == 1: continue
+                        
+                    # 2層目の1番目以降、最後までの要素をスライスし、m2_workリストに積む
+                    # (match ip address...の要素列)
+                    m2_work = two_dim_data1[i][1:]
+                    m2_work_level = two_dim_levels[i][1:]
+                        
+                    if len(m2_work) == 0: continue
 
-                        d = two_dim_levels[i][0].copy() 
-                        d["span-list"] = self.renew_span_range(d["span-list"], len(char_last + b))
-                        levels_out.append(d)
-                     
-                        if len(two_dim_data1[i]) == 1: continue
-                            
-                        # 2層目の1番目以降、最後までの要素をスライスし、m2_workリストに積む
-                        # (match ip address...の要素列)
-                        m2_work = two_dim_data1[i][1:]
-                        m2_work_level = two_dim_levels[i][1:]
-                            
-                        if len(m2_work) == 0: continue
+                    def proceed_last_block(end=False)-> None:
+                        ''' 最終段(第3段目)の作成処理
+                        
+                        入力: end-True/False:第2段目の最終要素/最終以外
+                             (pattern2, cll_plについては主処理側の変数を関数内から参照)
+                        戻り値: 無し
+
+                        処理内容:
+                        1. 第2段目(例 match ip address...要素列)の要素のキー情報(.*?-TO-BGP-PL)と
+                        一致するものを第3段目の要素として抜き出し、ワーク用リストに積む
+                        2. 第2と第3段目のリンク結合を行う
+                        
+                        第2段目の最終要素にリンク結合させる処理と、最終以外の要素にリンクさせる処理(別ルートにおける類似内容)を共通化する
+                        '''                   
 
-                        def proceed_last_block(end=False)-> None:
-                            ''' 最終段(第3段目)の作成処理
-                            
-                            入力: end-True/False:第2段目の最終要素/最終以外
-                                 (pattern2, cll_plについては主処理側の変数を関数内から参照)
-                            戻り値: 無し
+                        # ワーク域初期化(list) - いずれもm3のキャプチャ要素がNone以外、かつm2のキャプチャ結果と等しい場合に設定
+                        m3_work = [] # 第3段目コマンド列格納用
+                        m3_list = [] # pattern2を使用したキャプチャ結果のMatch格納用
+                        m3_work_level = [] # コマンド列に対応するLevels要素格納用
 
+                        def set_span3(length, end=False)-> None:
+                            ''' 最終段(第3段目)のspan情報処理
+                        
+                            入力: end-True/False(bool): 最終段(第3段目)における最終要素/最終以外
+                                  len(int)            : spanの延長数
+                            戻り値: 無し
+                        
                             処理内容:
-                            1. 第2段目(例 match ip address...要素列)の要素のキー情報(.*?-TO-BGP-PL)と
-                            一致するものを第3段目の要素として抜き出し、ワーク用リストに積む
-                            2. 第2と第3段目のリンク結合を行う
-                            
-                            第2段目の最終要素にリンク結合させる処理と、最終以外の要素にリンクさせる処理(別ルートにおける類似内容)を共通化する
-                            '''                   
-
-                            # ワーク域初期化(list) - いずれもm3のキャプチャ要素がNone以外、かつm2のキャプチャ結果と等しい場合に設定
-                            m3_work = [] # 第3段目コマンド列格納用
-                            m3_list = [] # pattern2を使用したキャプチャ結果のMatch格納用
-                            m3_work_level = [] # コマンド列に対応するLevels要素格納用
-
-                            def set_span3(length, end=False)-> None:
-                                ''' 最終段(第3段目)のspan情報処理
-                            
-                                入力: end-True/False(bool): 最終段(第3段目)における最終要素/最終以外
-                                      len(int)            : spanの延長数
-                                戻り値: 無し
+                            第3段目(例 ip prefix-list...要素列)について、階層表示に積む要素のspan情報を更新し、
+                            合わせて、元要素(二次元情報側=>本メソッドの階層表示ではない方)のspan情報も更新する   
+                            '''
+                            if end != True:
+                                span3 = m3_list[k]; d = m3_work_level[k].copy() 
+                            else:
+                                span3 = m3_list[-1]; d = m3_work_level[-1].copy()
                             
-                                処理内容:
-                                第3段目(例 ip prefix-list...要素列)について、階層表示に積む要素のspan情報を更新し、
-                                合わせて、元要素(二次元情報側=>本メソッドの階層表示ではない方)のspan情報も更新する   
-                                '''
-                                if end != True:
-                                    span3 = m3_list[k]; d = m3_work_level[k].copy() 
-                                else:
-                                    span3 = m3_list[-1]; d = m3_work_level[-1].copy()
-                                
-                                _ = self.insert_span(span3, d["span-list"])
-                                d["span-list"] = self.renew_span_range(_, length)
-                                levels_out.append(d)
+                            _ = self.insert_span(span3, d["span-list"])
+                            d["span-list"] = self.renew_span_range(_, length)
+                            levels_out.append(d)
 
-                                # ip prefix-list...の元要素                      
-                                if end != True:
-                                    m3_work_level[k]["span-list"] = self.insert_span(span3, m3_work_level[k]["span-list"])
-                                else:
-                                    m3_work_level[-1]["span-list"] = self.insert_span(span3, m3_work_level[-1]["span-list"])
-
-                            span3_list = CommandList(cll_pl.data).get_span_info(ptn = 3, pattern = pattern2)
-                            for (cmd, lv), sp3 in zip(cll_pl.iter(), span3_list):
-                                if sp3 != ():
-                                    if sp3[0]["key"] == sp2[0]["key"]:
-                                        m3_work.append(cmd); m3_list.append(sp3[0]); m3_work_level.append(lv)
-
-                            if m3_work != []:
-                                if end != True:
-                                    # 最終段が存在する(m3_work != [])ため、リンク元(match ip address...)のspan情報を挿入(二次元情報側)
-                                    # コマンド自体はメイン処理で追加済み(out.append(...))                           
-                                    m2_work_level[j]["span-list"] = self.insert_span(sp3[0], m2_work_level[j]["span-list"])
-
-                                    for k in range(len(m3_work)):
-                                        if k != len(m3_work)-1:
-                                            # (例) │ ├ ip prefix-list vSAMPLE-001-...
-                                            out.append(s + char_cont + b + char_mid + b + m3_work[k]) # 「左端から」の相対位置分を加算
-                                            set_span3(len(s + char_cont + b + char_mid + b), end=False) 
-                                        else:
-                                            # (例) │ └ ip prefix-list vSAMPLE-001-...
-                                            out.append(s + char_cont + b + char_last + b + m3_work[-1])
-                                            set_span3(len(s + char_cont + b + char_last + b), end=True) 
+                            # ip prefix-list...の元要素                      
+                            if end != True:
+                                m3_work_level[k]["span-list"] = self.insert_span(span3, m3_work_level[k]["span-list"])
+                            else:
+                                m3_work_level[-1]["span-list"] = self.insert_span(span3, m3_work_level[-1]["span-list"])
+
+                        for cmd, span3, lv in blocks3.get(sp2[0]["key"], []):
+                            m3_work.append(cmd); m3_list.append(dict(span3)); m3_work_level.append(lv)
+                        sp3 = span3_last # リンク元へ挿入するspan情報(従来どおり第3階層の元情報の最終要素のもの)
+
+                        if m3_work != []:
+                            if end != True:
+                                # 最終段が存在する(m3_work != [])ため、リンク元(match ip address...)のspan情報を挿入(二次元情報側)
+                                # コマンド自体はメイン処理で追加済み(out.append(...))                           
+                                m2_work_level[j]["span-list"] = self.insert_span(sp3[0], m2_work_level[j]["span-list"])
+
+                                for k in range(len(m3_work)):
+                                    if k != len(m3_work)-1:
+                                        # (例) │ ├ ip prefix-list vSAMPLE-001-...
+                                        out.append(s + char_cont + b + char_mid + b + m3_work[k]) # 「左端から」の相対位置分を加算
+                                        set_span3(len(s + char_cont + b + char_mid + b), end=False) 
+                                    else:
+                                        # (例) │ └ ip prefix-list vSAMPLE-001-...
+                                        out.append(s + char_cont + b + char_last + b + m3_work[-1])
+                                        set_span3(len(s + char_cont + b + char_last + b), end=True) 
 
-                                else:
-                                    m2_work_level[-1]["span-list"] = self.insert_span(sp3[0], m2_work_level[-1]["span-list"])
-
-                                    for k in range(len(m3_work)):
-                                        if k != len(m3_work)-1:                        
-                                            # (例)  ├ ip prefix-list vSAMPLE-001-...
-                                            out.append(ss + char_mid + b + m3_work[k])
-                                            set_span3(len(ss + char_mid + b), end=False) 
-                                        else:
-                                            # (例) └ ip prefix-list vSAMPLE-001-...
-                                            out.append(ss + char_last + b + m3_work[-1])
-                                            set_span3(len(ss + char_last + b), end=True) 
-
-                        span2_list = CommandList(m2_work).get_span_info(ptn = 3, pattern = pattern2)
-                        for j, sp2 in zip(range(len(m2_work)), span2_list):
-                            d = m2_work_level[j].copy()
-
-                            if j != len(m2_work)-1: # 第2段目の最終要素かどうかの判定
-                                # (例) ├ match ip address prefix-list vSAMPLE-001-...
-                                out.append(s + char_mid + b + m2_work[j])
-                                d["span-list"] = self.renew_span_range(d["span-list"], len(s + char_mid + b))
                             else:
-                                # (例) └ match ip address prefix-list vSAMPLE-001-TEST-...
-                                out.append(s + char_last + b + m2_work[j])
-                                d["span-list"] = self.renew_span_range(d["span-list"], len(s + char_last + b))
-                            levels_out.append(d)
+                                m2_work_level[-1]["span-list"] = self.insert_span(sp3[0], m2_work_level[-1]["span-list"])
 
-                            if sp2 != ():                                 
-                                # match ip addressに対応する(直前で追加した)levels要素にm2.span情報をinsert                                
-                                # 既にlevels_outに追加しspanレンジも更新しているため、前回の更新分を個別に加算
-                                d = levels_out[-1]
+                                for k in range(len(m3_work)):
+                                    if k != len(m3_work)-1:                        
+                                        # (例)  ├ ip prefix-list vSAMPLE-001-...
+                                        out.append(ss + char_mid + b + m3_work[k])
+                                        set_span3(len(ss + char_mid + b), end=False) 
+                                    else:
+                                        # (例) └ ip prefix-list vSAMPLE-001-...
+                                        out.append(ss + char_last + b + m3_work[-1])
+                                        set_span3(len(ss + char_last + b), end=True) 
+
+                    span2_list = CommandList(m2_work).get_span_info(ptn = 3, pattern = pattern2)
+                    for j, sp2 in zip(range(len(m2_work)), span2_list):
+                        d = m2_work_level[j].copy()
+
+                        if j != len(m2_work)-1: # 第2段目の最終要素かどうかの判定
+                            # (例) ├ match ip address prefix-list vSAMPLE-001-...
+                            out.append(s + char_mid + b + m2_work[j])
+                            d["span-list"] = self.renew_span_range(d["span-list"], len(s + char_mid + b))
+                        else:
+                            # (例) └ match ip address prefix-list vSAMPLE-001-TEST-...
+                            out.append(s + char_last + b + m2_work[j])
+                            d["span-list"] = self.renew_span_range(d["span-list"], len(s + char_last + b))
+                        levels_out.append(d)
 
-                                if j != len(m2_work)-1:                                
-                                    sp2[0]["span"] = tuple((list(sp2[0]["span"])[0]+len(s + char_mid + b),
-                                                           (list(sp2[0]["span"])[1]+len(s + char_mid + b))
-                                                          ))
-                                else:
-                                    sp2[0]["span"] = tuple((list(sp2[0]["span"])[0]+len(s + char_last + b),
-                                                           (list(sp2[0]["span"])[1]+len(s + char_last + b))
-                                                          ))
-                                d["span-list"] = self.insert_span(sp2[0], d["span-list"])
-                                levels_out[-1] = d
-
-                                if j != len(m2_work)-1:
-                                    # 以下"ip prefix-list..のコマンド行処理のための共通関数
-                                    #  ├ match ip address prefix-list vSAMPLE-002-...
-                                    #  │ ├ ip prefix-list vSAMPLE-002-... 
-                                    #   ...
-                                    proceed_last_block(False)   
-                                else:
-                                    # 以下"ip prefix-list..のコマンド行処理のための共通関数
-                                    #  └ match ip address prefix-list vSAMPLE-002-...
-                                    #    ├ ip prefix-list vSAMPLE-002-... 
-                                    #   ...
-                                    proceed_last_block(True)  
-                                        
+                        if sp2 != ():                                 
+                            # match ip addressに対応する(直前で追加した)levels要素にm2.span情報をinsert                                
+                            # 既にlevels_outに追加しspanレンジも更新しているため、前回の更新分を個別に加算
+                            d = levels_out[-1]
+
+                            if j != len(m2_work)-1:                                
+                                sp2[0]["span"] = tuple((list(sp2[0]["span"])[0]+len(s + char_mid + b),
+                                                       (list(sp2[0]["span"])[1]+len(s + char_mid + b))
+                                                      ))
+                            else:
+                                sp2[0]["span"] = tuple((list(sp2[0]["span"])[0]+len(s + char_last + b),
+                                                       (list(sp2[0]["span"])[1]+len(s + char_last + b))
+                                                      ))
+                            d["span-list"] = self.insert_span(sp2[0], d["span-list"])
+                            levels_out[-1] = d
+
+                            if j != len(m2_work)-1:
+                                # 以下"ip prefix-list..のコマンド行処理のための共通関数
+                                #  ├ match ip address prefix-list vSAMPLE-002-...
+                                #  │ ├ ip prefix-list vSAMPLE-002-... 
+                                #   ...
+                                proceed_last_block(False)   
+                            else:
+                                # 以下"ip prefix-list..のコマンド行処理のための共通関数
+                                #  └ match ip address prefix-list vSAMPLE-002-...
+                                #    ├ ip prefix-list vSAMPLE-002-... 
+                                #   ...
+                                proceed_last_block(True)  
+                                    
         # levelsのすべての要素を"level":"1"に設定(insert_empty_stringで改行設定をさせない)
         return CommandLevelList(CommandLevelList(out, levels_out).renew_level(lv = "1").data, \
                                 CommandLevelList(out, levels_out).renew_level(lv = "1").levels, lv = "1")
@@ -2619,21 +3141,18 @@ class Base(CommandLevelList):
         '''
         if self.ptn != 3:
             m1 = self.matches_to_pattern(self.ptn)[0]  
-            diff = set(self.matches_to_pattern(self.ptn)[0]) - \
-                   set(cll2.matches_to_pattern(self.ptn)[0])
+            diff = set(m1) - set(cll2.matches_to_pattern(self.ptn)[0])
         else:
             m1 = self.matches_to_pattern(self.ptn, pattern = self.pattern)[0]
-            diff = set(self.matches_to_pattern(self.ptn, pattern = self.pattern)[0]) - \
-                   set(cll2.matches_to_pattern(self.ptn, pattern = self.pattern)[0])
+            diff = set(m1) - set(cll2.matches_to_pattern(self.ptn, pattern = self.pattern)[0])
     
         out = []; out_level = []
         for x, y, lv in zip(m1, self.data, self.levels):
-            for s in diff:
-                if s == x:
-                    out.append(y)
-                    out_level.append(lv)
-        # 現在のインスタンスが属するクラスのインスタンス
-        return self.__class__(CommandLevelList(out, out_level))
+            if x in diff:  # 集合のハッシュ検索(O(1))
+                out.append(y)
+                out_level.append(lv)
+        # 現在のインスタンスが属するクラスのインスタンス(行番号の昇順に整列)
+        return self.__class__(CommandLevelList(out, out_level).sort_by_line_number())
 
     
     def to_cll(self)-> 'CommandLevelList':        
@@ -2673,21 +3192,18 @@ class CommandListString(Base):
 
         if self.ptn != 3: # 3のはずなので冗長処理
             m1 = self.matches_to_pattern(self.ptn)[0]
-            diff = set(self.matches_to_pattern(self.ptn)[0]) - \
-                   set(cll.matches_to_pattern(self.ptn)[0])
+            diff = set(m1) - set(cll.matches_to_pattern(self.ptn)[0])
         else:
             m1 = self.matches_to_pattern(self.ptn, pattern = self.pattern)[0] 
-            diff = set(self.matches_to_pattern(self.ptn, pattern = self.pattern)[0]) - \
-                   set(cll.matches_to_pattern(self.ptn, pattern = self.pattern)[0])
+            diff = set(m1) - set(cll.matches_to_pattern(self.ptn, pattern = self.pattern)[0])
 
         out = []; out_level = []
         for x, y, lv in zip(m1, self.data, self.levels):
-            for s in diff:
-                if s == x:
-                    out.append(y)
-                    out_level.append(lv)
+            if x in diff:  # 集合のハッシュ検索(O(1))
+                out.append(y)
+                out_level.append(lv)
                     
-        return CommandListString(CommandLevelList(out, out_level), self.pattern)  
+        return CommandListString(CommandLevelList(out, out_level).sort_by_line_number(), self.pattern)  
 
 
 
@@ -2713,80 +3229,1084 @@ BOX_DRAWINGS_HEAVY_UP_AND_RIGHT       = chr(0x2517) # "┗"(太線素片左下)
 BOX_DRAWINGS_HEAVY_VERTICAL           = chr(0x2503) # "┃"(縦太線素片)
 
 
-# 出力タイトル定義
+# 他の要望番号からも参照する区分(#要望番号-番号)の抽出
+# 出力用の編集(search_command_info等)前の抽出結果とし、参照する側では変更しない
+section_scans = {
+    # ダミーStaticルート(宛先が/32でかつ出力IFが「EthernetX/X.XXX」のもの)
+    "6-1": Scan(pattern_ip_route_ipv4addr_slash32_EthernetXXXX),
+    # WAN-IF(interface EthernetX/X.XXX配下のip address)
+    "7-1": Scan(pattern_interface_EthernetXXXX, pattern_ip_address, Lv=2),
+}
+
+
+# 要望番号毎の検査仕様
 # 形式
+# {要望番号: CheckSpec(検査関数,
+#                      [出力タイトル定義(区分1), 出力タイトル定義(区分2), ...],
+#                      {抽出名称: Scan(検索パターン, ..., Lv=, ptn=, sections=(抽出結果を使用する区分の番号, ...)), ...}),
+#  ...}
+# 出力タイトル定義の形式
 # "kind"  : s/n-標準版出力/preview版出力
 # "print" : p/n-標準出力(コンソール)への出力をする/しない
 # "title" : 出力タイトル文字列
-# {
-#   "1" : ({"kind" : 's', "print" : 'p', "title" : [表示タイトル-1.1, 表示タイトル-1.2]},
-#        {"kind" : 's', "print" : 'p', "title" : [表示タイトル-2.1, 表示タイトル-2.2]},..
-#        
-#        {"kind" : 'n', "print" : 'p', "title" : [備考タイトル-1]},..
-#        {"kind" : 'n', "print" : 'n', "title" : [備考タイトル-2]},
-#       ),
-#   "2" : ({"kind" : 's', "print" : 'p', "title" : [表示タイトル-1]},
-#        {"kind" : 's', "print" : 'p', "title" : [表示タイトル-2]},..
-#        
-#        {"kind" : 'n', "print" : 'n', "title" : [備考タイトル-1]},
-#        {"kind" : 'n', "print" : 'n', "title" : [備考タイトル-2]},..
-#       ),
-# }
-title_dict_for_each_reqno = \
-{'1': [{'kind': 's', 'print' : 'p', 'title': ['(1)ACLと受信用経路フィルタ突合', '●ACL']},
-  {'kind': 's', 'print' : 'p', 'title': ['●受信経路フィルタ']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●エラーコマンドの表示']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●受信経路フィルタで許可されている対向側アドレスがACLに含まれているか', 'ACLに含まれていない受信経路コマンド']}],
- '2': [{'kind': 's', 'print' : 'p', 
-   'title': ['(2)Staticルートと「StaticルートをBGPに再配送するための経路フィルタ」突合', '●Staticルート']},
-  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●a)Staticルート:#2-1で取得', '  b)WAN向けStaticルート：#7-1で取得', '  c)デフォルトルート：0.0.0.0/0', '  d)ダミースタティックルート：#6-1で取得', ' →a) - b) -c) -d)を表示']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']}],
- '3': [{'kind': 's', 'print' : 'p', 
-   'title': ['(3)「StaticルートをBGPに再配送するための経路フィルタ」と「StaticルートをBGPに再配送するためのルートマップ」突合', '●StaticルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するためのルートマップ']}],
- '4': [{'kind': 's', 'print' : 'p', 
-   'title': ['(4)Directルート(LAN-IF設定)と「DirectルートをBGPに再配送するための経路フィルタ」突合', '●Directルート(LAN-IF設定)']},
-  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●Directルート(LAN-IF設定)のアドレス情報よりネットワークアドレスを特定し先頭に付加']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']}],
- '5': [{'kind': 's', 'print' : 'p', 
-   'title': ['(5)「StaticルートをBGPに再配送するための経路フィルタ」「DirectルートをBGPに再配送するための経路フィルタ」と経路広告用フィルタ突合', '●StaticルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●経路広告用フィルタ']}],
- '6': [{'kind': 's', 'print' : 'p', 
-   'title': ['(6)ダミーSaticルートと、ダミーStaticルートに適用するBFD設定と、ダミーStaticルートを条件とするTrack設定突合', '●ダミーStaticルート(宛先が/32でかつ出力IFが「EthernetX/X.XXX」のもの)']},
-  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートに適用するBFD設定の候補']},
-  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートを条件とするTrack設定の候補']},
-  {'kind': 's', 'print' : 'p', 
-   'title': ['●ダミーStaticルートに適用するBFD設定でGWアドレスがダミーStaticルートと同一のもの']},
-  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートを条件とするTrack設定']}],
- '7': [{'kind': 's', 'print' : 'p', 'title': ['(7)WAN-IFアドレスと、BGPネイバー設定の突合', '●WAN-IF']},
-  {'kind': 's', 'print' : 'p', 'title': ['●BGPネイバー設定']}],
- '8': [{'kind': 's', 'print' : 'p', 'title': ['(8)LoopbackIFと、BGPルータIDの突合', '●LoopbackIF']},
-  {'kind': 's', 'print' : 'p', 'title': ['●BGPルータID']}],
- '9': [{'kind': 's', 'print' : 'p', 'title': ['(9)WAN-IF設定「interface EthernetXX.<Sub-IF番号>」と、WAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合']}],
- '10': [{'kind': 's', 'print' : 'p', 'title': ['(10)LAN-IF(Port-Channel IF)の「interface port-channelXX.<Sub-IF番号>」と、LAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合']}],
- '11': [{'kind': 's', 'print' : 'p', 'title': ['(11)「DirectルートをBGPに再配送するための経路フィルタ」と、「DirectルートをBGPに再配送するためのルートマップ」の突合', '●DirectルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するためのルートマップ']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']}],
- '14': [{'kind': 's', 'print' : 'p', 
-   'title': ['(14)BGP設定、Static/DirectルートをBGPに再配送するためのルートマップ、経路フィルタの突合', '●BGP設定(Static)']},
-  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するためのルートマップ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●BGP設定(Direct)']},
-  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するためのルートマップ']},
-  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示(Static)']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示(Direct)']}],
- '15': [{'kind': 's', 'print' : 'p', 
-   'title': ['(15)ACL設定と、それに紐付くリストとの突合', '●ip access-group設定']},
-  {'kind': 's', 'print' : 'p', 'title': ['●ACL設定']},
-  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示']}],
+# 例
+#   {"kind" : 's', "print" : 'p', "title" : [表示タイトル-1.1, 表示タイトル-1.2]},
+#   {"kind" : 'n', "print" : 'n', "title" : [備考タイトル-1]},
+# 抽出(Scan)は実行前にplan_scansで全要望番号分を集め、同一の抽出を除いて一度ずつ実行する
+check_specs = {
+ 1: CheckSpec(check_acl_and_in_prefix_list,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(1)ACLと受信用経路フィルタ突合', '●ACL']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●受信経路フィルタ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●エラーコマンドの表示']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●受信経路フィルタで許可されている対向側アドレスがACLに含まれているか', 'ACLに含まれていない受信経路コマンド']}],
+                 {"acl": Scan(pattern_ip_access_list, pattern_seqno, Lv=2),
+                  "in_pl": Scan(pattern_ip_prefix_list_IN_PL),
+                 }),
+ 2: CheckSpec(check_static_routes_and_prefix_list,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(2)Staticルートと「StaticルートをBGPに再配送するための経路フィルタ」突合', '●Staticルート']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●a)Staticルート:#2-1で取得', '  b)WAN向けStaticルート：#7-1で取得', '  c)デフォルトルート：0.0.0.0/0', '  d)ダミースタティックルート：#6-1で取得', ' →a) - b) -c) -d)を表示']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●経路フィルタの評価結果(a) - b) -c) -d)の各経路を許可/拒否したエントリ)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●VRF毎の突合差分(VRF名称 : 同一VRF内で対応するエントリが無いStaticルート/経路フィルタ)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●Staticルートの重複・同一宛先で転送先の異なるルート(括弧内は先行ルートの行番号)']}],
+                 {"static": Scan(pattern_vrf_context, pattern_ip_route_ipv4addr, Lv=2, ptn=2),
+                  "static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "7-1": section_scans["7-1"].used_by(3, 4, 5, 6, 7),
+                  "6-1": section_scans["6-1"].used_by(3, 4, 5, 6, 7),
+                  "redistribute": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_redistribute_static,
+                                       Lv=2, ptn=2, sections=(6,)),
+                  "route_map": Scan(pattern_route_map_STATIC_TO_BGP_MAP, pattern_match_ip_address, Lv=2, sections=(6,)),
+                 }),
+ 3: CheckSpec(check_static_prefix_list_and_route_map,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(3)「StaticルートをBGPに再配送するための経路フィルタ」と「StaticルートをBGPに再配送するためのルートマップ」突合', '●StaticルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するためのルートマップ']}],
+                 {"static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "route_map": Scan(pattern_route_map_STATIC_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                 }),
+ 4: CheckSpec(check_direct_routes_and_prefix_list,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(4)Directルート(LAN-IF設定)と「DirectルートをBGPに再配送するための経路フィルタ」突合', '●Directルート(LAN-IF設定)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●Directルート(LAN-IF設定)のアドレス情報よりネットワークアドレスを特定し先頭に付加']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●経路フィルタの評価結果(Directルートのネットワークを許可/拒否したエントリ)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●VRF毎の突合差分(VRF名称 : 同一VRF内で対応するエントリが無いLAN-IF/経路フィルタ)']}],
+                 {"direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                  "redistribute": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_redistribute_direct,
+                                       Lv=2, ptn=2, sections=(6,)),
+                  "route_map": Scan(pattern_route_map_DIRECT_TO_BGP_MAP, pattern_match_ip_address, Lv=2, sections=(6,)),
+                 }),
+ 5: CheckSpec(check_redistribution_and_out_prefix_list,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(5)「StaticルートをBGPに再配送するための経路フィルタ」「DirectルートをBGPに再配送するための経路フィルタ」と経路広告用フィルタ突合', '●StaticルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●経路広告用フィルタ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●経路広告用フィルタに含まれない再配送用経路フィルタのエントリ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●再配送用経路フィルタのいずれとも重ならない経路広告用フィルタのエントリ']}],
+                 {"static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                  "out_pl": Scan(pattern_ip_prefix_list_OUT_PL),
+                 }),
+ 6: CheckSpec(check_dummy_static_routes,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(6)ダミーSaticルートと、ダミーStaticルートに適用するBFD設定と、ダミーStaticルートを条件とするTrack設定突合', '●ダミーStaticルート(宛先が/32でかつ出力IFが「EthernetX/X.XXX」のもの)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートに適用するBFD設定の候補']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートを条件とするTrack設定の候補']},
+                  {'kind': 's', 'print' : 'p',
+                   'title': ['●ダミーStaticルートに適用するBFD設定でGWアドレスがダミーStaticルートと同一のもの']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●ダミーStaticルートを条件とするTrack設定']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●BFD設定またはTrack設定の無いダミーStaticルート']}],
+                 {"6-1": section_scans["6-1"],
+                  "bfd": Scan(pattern_ip_route_static_bfd_EthernetXXXX),
+                  "track": Scan(pattern_track_reachability),
+                  "static": Scan(pattern_vrf_context, pattern_ip_route_ipv4addr, Lv=2, ptn=2, sections=(6,)),
+                 }),
+ 7: CheckSpec(check_wan_interfaces_and_neighbors,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(7)WAN-IFアドレスと、BGPネイバー設定の突合', '●WAN-IF']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●BGPネイバー設定']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●VRF毎の突合差分(VRF名称 : 同一VRFのWAN-IFに含まれないネイバー/ネイバーを含まないWAN-IF)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●BGPネイバーの接続IF(VRF名称 : 接続IFとサブネット)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●Staticルートのネクストホップの接続IF(VRF名称 : 接続IFとサブネット)']}],
+                 {"7-1": section_scans["7-1"],
+                  "neighbors": Scan(pattern_router_bgp_asno, pattern_neighbor, Lv=2, ptn=2),
+                  "vrf_neighbors": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_neighbor,
+                                        Lv=2, ptn=2, sections=(3, 4)),
+                 }),
+ 8: CheckSpec(check_loopback_and_router_id,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(8)LoopbackIFと、BGPルータIDの突合', '●LoopbackIF']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●BGPルータID']}],
+                 {"router_id": Scan(pattern_router_bgp_asno, pattern_router_id_ipv4addr, Lv=2, ptn=2),
+                 }),
+ 9: CheckSpec(check_subinterface_vlan_numbers,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(9)WAN-IF設定「interface EthernetXX.<Sub-IF番号>」と、WAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●Sub-IF番号とVLAN番号の突合結果(VLAN相違/VLAN重複/encapsulation無し)']}],
+                 {"subinterfaces": Scan(pattern_interface_EthernetXXXX, pattern_encapsulation_dot1q, Lv=2)}),
+ 10: CheckSpec(check_subinterface_vlan_numbers,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(10)LAN-IF(Port-Channel IF)の「interface port-channelXX.<Sub-IF番号>」と、LAN-IFで指定する「encapsulation dot1q <VLAN番号>」の突合']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●Sub-IF番号とVLAN番号の突合結果(VLAN相違/VLAN重複/encapsulation無し)']}],
+                 {"subinterfaces": Scan(pattern_interface_port_channel, pattern_encapsulation_dot1q, Lv=2)}),
+ 11: CheckSpec(check_direct_prefix_list_and_route_map,
+                 [{'kind': 's', 'print' : 'p', 'title': ['(11)「DirectルートをBGPに再配送するための経路フィルタ」と、「DirectルートをBGPに再配送するためのルートマップ」の突合', '●DirectルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するためのルートマップ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●突合差分']}],
+                 {"direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                  "route_map": Scan(pattern_route_map_DIRECT_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                 }),
+ 14: CheckSpec(check_redistribution_hierarchy,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(14)BGP設定、Static/DirectルートをBGPに再配送するためのルートマップ、経路フィルタの突合', '●BGP設定(Static)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するためのルートマップ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●StaticルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●BGP設定(Direct)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するためのルートマップ']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●DirectルートをBGPに再配送するための経路フィルタ']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示(Static)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示(Direct)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●再配送シミュレーション結果(VRF毎にBGPへ再配送される経路)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●参照関係の表示(redistribute→ルートマップ→経路フィルタ、Static/Direct共通)']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●再配送シミュレーション結果と経路広告用フィルタの突合(広告されない再配送経路・再配送経路にマッチしない経路広告用フィルタのエントリ)']}],
+                 {"static_bgp": Scan(pattern_router_bgp_asno, pattern_vrf_LB_VRF, pattern_redistribute_static, Lv=2, ptn=2),
+                  "static_map": Scan(pattern_route_map_STATIC_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                  "static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "direct_bgp": Scan(pattern_router_bgp_asno, pattern_vrf_LB_VRF, pattern_redistribute_direct, Lv=2, ptn=2),
+                  "static_vrf_bgp": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_redistribute_static,
+                                         Lv=2, ptn=2, sections=(9, 11)),
+                  "direct_vrf_bgp": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_redistribute_direct,
+                                         Lv=2, ptn=2, sections=(9, 11)),
+                  "direct_map": Scan(pattern_route_map_DIRECT_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                  "direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                  "static": Scan(pattern_vrf_context, pattern_ip_route_ipv4addr, Lv=2, ptn=2, sections=(9, 11)),
+                  "lan": Scan(pattern_interface_port_channel, pattern_vrf_member, pattern_ip_address, Lv=2, sections=(9, 11)),
+                  "out_pl": Scan(pattern_ip_prefix_list_OUT_PL, sections=(11,)),
+                 }),
+ 15: CheckSpec(check_access_groups,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(15)ACL設定と、それに紐付くリストとの突合', '●ip access-group設定']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●ACL設定']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●階層構造の表示']},
+                  {'kind': 'n', 'print' : 'p', 'title': ['●試験フローのACL評価結果(送信元 -> 宛先 : 最初にマッチしたエントリ)']}],
+                 {"acl": Scan(pattern_ip_access_list, pattern_seqno, Lv=2),
+                 }),
+ 16: CheckSpec(check_prefix_list_redundancy,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(16)経路フィルタの重複・冗長エントリ確認', '●経路フィルタ(受信用/Static・Direct再配送用/経路広告用)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●重複・冗長エントリ(seq重複/重複/包含 : 原因エントリの行番号とseq番号)']}],
+                 {"in_pl": Scan(pattern_ip_prefix_list_IN_PL),
+                  "static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                  "out_pl": Scan(pattern_ip_prefix_list_OUT_PL),
+                 }),
+ 17: CheckSpec(check_interface_address_conflicts,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(17)IFアドレスの重複・サブネット重なり確認', '●IFアドレス設定(WAN-IF/LAN-IF/LoopbackIF)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●アドレス重複・サブネット重なり(同一VRF内、括弧内は先行IFとその行番号)']}],
+                 {"wan": Scan(pattern_interface_EthernetXXXX, pattern_vrf_member, pattern_ip_address, Lv=2),
+                  "lan": Scan(pattern_interface_port_channel, pattern_vrf_member, pattern_ip_address, Lv=2),
+                  "loopback": Scan(pattern_interface_loopbackseqno, pattern_vrf_member, pattern_ip_address, Lv=2),
+                 }),
+ 18: CheckSpec(check_object_references,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(18)ACL・経路フィルタ・ルートマップの未参照定義・未定義参照の確認', '●参照されていない定義(ACL/再配送用経路フィルタ/再配送用ルートマップ)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●定義の無い参照(ip access-group/match ip address/redistribute)']}],
+                 {"acl": Scan(pattern_ip_access_list, pattern_seqno, Lv=2),
+                  "access_group": Scan(pattern_ip_access_group),
+                  "static_redistribute": Scan(pattern_redistribute_static),
+                  "static_map": Scan(pattern_route_map_STATIC_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                  "static_pl": Scan(pattern_ip_prefix_list_STATIC_TO_BGP_PL),
+                  "direct_redistribute": Scan(pattern_redistribute_direct),
+                  "direct_map": Scan(pattern_route_map_DIRECT_TO_BGP_MAP, pattern_match_ip_address, Lv=2),
+                  "direct_pl": Scan(pattern_ip_prefix_list_DIRECT_TO_BGP_PL),
+                 }),
+ 19: CheckSpec(check_neighbor_policies,
+                 [{'kind': 's', 'print' : 'p',
+                   'title': ['(19)BGPネイバーのポリシー(ルートマップ・経路フィルタ)の確認', '●ネイバー毎のポリシー(neighbor→route-map/prefix-list→match→ip prefix-list)']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●定義の無いポリシーの参照']},
+                  {'kind': 's', 'print' : 'p', 'title': ['●使用されていないルートマップ・経路フィルタ(ネイバー・再配送・table-map等・ルートマップのいずれからも参照無し)']}],
+                 {"neighbors": Scan(pattern_router_bgp_asno, pattern_neighbor, pattern_neighbor_policy, Lv=2, ptn=2),
+                  "vrf_neighbors": Scan(pattern_router_bgp_asno, pattern_vrf_bgp, pattern_neighbor, Lv=2, ptn=2),
+                  "route_map": Scan(pattern_route_map, pattern_match_ip_address, Lv=2),
+                  "prefix_list": Scan(pattern_ip_prefix_list),
+                  "route_map_references": Scan(pattern_route_map_reference),
+                 }),
 }
 
 
 
+def labeled_cll(rows: list, atype: str)-> 'CommandLevelList':
+    '''(付加文字列, エラー種別, コマンド, levels情報)のリストを、付加文字列を行頭に付加したCommandLevelListに変換し
+    行番号の昇順で返す
+    付加文字列は' : 'で終わるものとし、' : 'を除く部分に指定atypeのspanを挿入し"error"にエラー種別を設定する
+    元のspan情報は付加した文字数分ずらして引き継ぐ
+    例: ("重複(34行目) : ", "duplicate", "ip route 10.2.0.0/24 100.100.8.2", {...})
+        -> "重複(34行目) : ip route 10.2.0.0/24 100.100.8.2"
+    '''
+    out = []; levels = []
+    for label, error, cmd, lv in rows:
+        out.append(label + cmd)
+        level = {"level":"1"}
+        if "line_number" in lv:
+            level["line_number"] = lv["line_number"]
+        level["span-list"] = [{"atype":atype, "error":error, "span":(0, len(label) - 3)}] + \
+                             CommandLevelList.renew_span_range(lv.get("span-list", []), len(label))
+        levels.append(level)
+    return CommandLevelList(out, levels, lv = "1").sort_by_line_number()
+
+
+def static_route_table_info(table: 'StaticRouteTable', cll: 'CommandLevelList')-> 'CommandLevelList':
+    '''Staticルート表から、宛先・転送先とも同一のルート(重複)と、同一宛先で転送先の異なるルートを出力用に編集し返す
+    引数:
+    table : StaticRouteTable(build_static_route_tableの戻り値)
+    cll   : 出力対象のStaticルートのCommandLevelList(cllに含まれる行のルートのみを対象とし、行番号からコマンドとspan情報を引き継ぐ)
+    戻り値:
+    例: '重複(37行目) : ip route 10.2.0.0/24 100.100.8.2'
+        '転送先相違(35行目) : ip route 10.1.5.0/24 100.100.8.6'
+    '''
+    rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cll.iter() if "line_number" in lv}
+    table = table.subset(rows)
+    out = [("重複({}行目) : ".format(first.line_number), "duplicate") + rows[route.line_number]
+           for route, first in table.duplicates()]
+    out.extend(("転送先相違({}行目) : ".format(first.line_number), "shadowed") + rows[route.line_number]
+               for route, first in table.shadowed())
+    return labeled_cll(out, "SR")
+
+
+def dummy_route_info(table: 'StaticRouteTable', cll: 'CommandLevelList')-> 'CommandLevelList':
+    '''BFD設定・Track設定の無いダミーStaticルートを出力用に編集し返す
+    引数:
+    table : StaticRouteTable(build_static_route_tableの戻り値)
+    cll   : 出力対象のStaticルートのCommandLevelList(cllに含まれる行のルートのみを対象とする)
+    戻り値:
+    例: 'BFD無し : ip route 100.105.225.197/32 Ethernet1/2.200 100.100.8.6'
+    '''
+    rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cll.iter() if "line_number" in lv}
+    out = []
+    # ダミーStaticルートの判定は#6-1の抽出と同じ正規表現で行う
+    for route, has_bfd, has_track in table.subset(rows).dummy_routes_without(pattern_ip_route_ipv4addr_slash32_EthernetXXXX):
+        label = "BFD・Track無し : " if not (has_bfd or has_track) else ("BFD無し : " if not has_bfd else "Track無し : ")
+        out.append((label, "missing") + rows[route.line_number])
+    return labeled_cll(out, "SR")
+
+
+def interface_conflict_info(cll: 'CommandLevelList', table: 'InterfaceTable')-> 'CommandLevelList':
+    '''IF表のIFアドレスについて、同一VRF内のアドレス重複とサブネットの重なりを出力用に編集し返す
+    引数:
+    cll   : IF設定(interface/vrf member/ip address)のCommandLevelList(出力行として使用)
+    table : IF表(InterfaceTable)
+    戻り値:
+    例: 'Ethernet1/1.100 : サブネット重なり(Ethernet1/3.300 100.100.8.0/29 60行目) : ip address 100.100.8.1/30'
+        'Ethernet1/4.400 : アドレス重複(Ethernet1/1.100 50行目) : ip address 100.100.8.1/30'
+    '''
+    rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cll.iter() if "line_number" in lv}
+    duplicates, overlaps = find_address_conflicts(
+        [a for a in InterfaceTable.addresses(table.select(*interface_patterns)) if a.line_number in rows])
+
+    out = [("{} : アドレス重複({} {}行目) : ".format(a.interface, b.interface, b.line_number), "duplicate")
+           + rows[a.line_number] for a, b in duplicates]
+    out.extend(("{} : サブネット重なり({} {} {}行目) : ".format(a.interface, b.interface, b.prefix(), b.line_number),
+                "overlap") + rows[a.line_number] for a, b in overlaps)
+    return labeled_cll(out, "IF")
+
+
+def prefix_list_redundancy_info(cll: 'CommandLevelList')-> 'CommandLevelList':
+    '''経路フィルタをリスト名称毎にまとめ(コンパイル)、重複・冗長なエントリを出力用に編集し返す
+    引数:
+    cll : 経路フィルタ(ip prefix-list)のCommandLevelList
+    戻り値:
+    検出種別と原因エントリ(行番号/seq番号)を行頭に付加したCommandLevelList(行番号の昇順)
+    例: 'seq重複(14行目 seq 30) : ip prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 30 permit 10.2.0.0/24'
+        '包含(11行目 seq 10) : ip prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 20 permit 10.1.5.0/24'
+    付加部分には"atype":"PL"のspanを挿入し、"error"に検出種別を設定する
+    '''
+    labels = {"seq":"seq重複", "duplicate":"重複", "covered":"包含"}
+    rows = {lv["line_number"]: (cmd, lv) for cmd, lv in cll.iter() if "line_number" in lv}
+    pls = compile_prefix_lists([rows[n][0] for n in rows], list(rows))
+
+    out = []
+    for pl in pls.values():
+        for kind, entry, cause in pl.redundant_entries():
+            label = "{}({}行目 seq {}) : ".format(labels[kind], cause.line_number, cause.seq)
+            out.append((label, kind) + rows[entry.line_number])
+
+    return labeled_cll(out, "PL")
+
+
+def compare_prefix_list_coverage(redistributions: tuple, advertisement: 'CommandLevelList')-> ('CommandLevelList', 'CommandLevelList'):
+    '''再配送用経路フィルタと経路広告用フィルタの各permitエントリのアドレス範囲を整数区間に変換し、
+    整列と線形走査で結合した区間どうしを比較する
+    引数:
+    redistributions : 再配送用経路フィルタ(STATIC/DIRECT-TO-BGP-PL)のCommandLevelListのタプル
+    advertisement   : 経路広告用フィルタ(OUT-PL)のCommandLevelList
+    戻り値(タプル):
+    1. 経路広告用フィルタの区間に含まれない(広告されない)再配送用経路フィルタのエントリ
+    2. 再配送用経路フィルタの区間のいずれとも重ならない(何も広告しない)経路広告用フィルタのエントリ
+    いずれも元のlevels情報(行番号・span)を引き継ぎ、行番号の昇順に並べる
+
+    備考
+    比較はアドレス範囲(プレフィックスが占める区間)で行い、ge/leによるプレフィックス長の条件は考慮しない
+    denyエントリ、解析できないエントリは比較対象外とする
+    区間の結合はO(n log n)、各エントリの判定は二分探索によりO(log n)
+    '''
+    def permit_entries(cll: 'CommandLevelList')-> list:
+        out = []
+        for cmd, lv in cll.iter():
+            if lv["level"] != cll.lv: continue
+            entry = PrefixListEntry.from_command(cmd)
+            if entry is not None and entry.action == "permit":
+                out.append((cmd, lv, entry.interval()))
+        return out
+
+    redistributed = []
+    for cll in redistributions:
+        redistributed.extend(permit_entries(cll))
+    advertised = permit_entries(advertisement)
+
+    advertised_set = IntervalSet([iv for _, _, iv in advertised])
+    redistributed_set = IntervalSet([iv for _, _, iv in redistributed])
+
+    uncovered = [(cmd, lv) for cmd, lv, iv in redistributed if not advertised_set.covers(iv)]
+    unused = [(cmd, lv) for cmd, lv, iv in advertised if not redistributed_set.intersects(iv)]
+
+    return CommandLevelList([x[0] for x in uncovered], [x[1] for x in uncovered], lv = "1").sort_by_line_number(), \
+           CommandLevelList([x[0] for x in unused], [x[1] for x in unused], lv = "1").sort_by_line_number()
+
+
+def redistribution_result(bgps: tuple, maps: tuple, pls: tuple,
+                          static_routes: 'CommandLevelList', interfaces: 'CommandLevelList')-> dict:
+    '''BGPへの再配送をシミュレーションし、VRF毎に再配送される経路を返す
+    引数:
+    bgps          : BGP設定(router bgp/vrf/redistribute)のCommandLevelListのタプル
+    maps          : 再配送用ルートマップ(route-map/match ip address)のCommandLevelListのタプル
+    pls           : 再配送用経路フィルタ(ip prefix-list)のCommandLevelListのタプル
+    static_routes : Staticルート(vrf context/ip route)のCommandLevelList
+    interfaces    : LAN-IF(interface port-channel/vrf member/ip address)のCommandLevelList
+    戻り値:
+    {VRF名称: [再配送経路(dict), ...], ...}(simulate_redistributionの戻り値)
+
+    各route-map・経路フィルタは一度だけコンパイルし、(VRF, プロトコル)毎の経路を一括評価する
+    '''
+    def line_numbers(cll: 'CommandLevelList')-> list:
+        return [lv["line_number"] for lv in cll.levels]
+
+    redistributions = []; commands = []; numbers = []
+    for cll in bgps:
+        redistributions.extend(parse_redistributions(cll.data, line_numbers(cll)))
+    for cll in maps:
+        commands.extend(cll.data); numbers.extend(line_numbers(cll))
+    route_maps = compile_route_maps(commands, numbers)
+    commands = []; numbers = []
+    for cll in pls:
+        commands.extend(cll.data); numbers.extend(line_numbers(cll))
+    prefix_lists = compile_prefix_lists(commands, numbers)
+
+    # (VRF, プロトコル)毎の経路の作成
+    routes = {}
+    vrf = "default"
+    for cmd, lv in static_routes.iter():
+        m = re.search(pattern_vrf_context, cmd)
+        if m:
+            vrf = cmd[m.end():].split()[0] if cmd[m.end():].split() != [] else "default"; continue
+        m = re.search(r'^ip\s{1}route\s{1}(\S+)', cmd)
+        if m:
+            try:
+                route_to_int(m.group(1))
+            except ValueError: # 解析できない経路(オクテットが255を超える等)は評価対象外
+                continue
+            routes.setdefault((vrf, "static"), []).append((m.group(1), lv["line_number"]))
+
+    vrf = "default"
+    for cmd, lv in interfaces.iter():
+        if lv["level"] == "1":
+            vrf = "default"; continue
+        m = re.search(pattern_vrf_member, cmd)
+        if m:
+            vrf = cmd[m.end():].strip(); continue
+        network, _ = CommandList([cmd]).calculate_networks()
+        if network[0] != None:
+            routes.setdefault((vrf, "direct"), []).append((network[0], lv["line_number"]))
+
+    return simulate_redistribution(redistributions, routes, route_maps, prefix_lists)
+
+
+def simulate_redistribution_info(result: dict)-> 'CommandLevelList':
+    '''再配送シミュレーション結果を、VRF毎に再配送される経路として出力用に編集し返す
+    引数:
+    result : {VRF名称: [再配送経路(dict), ...], ...}(redistribution_resultの戻り値)
+    戻り値:
+    VRF毎(出現順)、経路の昇順に再配送経路を格納したCommandLevelList
+    例: 'vSAMPLE-001-LB-VRF : static : 10.1.1.0/24 (vSAMPLE-001-TEST-STATIC-TO-BGP-MAP seq 10)'
+    行番号には再配送される経路の元コマンド(ip route/ip address)の行番号を設定する
+    '''
+    out = []; levels = []
+    for vrf, redistributed in result.items():
+        for r in redistributed:
+            head = "{} : {} : ".format(vrf, r["protocol"])
+            out.append(head + "{} ({} seq {})".format(r["route"], r["route_map"], r["seq"]))
+            levels.append({"level":"1", "line_number":r["line_number"],
+                           "span-list":[{"atype":"N4", "error":None, "span":(len(head), len(head + r["route"]))}]})
+
+    return CommandLevelList(out, levels, lv = "1")
+
+
+def redistribution_advertisement_info(result: dict, advertisement: 'CommandLevelList',
+                                      routes: tuple)-> 'CommandLevelList':
+    '''VRF毎の再配送経路の集合と経路広告用フィルタ(-OUT-PL)の差分を出力用に編集し返す
+    引数:
+    result        : {VRF名称: [再配送経路(dict), ...], ...}(redistribution_resultの戻り値)
+    advertisement : 経路広告用フィルタ(ip prefix-list ...-OUT-PL)のCommandLevelList
+    routes        : 再配送経路の元コマンドを含むCommandLevelList(Staticルート, LAN-IF)のタプル
+    戻り値:
+    検出種別を行頭に付加したCommandLevelList(行番号の昇順)
+    例: 'vSAMPLE-001-LB-VRF : 広告されない再配送経路(static 10.2.0.0/24) : ip route 10.2.0.0/24 100.100.8.2'
+        '再配送経路にマッチしない経路広告用フィルタ : ip prefix-list vSAMPLE-001-TEST-OUT-PL seq 30 permit 172.16.0.0/12 le 32'
+    再配送経路の集合はredistributed_prefixes、差分はdiff_advertisementにより求める
+    '''
+    rows = {lv["line_number"]: (cmd, lv) for cll in routes + (advertisement,) for cmd, lv in cll.iter() if "line_number" in lv}
+    pls = compile_prefix_lists(advertisement.data, [lv.get("line_number") for lv in advertisement.levels])
+    unadvertised, unused = diff_advertisement(redistributed_prefixes(result), pls)
+
+    out = []
+    for vrf, redistributed in result.items():
+        for r in redistributed:
+            if (r["network"], r["length"]) in unadvertised[vrf] and r["line_number"] in rows:
+                label = "{} : 広告されない再配送経路({} {}) : ".format(vrf, r["protocol"], r["route"])
+                out.append((label, "unadvertised") + rows[r["line_number"]])
+    out.extend(("再配送経路にマッチしない経路広告用フィルタ : ", "unused") + rows[entry.line_number]
+               for entry in unused if entry.line_number in rows)
+    return labeled_cll(out, "PL")
+
+
+def reference_tree_cll(items)-> 'CommandLevelList':
+    '''ReferenceGraph.walk/walk_roots の出力を罫線素片付きのCommandLevelListに変換する
+    引数: items - (branches, コマンド, levels要素, Match)の反復可能オブジェクト
+    戻り値: 階層の深さに応じて罫線素片を行頭に付加したCommandLevelList
+    例:
+    redistribute static route-map vSAMPLE-001-TEST-STATIC-TO-BGP-MAP
+    └ route-map vSAMPLE-001-TEST-STATIC-TO-BGP-MAP permit 10
+      └ match ip address prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL
+        ├ ip prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 10 permit 10.1.0.0/16 le 32
+        └ ip prefix-list vSAMPLE-001-TEST-STATIC-TO-BGP-PL seq 20 permit 10.1.5.0/24
+
+    参照元の行には参照先の名称のspan(atype "KEY")を挿入する。元のlevels要素は変更しない
+    最上位(branchesが空)の行のlevelを"1"、それ以外を"2"とする(insert_empty_stringで木毎に空行を挿入させる)
+    '''
+    char_mid  = BOX_DRAWINGS_LIGHT_VERTICAL_AND_RIGHT # "├"
+    char_last = BOX_DRAWINGS_LIGHT_UP_AND_RIGHT       # "└"
+    char_cont = BOX_DRAWINGS_LIGHT_VERTICAL           # "│"
+    b         = SPACE                                 # 罫線素片とその次の文字の間に挿入する文字
+
+    out = []; levels = []
+    for branches, cmd, lv, m in items:
+        prefix = "".join(SPACE + b if last else char_cont + b for last in branches[:-1])
+        if branches != ():
+            prefix += (char_last if branches[-1] else char_mid) + b
+
+        span_list = lv.get("span-list", [])
+        if m is not None:
+            span_list = CommandLevelList.insert_span({"atype":"KEY", "error":None, "span":m.span(1), "key":m.group(1),},
+                                                     span_list)
+        level = {"level":"1" if branches == () else "2"}
+        if "line_number" in lv:
+            level["line_number"] = lv["line_number"]
+        level["span-list"] = CommandLevelList.renew_span_range(span_list, len(prefix))
+
+        out.append(prefix + cmd); levels.append(level)
+
+    return CommandLevelList(out, levels, lv = "1")
+
+
+def redistribution_graph(bgps: tuple, maps: tuple, pls: tuple)-> 'ReferenceGraph':
+    '''再配送(redistribute)→ルートマップ→経路フィルタの参照グラフ(Static/Direct共通)を作成する
+    引数:
+    bgps : BGP設定(router bgp/vrf/redistribute)のCommandLevelListのタプル(Static, Direct)
+    maps : 再配送用ルートマップ(route-map/match ip address)のCommandLevelListのタプル(Static, Direct)
+    pls  : 再配送用経路フィルタ(ip prefix-list)のCommandLevelListのタプル(Static, Direct)
+    戻り値: ReferenceGraph(節点の種別は"route-map"/"prefix-list"、redistributeの行をルートとする)
+    名称のキャプチャにはmake_hierachyと同じパターン(pattern_STATIC_TO_BGP_MAP等)を使用する
+    '''
+    patterns = ((pattern_STATIC_TO_BGP_MAP, pattern_STATIC_TO_BGP_PL),
+                (pattern_DIRECT_TO_BGP_MAP, pattern_DIRECT_TO_BGP_PL))
+
+    graph = ReferenceGraph()
+    for (p_map, p_pl), cll_map, cll_pl in zip(patterns, maps, pls):
+        graph.add_definitions("route-map", cll_map.data, cll_map.levels, p_map)
+        graph.add_definitions("prefix-list", cll_pl.data, cll_pl.levels, p_pl)
+    for (p_map, p_pl), cll_bgp in zip(patterns, bgps):
+        graph.add_references("prefix-list", p_pl, ("route-map",))
+        graph.add_roots("route-map", cll_bgp.data, cll_bgp.levels, p_map)
+    return graph
+
+
+def config_object_graph(acls: 'CommandLevelList', groups: 'CommandLevelList', redistributions: list)-> 'ReferenceGraph':
+    '''ACL・再配送用ルートマップ・再配送用経路フィルタとその参照元から成る参照グラフを作成する
+    引数: acls            - ACLの抽出結果(pattern_ip_access_list, pattern_seqno, Lv=2)
+          groups          - ip access-groupの抽出結果
+          redistributions - Static・Direct(この順)毎の[redistribute, 再配送用ルートマップ(Lv=2), 再配送用経路フィルタ]の
+                            抽出結果のリスト
+    戻り値: ReferenceGraph(節点の種別は"access-list"/"route-map"/"prefix-list")
+    参照元はip access-group(→ACL)、redistribute(→ルートマップ)、match ip address(ルートマップ配下→経路フィルタ)
+    名称のキャプチャにはmake_hierachyと同じパターン(pattern_IN_ACL、pattern_STATIC_TO_BGP_MAP等)を使用するため、
+    名称が"-IN-ACL"/"-TO-BGP-MAP"/"-TO-BGP-PL"で終わるもののみが対象となる
+    '''
+    graph = ReferenceGraph()
+
+    graph.add_definitions("access-list", acls.data, acls.levels, pattern_IN_ACL)
+    graph.add_roots("access-list", groups.data, groups.levels, pattern_IN_ACL)
+
+    for (redistribution, maps, pls), p_map, p_pl in zip(redistributions,
+            (pattern_STATIC_TO_BGP_MAP, pattern_DIRECT_TO_BGP_MAP), (pattern_STATIC_TO_BGP_PL, pattern_DIRECT_TO_BGP_PL)):
+        graph.add_definitions("route-map", maps.data, maps.levels, p_map)
+        graph.add_definitions("prefix-list", pls.data, pls.levels, p_pl)
+        graph.add_roots("route-map", redistribution.data, redistribution.levels, p_map)
+
+    for p_pl in (pattern_STATIC_TO_BGP_PL, pattern_DIRECT_TO_BGP_PL):
+        graph.add_references("prefix-list", p_pl, ("route-map",))
+
+    return graph
+
+
+def reference_check_info(graph: 'ReferenceGraph', kinds: tuple = None)-> ('CommandLevelList', 'CommandLevelList'):
+    '''参照グラフから参照されていない定義と、定義の無い参照を出力用に編集し返す
+    引数: graph - config_object_graph/neighbor_policy_graphの戻り値
+          kinds - 参照されていない定義の確認対象とする節点の種別のタプル(省略時は全種別)
+    戻り値(タプル):
+    1. 参照されていない定義(各定義の一行目)
+       例: '未参照(ルートマップ) : route-map vSAMPLE-009-TEST-DIRECT-TO-BGP-MAP permit 10'
+    2. 定義の無い参照(参照元の行)
+       例: '未定義(経路フィルタ) : match ip address prefix-list vSAMPLE-009-TEST-DIRECT-TO-BGP-PL'
+    いずれも行番号の昇順。節点・参照の集合の差で求める
+    '''
+    labels = {"access-list":"ACL", "prefix-list":"経路フィルタ", "route-map":"ルートマップ"}
+
+    unreferenced = [("未参照({}) : ".format(labels[key[0]]), "unreferenced") + graph.nodes[key][0][0]
+                    for key in graph.unreferenced(kinds)]
+    undefined = [("未定義({}) : ".format(labels[key[0]]), "undefined", cmd, lv)
+                 for key, _, cmd, lv in graph.undefined()]
+
+    return labeled_cll(unreferenced, "REF"), labeled_cll(undefined, "REF")
+
+
+def neighbor_policy_graph(bgp: 'CommandLevelList', vrf_neighbors: 'CommandLevelList', maps: 'CommandLevelList',
+                          pls: 'CommandLevelList', references: 'CommandLevelList')-> 'ReferenceGraph':
+    '''BGPネイバーとそのポリシー(route-map/prefix-list ... in/out)、ルートマップ、経路フィルタから成る参照グラフを作成する
+    引数: bgp           - router bgp配下のneighborとポリシー適用行の抽出結果
+                          (pattern_router_bgp_asno, pattern_neighbor, pattern_neighbor_policy, Lv=2, ptn=2)
+          vrf_neighbors - router bgp配下のvrfとneighborの抽出結果
+                          (pattern_router_bgp_asno, pattern_vrf_bgp, pattern_neighbor, Lv=2, ptn=2)
+          maps          - 全ルートマップの抽出結果(pattern_route_map, pattern_match_ip_address, Lv=2)
+          pls           - 全経路フィルタの抽出結果(pattern_ip_prefix_list)
+          references    - ルートマップの参照元の抽出結果(pattern_route_map_reference)
+    戻り値: ReferenceGraph(節点の種別は"neighbor"/"route-map"/"prefix-list"、名称を問わない)
+    参照元はneighbor配下のroute-map/prefix-list ... in/out、ルートマップ配下のmatch ip address prefix-list、
+    およびredistribute/table-map/default-information originate等の... route-map/xxx-map(ルート)とする
+    neighborの節点の名称は(VRF名称, アドレス)とする(異なるVRFの同一アドレスのneighborは別の節点とする)
+    '''
+    graph = ReferenceGraph()
+
+    # neighborの行番号毎の所属VRF(router bgp配下でvrfの行が現れた以降はそのVRF名称、それ以外はDEFAULT_VRF)
+    index = index_by_vrf(vrf_neighbors.data, vrf_neighbors.levels, lambda cmd: True)
+    vrfs = {lv.get("line_number"): vrf for vrf in index.vrfs() for _, lv in index.rows(vrf, True)}
+
+    # router bgp配下のneighborとポリシー適用行を、neighborを一行目(level "1")とするブロックに組み替える
+    commands = []; levels = []; scopes = []
+    for cmd, lv in bgp.iter():
+        if lv["level"] == "1": continue  # router bgp
+        level = lv.copy(); level["level"] = "1" if re.search(pattern_neighbor, cmd) else "2"
+        commands.append(cmd); levels.append(level); scopes.append(vrfs.get(lv.get("line_number"), DEFAULT_VRF))
+    graph.add_definitions("neighbor", commands, levels, pattern_NEIGHBOR_NAME, scopes)
+
+    graph.add_definitions("route-map", maps.data, maps.levels, pattern_ROUTE_MAP_NAME)
+    graph.add_definitions("prefix-list", pls.data, pls.levels, pattern_PREFIX_LIST_NAME)
+
+    graph.add_references("route-map", pattern_NEIGHBOR_ROUTE_MAP, ("neighbor",))
+    graph.add_references("prefix-list", pattern_NEIGHBOR_PREFIX_LIST, ("neighbor",))
+    graph.add_references("prefix-list", pattern_MATCH_PREFIX_LIST, ("route-map",))
+
+    # 再配送・table-map等で使用しているルートマップを未使用としないためのルート
+    graph.add_roots("route-map", references.data, references.levels, pattern_REFERENCE_ROUTE_MAP)
+
+    return graph
+
+
+def network_key(cmd: str)-> (int, int) or None:
+    '''コマンドに含まれるIPv4ネットワークを(ネットワークアドレス(int), プレフィックス長(int))で返す
+    VrfIndexのキーとして使用する。ネットワークを取得できない場合はNoneを返す
+    例: "ip address 192.168.16.1/28" -> (3232239616, 28)
+    '''
+    networks, _ = CommandList([cmd]).calculate_networks()
+    return route_to_int(networks[0]) if networks[0] != None else None
+
+
+def neighbor_key(cmd: str)-> (int, int) or None:
+    ''''neighbor A.B.C.D'コマンドのネイバーアドレスを(アドレス(int), 32)で返す(VrfIndexのキー、取得できない場合はNone) '''
+    m = re.search(r'^neighbor\s{1}([0-9.]+)(?:\s|$)', cmd)
+    try:
+        return route_to_int(m.group(1)) if m else None
+    except ValueError:
+        return None
+
+
+def route_row(commands: list, route: 'StaticRoute')-> tuple:
+    '''Staticルート表のルートを、#7-5の出力行(コマンド, levels要素)に変換する
+    (find_matching_line_for_each_config_level(pattern_vrf_context, pattern_ip_route_ipv4addr, Lv=2, ptn=2)の抽出結果に
+    search_command_info(ptn=1)を適用したものと同じ形式)
+    '''
+    cmd = commands[route.line_number - 1]
+    cll = CommandLevelList([cmd], [matched_level(cmd, route.line_number, pattern_ip_route_ipv4addr, "2")], lv = "2")
+    return next(cll.search_command_info(ptn=1).iter())
+
+
+# IFアドレスの重複確認・接続IFの解決の対象とするIF(WAN-IF・LAN-IF・LoopbackIF)の設定一行目
+interface_patterns = (pattern_interface_EthernetXXXX, pattern_interface_port_channel, pattern_interface_loopbackseqno)
+
+# 設定ファイル全体から作成した表(IF表・Staticルート表)の作成済みのもの
+# {作成関数: (直近の入力コマンド列, それから作成した表)}
+config_tables = {}
+
+# 入力コマンド列の各行が字下げの無い行(設定一行目)かどうか
+# (直近の入力コマンド列, [bool, ...] または None(字下げの情報が無い場合))
+config_top_levels = (None, None)
+
+
+def top_level_flags(lines: list)-> list or None:
+    '''行頭の空白除去前の各行が、字下げの無い行(設定一行目)かどうかのリストを返す(空行はFalse)
+    字下げのある行が一行も無い場合(字下げを除去済みの入力等)は、設定一行目を判別できないためNoneを返す
+    '''
+    flags = [line.strip() != "" and not line[0].isspace() for line in lines]
+    return flags if any(line.strip() != "" and line[0].isspace() for line in lines) else None
+
+
+def bind_top_levels(commands: list, top_levels: list or None)-> None:
+    '''入力コマンド列と、その各行の字下げの情報(top_level_flagsの戻り値)を対応付ける(config_tableで作成する表が参照する) '''
+    global config_top_levels
+    config_top_levels = (commands, top_levels)
+
+
+def top_levels_of(commands: list)-> list or None:
+    '''bind_top_levelsでコマンド列に対応付けた各行の字下げの情報を返す(対応付けの無い場合はNone) '''
+    return config_top_levels[1] if config_top_levels[0] is commands else None
+
+
+def config_table(builder: 'function', commands: list, **options)-> object:
+    '''作成関数builderにより設定ファイル全体のコマンド列から作成した表を返す
+    同一のコマンド列(リストオブジェクト)に対しては最初の呼び出し時にコマンド列を一度だけ走査して作成し、
+    以降の呼び出し(他の要望番号の処理)では作成済みのものを返す。保持するのは作成関数毎に直近のコマンド列の分のみ
+    optionsは作成関数にそのまま渡す(コマンド列から定まるもののみとする)
+    '''
+    cached = config_tables.get(builder)
+    if cached is None or cached[0] is not commands:
+        cached = config_tables[builder] = (commands, builder(commands, **options))
+    return cached[1]
+
+
+def interface_table(commands: list)-> 'InterfaceTable':
+    '''IF表(InterfaceTable)を返す(config_tableによる作成済みのもの) '''
+    return config_table(build_interface_table, commands, top_levels=top_levels_of(commands))
+
+
+def static_route_table(commands: list)-> 'StaticRouteTable':
+    '''Staticルート表(StaticRouteTable、各ルートのBFD・Track設定有無を含む)を返す(config_tableによる作成済みのもの) '''
+    return config_table(build_static_route_table, commands, top_levels=top_levels_of(commands))
+
+
+class ScanCache:
+    '''
+    find_matching_line_for_each_config_levelの抽出結果を、実行毎(入力コマンド列毎)に保持するクラス
+    キーは(検索パターンのタプル, Lv, ptn, size)とし、同一のコマンド列に対する同一キーの抽出は一度だけ行う
+
+    抽出結果は呼び出し側で変更される場合がある(make_hierachyによるspan情報の更新、extendによる伸長等)ため、
+    保持したものは呼び出し側に渡さず、data・levels(span-listの各要素まで)を複製して返す
+
+    インスタンス変数
+    commands : 保持している抽出結果の元となったコマンド列(リストオブジェクト)
+    results  : {キー: CommandLevelList}
+    hits     : 保持した抽出結果を返した回数
+    misses   : 全行を走査して抽出した回数
+    '''
+
+    def __init__(self) -> None:
+        self.commands = None; self.results = {}; self.hits = 0; self.misses = 0
+
+
+    def lookup(self, commands: list, key: tuple, scan: 'function')-> 'CommandLevelList':
+        ''' キーに対応する抽出結果の複製を返す(未抽出の場合はscanを呼び出して抽出し保持する)
+        引数: commands - 抽出対象のコマンド列(直前の呼び出しと異なるリストオブジェクトの場合は保持内容と回数を初期化する)
+              key      - (検索パターンのタプル, Lv, ptn, size)
+              scan     - 抽出処理(引数なしでCommandLevelListを返す関数)
+        '''
+        self.bind(commands)
+        if key in self.results:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.results[key] = scan()
+        return self.copy(self.results[key])
+
+
+    def prefill(self, commands: list, key: tuple, scan: 'function')-> None:
+        ''' キーに対応する抽出結果が未保持の場合のみscanを呼び出して抽出し保持する(複製は返さない、引数はlookupと同じ) '''
+        self.bind(commands)
+        if key not in self.results:
+            self.misses += 1
+            self.results[key] = scan()
+
+
+    def bind(self, commands: list)-> None:
+        ''' 抽出対象のコマンド列を設定する(直前と異なるリストオブジェクトの場合は保持内容と回数を初期化する) '''
+        if commands is not self.commands:
+            self.commands = commands; self.results = {}; self.hits = 0; self.misses = 0
+
+
+    @staticmethod
+    def copy(cll: 'CommandLevelList')-> 'CommandLevelList':
+        ''' CommandLevelListのdata・levels(各要素の辞書とそのspan-listの各要素)を複製した新規インスタンスを返す '''
+        levels = []
+        for lv in cll.levels:
+            level = dict(lv)
+            if "span-list" in lv:
+                level["span-list"] = [dict(span) for span in lv["span-list"]]
+            levels.append(level)
+        return CommandLevelList(list(cll.data), levels, lv = cll.lv)
+
+
+    def counts(self)-> tuple:
+        ''' 統計情報(hits, misses, 保持している抽出結果の数)を返す '''
+        return (self.hits, self.misses, len(self.results))
+
+
+    def info(self, counts: tuple = None)-> str:
+        ''' ベンチマーク出力用の統計情報を返す(countsはcountsの戻り値の形式(各ワーカの合計等)、省略時は自身のもの) '''
+        hits, misses, entries = self.counts() if counts is None else counts
+        return "pattern scan cache: {} hits, {} misses, {} entries".format(hits, misses, entries)
+
+
+# find_matching_line_for_each_config_levelの抽出結果のキャッシュ
+scan_cache = ScanCache()
+
+
+def matched_level(cmd: str, line_number: int, pattern: 're.Pattern', level: str = "1")-> dict:
+    '''find_matching_line_for_each_config_levelの抽出結果と同じ形式のlevels要素を作成する
+    patternのキャプチャ毎に"atype":"INFO"のspanを設定する(マッチしない場合は空の"span-list")
+    '''
+    m = re.search(pattern, cmd)
+    span_list = [] if m is None else \
+                [{"atype":"INFO", "error":None, "span":m.span(j+1), "info":m.group(j+1)} for j in range(len(m.groups()))]
+    return {"level":level, "line_number":line_number, "span-list":span_list}
+
+
+def interface_rows_cll(commands: list, rows: list, pattern: 're.Pattern', children: 'function')-> 'CommandLevelList':
+    '''IF表の行から、find_matching_line_for_each_config_level(IF設定一行目, 配下のコマンド, ..., Lv=2)の抽出結果と
+    同じ形式のCommandLevelListを作成する(設定ファイルを再走査せず、IF表の行番号からコマンドを参照する)
+    引数:
+    commands : 設定ファイル全体のコマンド列(行番号 - 1をindexとする)
+    rows     : InterfaceRowのリスト(出現順)
+    pattern  : IF設定一行目の検索パターン(level "1"の行のspanに使用)
+    children : InterfaceRowから配下の出力行の[(行番号, 検索パターン, level), ...]を求める関数
+    戻り値: IF毎に一行目と配下の出力行(行番号順)を並べたCommandLevelList(lvは最後の行のlevel)
+    '''
+    out = []; levels = []
+    for row in rows:
+        for n, p, level in [(row.line_number, pattern, "1")] + sorted(children(row), key=lambda x: x[0]):
+            out.append(commands[n - 1]); levels.append(matched_level(commands[n - 1], n, p, level))
+    return CommandLevelList(out, levels, lv = levels[-1]["level"] if levels != [] else "0")
+
+
+def find_interface_addresses(scans: list)-> 'CommandLevelList':
+    '''WAN-IF・LAN-IF・LoopbackIFのIF設定(interface/vrf member/ip address)の抽出結果を連結し、行番号の昇順で返す
+    引数: scans - interface_patternsの各パターンを一行目とする(pattern_vrf_member, pattern_ip_address, Lv=2)の抽出結果のリスト
+    '''
+    cll = CommandLevelList([], [], lv = "1")
+    for scan in scans:
+        cll.extend(scan)
+    return cll.sort_by_line_number()
+
+
+def connected_interface_info(connected: 'ConnectedIndex', targets: 'VrfIndex')-> 'CommandLevelList':
+    '''アドレスを同一VRFの直接接続IFに解決し、出力用に編集し返す
+    引数:
+    connected : IFサブネットのConnectedIndex
+    targets   : キーを(アドレス, 32)とするVrfIndex(BGPネイバー、Staticルートのネクストホップ等)
+    戻り値:
+    例: 'vSAMPLE-001-LB-VRF : Ethernet1/1.100 100.100.8.0/30 : neighbor 100.100.8.2'
+        'vSAMPLE-001-LB-VRF : 接続IF無し : neighbor 100.100.60.1'
+    接続IFが無いものは"error"を設定する(エラー表示用ハイライト)
+    '''
+    out = []
+    for vrf in targets.vrfs():
+        for (address, _), items in targets.partition(vrf).items():
+            owner = connected.lookup(vrf, address)
+            if owner is None:
+                label = "{} : 接続IF無し : ".format(vrf); error = "unresolved"
+            else:
+                label = "{} : {} {} : ".format(vrf, owner.interface, owner.prefix()); error = None
+            out.extend((label, error) + item for item in items)
+    return labeled_cll(out, "IF")
+
+
+def subinterface_vlan_info(table: 'InterfaceTable', pattern: 're.Pattern')-> 'CommandLevelList':
+    '''サブIFのSub-IF番号とencapsulation dot1qのVLAN番号を突合し、結果を出力用に編集し返す
+    引数:
+    table   : IF表(InterfaceTable)
+    pattern : 対象とするIF設定一行目の検索パターン(pattern_interface_EthernetXXXX等)
+    戻り値:
+    例: 'VLAN相違(dot1q 201) : interface Ethernet1/2.200'
+        'VLAN重複(port-channel5.2110 62行目) : interface port-channel5.2111'
+        'encapsulation無し : interface port-channel5.2112'
+    '''
+    subs = [row for row in table.select(pattern) if row.parent is not None]
+    rows = {row.line_number: (row.command, matched_level(row.command, row.line_number, pattern_interface)) for row in subs}
+    mismatches, duplicates, missing = check_subinterface_vlans(subs)
+
+    out = [("VLAN相違(dot1q {}) : ".format(sub.vlan), "mismatch") + rows[sub.line_number] for sub in mismatches]
+    out.extend(("VLAN重複({} {}行目) : ".format(first.interface, first.line_number), "duplicate") + rows[sub.line_number]
+               for sub, first in duplicates)
+    out.extend(("encapsulation無し : ", "missing") + rows[sub.line_number] for sub in missing)
+    return labeled_cll(out, "IF")
+
+
+def prefix_list_vrf_index(bgp: 'CommandLevelList', maps: 'CommandLevelList', pls: 'CommandLevelList')-> 'VrfIndex':
+    '''再配送用経路フィルタの各エントリを、再配送定義(redistribute)とルートマップを辿って求めたVRFで索引する
+    引数:
+    bgp  : BGP設定(router bgp/vrf/redistribute)のCommandLevelList
+    maps : 再配送用ルートマップ(route-map/match ip address)のCommandLevelList
+    pls  : 再配送用経路フィルタ(ip prefix-list)のCommandLevelList
+    戻り値:
+    キーを(ネットワークアドレス, プレフィックス長)、要素を(コマンド, levels情報)とするVrfIndex
+    複数VRFから参照される経路フィルタのエントリは各VRFに登録し、いずれからも参照されないものはVRF名称Noneに登録する
+    '''
+    redistributions = parse_redistributions(bgp.data, [lv.get("line_number") for lv in bgp.levels])
+    route_maps = compile_route_maps(maps.data, [lv.get("line_number") for lv in maps.levels])
+
+    vrfs = {} # {経路フィルタ名称: [VRF名称, ...]}
+    for vrf, _, name, _ in redistributions:
+        if name not in route_maps: continue
+        for pl in route_maps[name].referenced_prefix_lists():
+            if vrf not in vrfs.setdefault(pl, []): vrfs[pl].append(vrf)
+
+    index = VrfIndex()
+    for cmd, lv in pls.iter():
+        entry = PrefixListEntry.from_command(cmd)
+        if entry is None: continue
+        for vrf in vrfs.get(entry.name, [None]):
+            index.add(vrf, (entry.network, entry.length), (cmd, lv))
+    return index
+
+
+def vrf_rows_to_cll(rows: list)-> 'CommandLevelList':
+    '''(VRF名称, (コマンド, levels情報))のリストを、VRF名称を行頭に付加したCommandLevelListに変換し行番号の昇順で返す
+    例: ('vSAMPLE-001-LB-VRF', ('ip route 10.1.1.0/24 100.100.8.2', {...}))
+        -> 'vSAMPLE-001-LB-VRF : ip route 10.1.1.0/24 100.100.8.2'
+    VRF名称がNoneの要素は'VRF未特定'とする。元のspan情報は付加した文字数分ずらして引き継ぐ
+    '''
+    return labeled_cll([("{} : ".format(vrf if vrf != None else "VRF未特定"), None, cmd, lv)
+                        for vrf, (cmd, lv) in rows], "VRF")
+
+
+def compare_neighbors_by_vrf(interfaces: 'VrfIndex', neighbors: 'VrfIndex')-> 'CommandLevelList':
+    '''VRF毎に、BGPネイバーアドレスとWAN-IFのネットワークを突合する
+    引数:
+    interfaces : キーを(ネットワークアドレス, プレフィックス長)とするWAN-IFアドレスのVrfIndex
+    neighbors  : キーを(ネイバーアドレス, 32)とするBGPネイバー設定のVrfIndex
+    戻り値:
+    同一VRFのWAN-IFのネットワークに含まれないネイバー設定と、同一VRFのネイバーを含まないWAN-IFアドレス
+    (VRF名称を行頭に付加したCommandLevelList、行番号の昇順)
+    各VRFに存在するプレフィックス長毎にネイバーアドレスをマスクし、そのVRFのパーティションをハッシュ参照する
+    '''
+    rows = []
+    for vrf in neighbors.vrfs():
+        part = interfaces.partition(vrf)
+        lengths = sorted({length for _, length in part})
+        for (address, _), items in neighbors.partition(vrf).items():
+            if not any((address & mask_of(length), length) in part for length in lengths):
+                rows.extend((vrf, item) for item in items)
+
+    for vrf in interfaces.vrfs():
+        part = interfaces.partition(vrf)
+        lengths = sorted({length for _, length in part})
+        used = {(address & mask_of(length), length)
+                for address, _ in neighbors.partition(vrf) for length in lengths}
+        for key, items in part.items():
+            if key not in used:
+                rows.extend((vrf, item) for item in items)
+
+    return vrf_rows_to_cll(rows)
+
+
+def load_rules(path: str)-> dict:
+    '''ルールファイル(json形式)を読み込み、ユーザ定義の検査の検査仕様を返す
+    ルールファイルの形式: ルールのリスト(同一要望番号のルールは出現順に一つの要望番号の区分となる)
+    [{"reqno": 要望番号(int、組み込みの要望番号とは別の番号),
+      "title": 出力タイトル文字列または出力タイトル文字列のリスト,
+      "patterns": [検索パターン(正規表現文字列), ...](find_matching_line_for_each_config_levelのargs),
+      "Lv": 1または2(省略時:1), "ptn": 1～3(省略時:1),
+      "kind": s/n(省略時:'s'), "print": p/n(省略時:'p')},
+     ...]
+    例: [{"reqno": 20, "title": ["(20)ACL名称の確認", "●受信用ACL"], "patterns": ["^ip access-list\\s{1}(\\S+-NER-IN-ACL)"]},
+         {"reqno": 20, "title": "●Bleaf LAN-IFのdescription", "patterns": ["^interface port-channel", "^description Bleaf"], "Lv": 2}]
+    戻り値: {要望番号: CheckSpec(check_rules, ...), ...}
+    検索パターンは読み込み時に一度だけコンパイルし、組み込みの要望番号の抽出と同じ走査(run_scans)で検索する
+    キャプチャの無い検索パターンはマッチ全体をキャプチャする(出力時の着色範囲とするため、compile_rule_pattern参照)
+    '''
+    import json
+    enc = get_encode(path)
+    if enc == None:
+        raise UnicodeError
+    with open(path, "r", encoding=enc) as f:
+        rules = json.load(f)  # json形式の誤りはValueError(json.JSONDecodeError)
+    if not isinstance(rules, list):
+        raise ValueError('ルールファイルはルールのリストとしてください')
+
+    specs = {}
+    for n, rule in enumerate(rules, 1):
+        try:
+            reqno = int(rule["reqno"]); patterns = tuple(compile_rule_pattern(p) for p in rule["patterns"])
+            Lv = int(rule.get("Lv", 1)); ptn = int(rule.get("ptn", 1))
+            titles = [rule["title"]] if isinstance(rule["title"], str) else list(rule["title"])
+            kind = rule.get("kind", 's'); prints = rule.get("print", 'p')
+        except (KeyError, TypeError, AttributeError, re.error) as e:
+            raise ValueError('ルールファイルの{}番目のルールが不正です({})'.format(n, e))
+        if kind not in ('s', 'n') or prints not in ('p', 'n'):
+            raise ValueError('ルールファイルの{}番目のルールのkind(s/n)・print(p/n)の指定が不正です'.format(n))
+        if reqno in check_specs:
+            raise ValueError('ルールファイルの{}番目のルールの要望番号{}は組み込みの要望番号です'.format(n, reqno))
+        if patterns == () or Lv not in (1, 2) or ptn not in (1, 2, 3) or (Lv == 2 and len(patterns) < 2):
+            raise ValueError('ルールファイルの{}番目のルールの検索パターン・Lv・ptnの指定が不正です'.format(n))
+
+        spec = specs.setdefault(reqno, CheckSpec(check_rules, [], {}))
+        spec.titles.append({'kind': kind, 'print': prints, 'title': titles})
+        spec.scans["rule-{}".format(n)] = Scan(*patterns, Lv=Lv, ptn=ptn, sections=(len(spec.titles),))
+    return specs
+
+
+# 検索パターン先頭のインラインフラグ(例: '(?i)')取得用正規表現
+pattern_inline_flags = re.compile(r'''
+    ^(?:\(\?[aiLmsux]+\))*
+    ''', re.VERBOSE)
+
+
+def compile_rule_pattern(pattern: str)-> 're.Pattern':
+    ''' ルールファイルの検索パターンをコンパイルする(キャプチャの無いものはマッチ全体を括弧で囲みキャプチャとする)
+    先頭のインラインフラグ('(?i)'等)は括弧の外側に残す(例: '(?i)^HOSTNAME' -> '(?i)(^HOSTNAME)')
+    '''
+    compiled = re.compile(pattern)
+    if compiled.groups != 0:
+        return compiled
+    flags = pattern_inline_flags.match(pattern).group(0)
+    return re.compile(flags + '(' + pattern[len(flags):] + ')')
+
+
+# プロセスプール(--jobs)の各ワーカが保持する入力(argparse.Namespace, コマンド列)
+worker_input = None
+
+
+def init_reqno_worker(args, commands: list, specs: dict, top_levels: list = None)-> None:
+    '''プロセスプール(--jobs)のワーカの初期化処理
+    引数
+    args       - コマンドラインからの入力引数(argparse.Namespaceのインスタンス)
+    commands   - コマンド列から成るリスト(ワーカ毎に一度だけ受け渡す)
+    specs      - 呼び出し元の検査仕様(ルールファイルによるユーザ定義の検査を含む、spawnで起動された場合も同一とする)
+    top_levels - 各コマンドが字下げの無い行かどうかのリスト(top_level_flagsの戻り値)
+    '''
+    global worker_input
+    check_specs.update(specs)
+    scan_cache.bind(commands) # fork時に複製された呼び出し元の保持内容と回数を初期化
+    bind_top_levels(commands, top_levels)
+    worker_input = (args, commands)
+
+
+def run_reqno_in_worker(reqno: int)-> tuple:
+    '''ワーカにて要望番号一つ分の対象コマンド抽出を行う
+    引数
+    reqno - 要望番号
+    戻り値
+    (タイトル付与済みのCommandLevelList, 抽出中の標準出力の内容(str), ワーカのプロセスID,
+     ワーカのscan_cacheの統計情報(ScanCache.countsの戻り値、ワーカの実行開始からの累計))
+    標準出力は呼び出し元にて要望番号の順に出力するため、ワーカでは文字列として保持して返す
+    '''
+    args, commands = worker_input
+    out = io.StringIO()
+    with redirect_stdout(out):
+        section = find_matching_line_in_commands(args, commands, reqno)
+    return section, out.getvalue(), os.getpid(), scan_cache.counts()
+
+
+def read_acl_flows(path: str)-> list:
+    '''試験フローファイル(csv形式、タイトル行無し)を読み込み、フローのリストを返す
+    カラム1: 送信元アドレス(A.B.C.D)
+    カラム2: 宛先アドレス(A.B.C.D)
+    カラム3: ACL名称(省略時は全ACLを評価対象とする)
+    戻り値: [(送信元, 宛先, ACL名称 or None), ...]
+    '''
+    enc = get_encode(path)
+    if enc == None:
+        raise UnicodeError
+    with open(path, "r", encoding=enc) as f:
+        rows = [[x.strip() for x in row] for row in csv.reader(f)]
+    return [(row[0], row[1], row[2] if len(row) >= 3 and row[2] != "" else None) for row in rows if len(row) >= 2]
+
+
+def evaluate_acl_flows(access_lists: dict, flows: list)-> 'CommandLevelList':
+    '''試験フローをACL毎に一括評価し、最初にマッチしたエントリ(seq番号/action)を出力用に編集し返す
+    引数:
+    access_lists : {ACL名称: AccessList, ...}(compile_access_listsの戻り値)
+    flows        : [(送信元, 宛先, ACL名称 or None), ...](read_acl_flowsの戻り値)
+    戻り値:
+    ACL毎(出現順)、フロー毎(入力順)の評価結果を格納したCommandLevelList
+    例: 'vSAMPLE-TEST-NER-IN-ACL : 100.100.8.1 -> 10.0.0.1 : seq 10 permit'
+        'vSAMPLE-TEST-NER-IN-ACL : 100.100.7.1 -> 10.0.0.1 : 暗黙のdeny'
+        'vSAMPLE-TEST-NER-IN-ACL : 100.100.9.1 -> 10.0.0.1 : seq 20 permit (tcp:アドレスのみ評価)'
+    行番号にはマッチしたエントリの行番号(暗黙のdenyの場合はACL一行目の行番号)を設定する
+    プロトコルがip以外のエントリは送信元・宛先アドレスのみで評価し、その旨を付記する(フローはL4情報を持たないため)
+    ACL名称指定のフローのうち、ACLが存在しないものは'未定義ACL'として出力する(行番号無し)
+    送信元・宛先のいずれかがA.B.C.D形式のアドレスでないフローは'アドレス不正'として出力する(行番号無し)
+    '''
+    out = []; levels = []
+
+    def is_ipv4_address(addr: str)-> bool:
+        try:
+            ipv4_to_int(addr); return True
+        except ValueError:
+            return False
+
+    def append(line: str, error: str or None, start: int, line_number: int or None)-> None:
+        out.append(line)
+        level = {"level":"1", "span-list":[{"atype":"ACL", "error":error, "span":(start, len(line))}]}
+        if line_number != None:
+            level["line_number"] = line_number
+        levels.append(level)
+
+    for name, acl in access_lists.items():
+        targets = [(src, dst) for src, dst, acl_name in flows if acl_name == None or acl_name == name]
+        if targets == []: continue
+        valid = [is_ipv4_address(src) and is_ipv4_address(dst) for src, dst in targets]
+        flows_ok = [flow for flow, ok in zip(targets, valid) if ok]
+        indexes, actions = acl.evaluate(addresses_to_array([x[0] for x in flows_ok]),
+                                        addresses_to_array([x[1] for x in flows_ok]))
+        results = zip(indexes, actions)
+        for (src, dst), ok in zip(targets, valid):
+            head = "{} : {} -> {} : ".format(name, src, dst)
+            if not ok: # アドレス不正のフローはその行のみエラーとして出力
+                append(head + "アドレス不正", "invalid", len(head), None); continue
+            index, permit = next(results)
+            if index < 0:
+                append(head + "暗黙のdeny", "deny", len(head), acl.line_number)
+            else:
+                entry = acl.entries[int(index)] # 同一seqのエントリが複数ある場合もマッチしたエントリ
+                note = "" if entry.protocol == "ip" else " ({}:アドレスのみ評価)".format(entry.protocol)
+                append(head + "seq {} {}{}".format(entry.seq, "permit" if permit else "deny", note),
+                       None if permit else "deny", len(head), entry.line_number)
+
+    for src, dst, acl_name in flows:
+        if acl_name != None and acl_name not in access_lists:
+            head = "{} : {} -> {} : ".format(acl_name, src, dst)
+            append(head + "未定義ACL", "undefined", len(head), None)
+
+    return CommandLevelList(out, levels, lv = "1")
+
+
+
 class RetryError(Exception):
     ''' リトライオーバ例外定義 '''
     pass
@@ -2830,6 +4350,10 @@ if __name__ == '__main__':
     parser.add_argument('arg3', nargs= '?', default=None, help="arg3(オプション) - 出力ファイル格納ディレクトリ")
 
     parser.add_argument('--f',  nargs='?', const='stdin', help="コマンドラインからの入力ファイル名指定ならびに標準コンソールへの出力実行")
+    parser.add_argument('--acl_flows', default=None, help="ACL評価用試験フローファイル(csv:送信元,宛先[,ACL名称])")
+    parser.add_argument('--rules', default=None, help="ユーザ定義の検査のルールファイル(json)")
+    parser.add_argument('--jobs', type=int, default=1, help="要望番号毎の並列実行のプロセス数(省略時:1)")
+    parser.add_argument('--scan_jobs', type=int, default=1, help="コマンド列を分割して並列に検索するプロセス数(省略時:1)")
     parser.add_argument('-j', '--json', action='store_true', default=False, help="levelsのjson形式dump")
     parser.add_argument('-n', '--line_number', action='store_true', default=False, help="行番号付加(開始番号=1)")
     parser.add_argument('-p', '--preview_mode', action='store_true', default=False, help="previewモード指定")